@@ -9,7 +9,7 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
-import os, dj_database_url
+import os, tempfile, dj_database_url
 from pathlib import Path
 from decouple import config, Csv
 
@@ -45,6 +45,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'bids.middleware.TrafficCaptureMiddleware',  # Solo con TRAFFIC_CAPTURE_ENABLED
+    'bids.middleware.JSONCompressionMiddleware',  # Antes de AdmissionControl: guarda sus copias sin comprimir
+    'bids.middleware.AdmissionControlMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -94,6 +97,13 @@ DATABASES = {
     )
 }
 
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # Las transacciones que leen y luego escriben bajo concurrencia (pujas) toman el bloqueo
+    # al empezar con bids.db.write_transaction; el resto queda diferido
+    # Los tests de carreras (bids/tests.py) usan hilos con su propia conexión: la base de test
+    # tiene que ser un archivo, no la base en memoria. En el directorio temporal, fuera del repo
+    DATABASES['default']['TEST'] = {'NAME': os.path.join(tempfile.gettempdir(), 'auction_site_test_db.sqlite3')}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -131,6 +141,13 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = config('STATIC_ROOT', default=os.path.join(BASE_DIR, 'staticfiles'))
+
+# collectstatic deja los archivos con hash en el nombre y sus versiones .gz/.br (bids/storage.py)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'bids.storage.CompressedManifestStaticFilesStorage'},
+}
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -139,3 +156,126 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Subastas: archivo de pujas y chat de subastas finalizadas
+
+AUCTION_ARCHIVE_AFTER_DAYS = config('AUCTION_ARCHIVE_AFTER_DAYS', default=30, cast=int)
+AUCTION_ARCHIVE_BATCH_SIZE = config('AUCTION_ARCHIVE_BATCH_SIZE', default=1000, cast=int)
+
+# Hilos para generar variantes de imagen (thumbnail, medium, WebP) en segundo plano
+IMAGE_VARIANT_WORKERS = config('IMAGE_VARIANT_WORKERS', default=2, cast=int)
+
+
+# Caché
+# Por defecto en memoria del proceso; con REDIS_URL se comparte entre workers.
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'auction-site',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# max-age (segundos) de las respuestas de subastas finalizadas (Cache-Control: public, immutable)
+FINISHED_AUCTION_MAX_AGE = config('FINISHED_AUCTION_MAX_AGE', default=60 * 60 * 24, cast=int)
+# Segundos tras end_time antes de cachear para siempre una subasta finalizada. Tiene que superar
+# AUCTION_STATE_TTL más el retraso del bus: hasta entonces otro worker puede no haber visto una extensión
+FINISHED_CACHE_GRACE = config('FINISHED_CACHE_GRACE', default=30.0, cast=float)
+
+# Ventana (segundos) durante la cual lecturas idénticas reutilizan la misma respuesta (single-flight)
+SINGLE_FLIGHT_FRESHNESS = config('SINGLE_FLIGHT_FRESHNESS', default=0.25, cast=float)
+
+# Segundos que una entrada del estado en memoria (bids/state.py) se considera válida sin recargar.
+# Los cambios de este proceso se aplican al instante; los de otros workers llegan por el bus o, con
+# INVALIDATION_BUS = 'local', solo al vencer este TTL.
+AUCTION_STATE_TTL = config('AUCTION_STATE_TTL', default=2.0, cast=float)
+
+# Bus de invalidación entre workers (bids/bus.py): 'local', 'channels', 'notify' (PostgreSQL) o 'table'
+INVALIDATION_BUS = config('INVALIDATION_BUS', default='local')
+# Segundos entre lecturas de la tabla de eventos con INVALIDATION_BUS = 'table'
+INVALIDATION_POLL_INTERVAL = config('INVALIDATION_POLL_INTERVAL', default=1.0, cast=float)
+# Segundos que se conservan los eventos de la tabla antes de purgarlos
+INVALIDATION_EVENT_RETENTION = config('INVALIDATION_EVENT_RETENTION', default=60 * 60, cast=int)
+# TTL (segundos) de los cachés locales invalidados por el bus (IPs baneadas, invitados)
+LOCAL_CACHE_TTL = config('LOCAL_CACHE_TTL', default=60.0, cast=float)
+
+# Cola de tareas en segundo plano (bids/tasks.py). Con 0 hilos las tareas se ejecutan en el momento
+TASK_QUEUE_WORKERS = config('TASK_QUEUE_WORKERS', default=2, cast=int)
+TASK_QUEUE_MAX_SIZE = config('TASK_QUEUE_MAX_SIZE', default=1000, cast=int)
+TASK_QUEUE_MAX_RETRIES = config('TASK_QUEUE_MAX_RETRIES', default=3, cast=int)
+# Espera (segundos) antes del primer reintento; se duplica en cada intento
+TASK_QUEUE_RETRY_DELAY = config('TASK_QUEUE_RETRY_DELAY', default=0.2, cast=float)
+
+# Control de admisión (bids.middleware.AdmissionControlMiddleware): bajo carga se rechazan los
+# polls de lectura (503 o copia reciente) y las pujas siempre entran
+ADMISSION_CONTROL_ENABLED = config('ADMISSION_CONTROL_ENABLED', default=True, cast=bool)
+# Peticiones simultáneas en este worker a partir de las cuales se rechazan polls
+ADMISSION_MAX_IN_FLIGHT = config('ADMISSION_MAX_IN_FLIGHT', default=32, cast=int)
+# Latencia media reciente de las consultas (ms) a partir de la cual se rechazan polls
+ADMISSION_MAX_DB_LATENCY_MS = config('ADMISSION_MAX_DB_LATENCY_MS', default=200.0, cast=float)
+# Segundos sugeridos al cliente en Retry-After
+ADMISSION_RETRY_AFTER = config('ADMISSION_RETRY_AFTER', default=2, cast=int)
+# Antigüedad máxima (segundos) de una respuesta servida como copia bajo carga
+ADMISSION_STALE_MAX_AGE = config('ADMISSION_STALE_MAX_AGE', default=10.0, cast=float)
+
+# Espectadores por subasta (bids/presence.py): ventana y tamaño de cada intervalo en segundos
+PRESENCE_WINDOW = config('PRESENCE_WINDOW', default=60, cast=int)
+PRESENCE_BUCKET = config('PRESENCE_BUCKET', default=10, cast=int)
+# Cada cuántos segundos un worker une sus espectadores con los del caché compartido
+PRESENCE_FLUSH_INTERVAL = config('PRESENCE_FLUSH_INTERVAL', default=2.0, cast=float)
+
+# Limpieza periódica (bids/retention.py): sesiones expiradas, invitados inactivos sin pujas y chat viejo
+RETENTION_BATCH_SIZE = config('RETENTION_BATCH_SIZE', default=1000, cast=int)
+# Pausa (segundos) entre lotes para no competir con las pujas en vivo
+RETENTION_PAUSE = config('RETENTION_PAUSE', default=0.05, cast=float)
+# Días sin pujar ni escribir tras los que se borra un invitado (mayor que la duración de la cookie de sesión)
+GUEST_RETENTION_DAYS = config('GUEST_RETENTION_DAYS', default=30, cast=int)
+# Días que se conservan los mensajes de chat (también los archivados)
+CHAT_RETENTION_DAYS = config('CHAT_RETENTION_DAYS', default=90, cast=int)
+
+# Captura de tráfico para pruebas de carga (bids/traffic.py, comando replay_traffic). Solo para
+# ventanas cortas: graba una traza anónima de cada petición
+TRAFFIC_CAPTURE_ENABLED = config('TRAFFIC_CAPTURE_ENABLED', default=False, cast=bool)
+TRAFFIC_CAPTURE_PATH = config('TRAFFIC_CAPTURE_PATH', default=os.path.join(BASE_DIR, 'traffic.trace'))
+# Fracción de visitantes que se graban (todas sus peticiones)
+TRAFFIC_CAPTURE_SAMPLE = config('TRAFFIC_CAPTURE_SAMPLE', default=1.0, cast=float)
+# Tamaño máximo del archivo; al llegar se deja de grabar
+TRAFFIC_CAPTURE_MAX_MB = config('TRAFFIC_CAPTURE_MAX_MB', default=100, cast=int)
+# Segundos máximos que un registro espera en memoria antes de escribirse
+TRAFFIC_CAPTURE_FLUSH_INTERVAL = config('TRAFFIC_CAPTURE_FLUSH_INTERVAL', default=1.0, cast=float)
+
+# Reloj de las subastas (bids/clock.py). CLOCK_SPEED distinto de 1 acelera el tiempo para pruebas
+# (60 = una hora por minuto) a partir de CLOCK_START (ISO 8601; por defecto al arrancar el proceso).
+# Nunca en producción
+CLOCK_SPEED = config('CLOCK_SPEED', default=1.0, cast=float)
+CLOCK_START = config('CLOCK_START', default='')
+
+# Inicio de subastas sin estampida (bids/warmup.py). Segundos antes del inicio en que se precalienta product_detail
+AUCTION_WARMUP_AHEAD = config('AUCTION_WARMUP_AHEAD', default=120, cast=int)
+# TTL (segundos) del producto cacheado para product_detail; los precios y el fin salen siempre del estado en memoria
+AUCTION_DETAIL_CACHE_TTL = config('AUCTION_DETAIL_CACHE_TTL', default=300, cast=int)
+# La página de espera recarga en start_time más un retraso aleatorio de hasta estos segundos
+AUCTION_START_JITTER = config('AUCTION_START_JITTER', default=5.0, cast=float)
+
+# Estáticos con hash (bids/assets.py): max-age (segundos) de la caché del navegador
+STATIC_MAX_AGE = config('STATIC_MAX_AGE', default=60 * 60 * 24 * 365, cast=int)
+# Las respuestas JSON desde este tamaño (bytes) se mandan con gzip (bids.middleware.JSONCompressionMiddleware)
+JSON_COMPRESSION_MIN_BYTES = config('JSON_COMPRESSION_MIN_BYTES', default=512, cast=int)
+
+# Login de las vistas solo para staff (/api/metrics/)
+LOGIN_URL = 'admin:login'
+# Abrir la base, el caché y compilar las rutas al cargar la aplicación (bids/startup.py).
+# Activo en el perfil auction_site.settings_api
+STARTUP_PREWARM = config('STARTUP_PREWARM', default=False, cast=bool)
@@ -0,0 +1,34 @@
+"""
+Perfil para los workers de la API (polling y pujas) que se suman al escalar antes
+de una subasta grande:
+
+    DJANGO_SETTINGS_MODULE=auction_site.settings_api gunicorn auction_site.wsgi
+
+Mismas settings que auction_site.settings salvo lo que esos endpoints no usan:
+sin admin, messages, staticfiles ni channels (el bus 'channels' lo importa cuando
+hace falta), sin las rutas del admin, de estáticos ni de media, y con las
+conexiones precalentadas al cargar la aplicación (bids/startup.py).
+
+Las páginas, el admin y los comandos (migrate, collectstatic) van con auction_site.settings.
+Medir el arranque: python manage.py benchmark_startup
+"""
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',  # Pujas de usuarios registrados (Bid.user) y /api/metrics/
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'bids',
+]
+
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE  # noqa: F405
+    if middleware != 'django.contrib.messages.middleware.MessageMiddleware'
+]
+
+ROOT_URLCONF = 'auction_site.urls_api'
+
+# El admin vive en los workers completos
+LOGIN_URL = '/admin/login/'
+
+STARTUP_PREWARM = config('STARTUP_PREWARM', default=True, cast=bool)  # noqa: F405
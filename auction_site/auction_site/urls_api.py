@@ -0,0 +1,9 @@
+"""
+URLconf del perfil auction_site.settings_api: solo las rutas de bids (sin admin,
+estáticos ni media). Las páginas siguen aquí para que reverse() funcione igual.
+"""
+from django.urls import path, include
+
+urlpatterns = [
+    path('', include('bids.urls')),
+]
@@ -1,42 +1,199 @@
+import json
+
 from django.contrib import admin
-from .models import Product, Bid, BannedIP
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from .models import Product, Bid, BannedIP, GuestUser
+from . import cache as finished_cache
+from .presence import presence
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador que evita el COUNT(*) exacto sobre tablas grandes.
+    En Postgres usa la estimación del planner (pg_class.reltuples sin filtros,
+    EXPLAIN con filtros); si la estimación es pequeña, o en otros motores, cuenta de verdad.
+    """
+    # Por debajo de este número de filas el COUNT(*) exacto es barato
+    EXACT_COUNT_THRESHOLD = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            estimate = self._estimate(queryset, connection)
+            if estimate is not None and estimate > self.EXACT_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+    def _estimate(self, queryset, connection):
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                # reltuples vale -1 si la tabla nunca fue analizada
+                return int(row[0]) if row and row[0] >= 0 else None
+
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+
+
+class ProductAutocompleteFilter(admin.SimpleListFilter):
+    """
+    Filtro por producto con búsqueda (select2 del admin) en lugar de un enlace
+    por cada producto creado. Solo consulta el producto seleccionado.
+    """
+    title = 'producto'
+    parameter_name = 'product_id'
+    template = 'admin/autocomplete_filter.html'
+    field_name = 'product'
+
+    def lookups(self, request, model_admin):
+        value = self.value()
+        if value and value.isdigit():
+            return Product.objects.filter(id=value).values_list('id', 'name')
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value and value.isdigit():
+            return queryset.filter(product_id=value)
+        return queryset
+
+    def autocomplete_attrs(self):
+        """Atributos data-* que espera admin/js/autocomplete.js"""
+        return {
+            'app_label': Bid._meta.app_label,
+            'model_name': Bid._meta.model_name,
+            'field_name': self.field_name,
+        }
+
+
+class ScalableAdminMixin:
+    """Opciones comunes para listados con millones de filas"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = [
-        'name', 
-        'starting_price', 
-        'current_price', 
-        'start_time', 
-        'end_time', 
-        'status', 
+        'name',
+        'starting_price',
+        'current_price',
+        'start_time',
+        'end_time',
+        'status',
         'is_active',
         'is_silent_auction',
-        'anti_sniping_active'
+        'anti_sniping_active',
+        'bid_count',
+        'unique_bidders',
+        'viewers',
     ]
+    list_select_related = ['stats']
     list_filter = [
-        'is_active', 
-        'start_time', 
+        'is_active',
+        'start_time',
         'end_time',
-        'is_silent_auction', 
+        'is_silent_auction',
         'created_at'
     ]
-    
+    search_fields = ['name']
+    date_hierarchy = 'start_time'
+    ordering = ['-start_time']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        finished_cache.invalidate_product(obj.id)
+
+    def delete_model(self, request, obj):
+        product_id = obj.id
+        super().delete_model(request, obj)
+        finished_cache.invalidate_product(product_id)
+
+    def delete_queryset(self, request, queryset):
+        product_ids = list(queryset.values_list('id', flat=True))
+        super().delete_queryset(request, queryset)
+        for product_id in product_ids:
+            finished_cache.invalidate_product(product_id)
+
     def status(self, obj):
         return obj.status
     status.short_description = 'Estado'
 
+    def bid_count(self, obj):
+        return obj.get_stats().bid_count
+    bid_count.short_description = 'Pujas'
+
+    def unique_bidders(self, obj):
+        return obj.get_stats().unique_bidders
+    unique_bidders.short_description = 'Pujadores únicos'
+
+    def viewers(self, obj):
+        # Desde el caché de presencia (bids/presence.py), sin consultas
+        return presence.count(obj.id)
+    viewers.short_description = 'Espectadores'
+
 @admin.register(Bid)
-class BidAdmin(admin.ModelAdmin):
+class BidAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ['product', 'bidder', 'amount', 'created_at']
-    list_filter = ['product', 'created_at']
+    list_filter = [ProductAutocompleteFilter]
+    list_select_related = ['product', 'user', 'guest_user']
+    autocomplete_fields = ['product', 'guest_user']
+    raw_id_fields = ['user']
+    # created_at está indexado: los filtros por rango de fechas usan el índice
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
 
     def bidder(self, obj):
-        return obj.user.username if obj.user else obj.guest_user.username
-    
+        return obj.bidder_name
+
+    # Editar o borrar pujas cambia el resultado de la subasta: invalidar su caché
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        finished_cache.invalidate_product(obj.product_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        finished_cache.invalidate_product(obj.product_id)
+
+    def delete_queryset(self, request, queryset):
+        product_ids = set(queryset.values_list('product_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for product_id in product_ids:
+            finished_cache.invalidate_product(product_id)
+
+    @property
+    def media(self):
+        # El filtro por producto reutiliza el widget select2 de autocomplete_fields
+        return super().media + AutocompleteSelect(
+            Bid._meta.get_field('product'), self.admin_site
+        ).media
+
+
+@admin.register(GuestUser)
+class GuestUserAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ['username', 'ip_address', 'created_at', 'last_bid_time']
+    search_fields = ['^username']
+    ordering = ['username']
+
 
 @admin.register(BannedIP)
 class BannedIPAdmin(admin.ModelAdmin):
     list_display = ['ip_address', 'added_at']
     list_filter = ['added_at']
-    search_fields = ['ip_address']
\ No newline at end of file
+    search_fields = ['ip_address']
@@ -0,0 +1,301 @@
+"""
+Reporte posterior a las subastas (comando auction_report).
+
+Las pujas se leen con SQL crudo, producto por producto, en lotes de `chunk_size`
+filas (fetchmany sobre un cursor del lado del servidor en PostgreSQL) que pasan
+directo a arrays de numpy: la memoria depende del tamaño del lote y no del total
+de pujas. Cada lote se procesa vectorizado y al
+siguiente solo se arrastra lo imprescindible (última puja, minuto en curso,
+pujas candidatas a extensión anti-sniping).
+
+Métricas por subasta: velocidad de pujas, distribución de incrementos,
+extensiones anti-sniping y mensajes de chat. Patrones sospechosos: un invitado
+que puja repetidamente justo por encima de otro, e IPs con muchos invitados
+(sobre todo si varios pujan en la misma subasta).
+"""
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Bid, ChatMessage, GuestUser
+
+# Límites de los intervalos de incremento (montos en dólares enteros, como los botones de puja rápida)
+INCREMENT_BINS = [1, 10, 100, 1_000, 10_000, 100_000, 500_000, 1_000_000]
+INCREMENT_LABELS = ['<1'] + [f'>={limit:,}' for limit in INCREMENT_BINS]
+
+# "Justo por encima": incremento de como mucho el 1% del precio anterior (o 1 dólar)
+JUST_ABOVE_RATIO = 0.01
+
+# Mismas reglas que Product.extend_auction_if_needed
+ANTI_SNIPING_WINDOW_MS = 30_000
+ANTI_SNIPING_EXTENSION_MS = 30_000
+ANTI_SNIPING_MIN_INCREMENT = 1_000_000
+# Parejas (líder, seguidor) codificadas en un int64: líder << 32 | seguidor
+PAIR_SHIFT = 32
+# Tope de extensiones que se prueban por subasta (~3 días extra)
+MAX_EXTENSIONS = 10_000
+
+EPOCH_MS_SQL = {
+    'sqlite': "CAST(ROUND((julianday(created_at) - 2440587.5) * 86400000) AS INTEGER)",
+    'postgresql': "CAST(EXTRACT(EPOCH FROM created_at) * 1000 AS BIGINT)",
+    'mysql': "CAST(UNIX_TIMESTAMP(created_at) * 1000 AS SIGNED)",
+}
+
+
+def stream_bids(product_id, chunk_size):
+    """
+    Pujas del producto en orden cronológico, en lotes de arrays
+    (timestamps en ms, guest_user_id, montos). Usa product_bids_idx.
+    chunked_cursor: en PostgreSQL un cursor con nombre; con cursor() psycopg
+    traería todo el resultado a memoria en execute()
+    """
+    epoch = EPOCH_MS_SQL.get(connection.vendor)
+    if epoch is None:
+        raise ImproperlyConfigured(f'Motor no soportado: {connection.vendor}')
+    sql = (
+        f'SELECT {epoch}, COALESCE(guest_user_id, 0), amount FROM {Bid._meta.db_table} '
+        'WHERE product_id = %s ORDER BY created_at, id'
+    )
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql, [product_id])
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            data = np.array(rows, dtype=np.int64)
+            yield data[:, 0], data[:, 1], data[:, 2]
+
+
+def estimate_extensions(candidates, final_end_ms):
+    """
+    Extensiones anti-sniping a partir de las pujas que podían activarlas
+    (incremento >= 1M) y del end_time final. El end_time original no se guarda:
+    se prueba cada k (fin original = final - k extensiones) y se devuelve el mayor
+    k cuya simulación produce exactamente k extensiones. Suele ser el real: en
+    modo anti-sniping solo se aceptan pujas de +1M.
+
+    Con ventana = extensión, el fin simulado siempre cae en final - j extensiones:
+    la ventana j es [fin_j - ventana, fin_j] y la usa la primera candidata desde su
+    inicio. La única dependencia entre ventanas es una candidata justo en el borde,
+    que usa la anterior y no la siguiente. Se recorre j = 0, 1, 2... una sola vez
+    guardando, para cada estado del borde, si la simulación desde ahí termina
+    exactamente en el fin final: O(k + k log n) en lugar de simular cada k.
+    """
+    limit = min(len(candidates), MAX_EXTENSIONS)
+    if not limit:
+        return 0
+    timestamps = np.asarray(candidates, dtype=np.int64)
+    ends = final_end_ms - np.arange(limit + 1, dtype=np.int64) * ANTI_SNIPING_EXTENSION_MS
+    firsts = np.searchsorted(timestamps, ends - ANTI_SNIPING_WINDOW_MS).tolist()
+    ends = ends.tolist()
+
+    def window(j, edge_taken):
+        """(hay extensión en la ventana j, su puja cae justo en el borde con la j - 1)"""
+        i = firsts[j] + edge_taken
+        if i >= len(timestamps) or timestamps[i] > ends[j]:
+            return False, False
+        return True, int(timestamps[i]) == ends[j]
+
+    # exact[borde usado]: desde la ventana j se llega exactamente al fin final
+    exact = [not window(0, edge)[0] for edge in (0, 1)]
+    best = 0
+    for j in range(1, limit + 1):
+        exact = [hit and exact[edge] for hit, edge in (window(j, 0), window(j, 1))]
+        if exact[0]:
+            best = j
+    return best
+
+
+def merge_counts(codes, counts, new_codes, new_counts):
+    """Suma conteos por código. Devuelve (códigos únicos ordenados, conteos)"""
+    unique, inverse = np.unique(np.concatenate((codes, new_codes)), return_inverse=True)
+    totals = np.bincount(inverse, weights=np.concatenate((counts, new_counts)), minlength=len(unique))
+    return unique, totals.astype(np.int64)
+
+
+def _empty_counts():
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+
+class AuctionAnalyzer:
+    """Acumula las métricas de una subasta lote a lote"""
+
+    def __init__(self, product, flagged_ids):
+        self.product = product
+        self.flagged_ids = flagged_ids  # Invitados de IPs con muchos invitados
+        self.bids = 0
+        self.first_ts = None
+        self.last_ts = None
+        # Minuto en curso (ts // 60000, pujas): los lotes vienen ordenados por tiempo
+        self.minute = None
+        self.minute_count = 0
+        self.peak_per_minute = 0
+        self.increments = np.zeros(len(INCREMENT_LABELS), dtype=np.int64)
+        self.prev_guest = None
+        self.prev_amount = product.starting_price
+        self.candidates = []
+        self.pair_codes, self.pair_counts = _empty_counts()  # Veces que seguidor pujó justo encima de líder
+        self.flagged_bidders = set()
+
+    def add_chunk(self, timestamps, guests, amounts):
+        count = len(timestamps)
+        if self.first_ts is None:
+            self.first_ts = int(timestamps[0])
+        self.last_ts = int(timestamps[-1])
+        self.bids += count
+        self._add_velocity(timestamps)
+        if len(self.flagged_ids):
+            self.flagged_bidders.update(np.unique(guests[np.isin(guests, self.flagged_ids)]).tolist())
+        if self.product.is_silent_auction:
+            # Cada invitado tiene una sola puja que se reescribe: incrementos y "justo por encima" no aplican
+            return
+
+        # Puja anterior a cada una (la primera del lote usa la última del lote previo)
+        prev_amounts = np.concatenate(([self.prev_amount], amounts[:-1]))
+        prev_guests = np.concatenate(([self.prev_guest if self.prev_guest is not None else 0], guests[:-1]))
+        increments = amounts - prev_amounts
+        self.increments += np.bincount(
+            np.searchsorted(INCREMENT_BINS, increments, side='right'),
+            minlength=len(INCREMENT_LABELS),
+        )
+
+        just_above = (
+            (guests != prev_guests) & (prev_guests != 0) & (guests != 0) & (increments > 0)
+            & (increments <= np.maximum(1, prev_amounts * JUST_ABOVE_RATIO))
+        )
+        if just_above.any():
+            codes = (prev_guests[just_above] << PAIR_SHIFT) | guests[just_above]
+            self.pair_codes, self.pair_counts = merge_counts(
+                self.pair_codes, self.pair_counts, *np.unique(codes, return_counts=True)
+            )
+
+        self.candidates.extend(timestamps[increments >= ANTI_SNIPING_MIN_INCREMENT].tolist())
+        self.prev_amount = int(amounts[-1])
+        self.prev_guest = int(guests[-1])
+
+    def _add_velocity(self, timestamps):
+        # Ordenados por tiempo: cada minuto es un tramo contiguo
+        minutes = timestamps // 60_000
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(minutes)) + 1))
+        counts = np.diff(np.append(starts, len(minutes)))
+        minutes = minutes[starts]
+        if minutes[0] == self.minute:
+            counts[0] += self.minute_count
+        self.peak_per_minute = max(self.peak_per_minute, int(counts.max()))
+        self.minute, self.minute_count = int(minutes[-1]), int(counts[-1])
+
+    def result(self, chat_messages):
+        product = self.product
+        duration = (self.last_ts - self.first_ts) / 1000 if self.bids else 0
+        row = {
+            'id': product.id,
+            'name': product.name,
+            'silent': product.is_silent_auction,
+            'bids': self.bids,
+            'unique_bidders': product.get_stats().unique_bidders,
+            'bidding_seconds': round(duration, 1),
+            'bids_per_minute': round(self.bids / (duration / 60), 2) if duration else None,
+            'peak_bids_per_minute': self.peak_per_minute,
+            'final_price': product.current_price,
+            'anti_sniping_extensions': None,
+            'chat_messages': chat_messages,
+            'increments': dict(zip(INCREMENT_LABELS, self.increments.tolist())),
+        }
+        if not product.is_silent_auction:
+            # anti_sniping_active no se apaga nunca: si está en False no hubo extensiones
+            end_ms = int(product.end_time.timestamp() * 1000)
+            row['anti_sniping_extensions'] = estimate_extensions(self.candidates, end_ms) if product.anti_sniping_active else 0
+        return row
+
+
+def _ip_clusters(min_guests):
+    """IPs con al menos `min_guests` invitados. Agrupa la base de datos (usa el índice de ip_address)"""
+    clusters = (
+        GuestUser.objects.exclude(ip_address__isnull=True).exclude(ip_address='')
+        .values('ip_address').annotate(guests=Count('id')).filter(guests__gte=min_guests)
+    )
+    return {row['ip_address']: row['guests'] for row in clusters}
+
+
+def build_report(products, chunk_size=50_000, min_pair_count=3, min_ip_guests=3, top=50):
+    """Recorre las pujas de `products` y devuelve el reporte como dict"""
+    started = time.monotonic()
+    clusters = _ip_clusters(min_ip_guests)
+    flagged_guests = dict(
+        GuestUser.objects.filter(ip_address__in=list(clusters)).values_list('id', 'ip_address')
+    ) if clusters else {}
+    flagged_ids = np.fromiter(flagged_guests, dtype=np.int64, count=len(flagged_guests))
+
+    products = list(products.filter(archived_at__isnull=True).select_related('stats').order_by('id'))
+    chat_counts = dict(
+        ChatMessage.objects.filter(product_id__in=[p.id for p in products])
+        .values('product_id').annotate(n=Count('id')).values_list('product_id', 'n')
+    )
+
+    auctions = []
+    increments = np.zeros(len(INCREMENT_LABELS), dtype=np.int64)
+    pair_codes, pair_times = _empty_counts()
+    pair_auction_codes, pair_auctions = _empty_counts()
+    cluster_auctions = defaultdict(int)
+    total_bids = 0
+
+    for product in products:
+        analyzer = AuctionAnalyzer(product, flagged_ids)
+        for chunk in stream_bids(product.id, chunk_size):
+            analyzer.add_chunk(*chunk)
+        total_bids += analyzer.bids
+        auctions.append(analyzer.result(chat_counts.get(product.id, 0)))
+        increments += analyzer.increments
+        pair_codes, pair_times = merge_counts(pair_codes, pair_times, analyzer.pair_codes, analyzer.pair_counts)
+        pair_auction_codes, pair_auctions = merge_counts(
+            pair_auction_codes, pair_auctions, analyzer.pair_codes, np.ones_like(analyzer.pair_codes)
+        )
+        # Varios invitados de la misma IP pujando en la misma subasta
+        by_ip = defaultdict(int)
+        for guest_id in analyzer.flagged_bidders:
+            by_ip[flagged_guests[guest_id]] += 1
+        for ip, bidders in by_ip.items():
+            if bidders > 1:
+                cluster_auctions[ip] += 1
+
+    # Ambos arrays tienen los mismos códigos (cada pareja suma a los dos a la vez)
+    order = np.argsort(-pair_times, kind='stable')
+    order = order[pair_times[order] >= min_pair_count][:top]
+    suspicious = [
+        (code >> PAIR_SHIFT, code & ((1 << PAIR_SHIFT) - 1), times, auctions)
+        for code, times, auctions in zip(
+            pair_codes[order].tolist(), pair_times[order].tolist(), pair_auctions[order].tolist()
+        )
+    ]
+    names = dict(GuestUser.objects.filter(
+        id__in={guest for leader, follower, _, _ in suspicious for guest in (leader, follower)}
+    ).values_list('id', 'username'))
+
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'auctions': auctions,
+        'increments': dict(zip(INCREMENT_LABELS, increments.tolist())),
+        'suspicious_pairs': [
+            {
+                'leader': names.get(leader, leader),
+                'follower': names.get(follower, follower),
+                'times': times,
+                'auctions': auctions,
+            }
+            for leader, follower, times, auctions in suspicious
+        ],
+        'ip_clusters': sorted(
+            (
+                {'ip': ip, 'guests': guests, 'shared_auctions': cluster_auctions.get(ip, 0)}
+                for ip, guests in clusters.items()
+            ),
+            key=lambda row: (-row['shared_auctions'], -row['guests']),
+        )[:top],
+        'bids_processed': total_bids,
+        'elapsed_seconds': round(time.monotonic() - started, 2),
+    }
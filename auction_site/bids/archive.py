@@ -0,0 +1,103 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import clock
+from .bus import bus
+from .models import Product, Bid, ChatMessage, ArchivedBid, ArchivedChatMessage
+
+
+def _copy_in_batches(queryset, build, model, batch_size):
+    """
+    Copia filas al archivo recorriendo por id (keyset) en lotes.
+    ignore_conflicts hace la copia idempotente: si el proceso se cortó a mitad,
+    la siguiente ejecución retoma sin duplicar filas.
+    """
+    copied = 0
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id).order_by('id')[:batch_size])
+        if not batch:
+            return copied
+        model.objects.bulk_create([build(obj) for obj in batch], ignore_conflicts=True)
+        copied += len(batch)
+        last_id = batch[-1].id
+
+
+def _delete_in_batches(queryset, batch_size):
+    """Borra en lotes cortos para no mantener bloqueos largos sobre las tablas calientes"""
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        queryset.model.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+
+
+def archive_product(product, batch_size):
+    """
+    Mueve las pujas y el chat de un producto a las tablas de archivo.
+    1. Copia todo al archivo (sin borrar nada todavía).
+    2. Marca el producto como archivado: desde aquí las lecturas usan el archivo.
+    3. Borra las filas originales en lotes.
+    """
+    bids = Bid.objects.filter(product=product).select_related('user', 'guest_user')
+    messages = ChatMessage.objects.filter(product=product).select_related('guest_user')
+
+    bids_copied = _copy_in_batches(bids, lambda bid: ArchivedBid(
+        id=bid.id,
+        product_id=bid.product_id,
+        bidder_name=bid.bidder_name,
+        amount=bid.amount,
+        created_at=bid.created_at,
+    ), ArchivedBid, batch_size)
+
+    messages_copied = _copy_in_batches(messages, lambda msg: ArchivedChatMessage(
+        id=msg.id,
+        product_id=msg.product_id,
+        author_name=msg.author_name,
+        message=msg.message,
+        created_at=msg.created_at,
+    ), ArchivedChatMessage, batch_size)
+
+    with transaction.atomic():
+        Product.objects.filter(id=product.id).update(archived_at=timezone.now())
+    # update() no dispara señales: avisar a los workers que lean desde el archivo
+    bus.publish('product', product.id)
+
+    _delete_in_batches(Bid.objects.filter(product=product), batch_size)
+    _delete_in_batches(ChatMessage.objects.filter(product=product), batch_size)
+
+    return bids_copied, messages_copied
+
+
+def archive_finished_auctions(days=None, batch_size=None, limit=None):
+    """
+    Archiva las subastas finalizadas hace más de `days` días.
+    Es el punto de entrada tanto del comando archive_auctions como del job periódico.
+    Devuelve un resumen con lo que se movió.
+    """
+    if days is None:
+        days = settings.AUCTION_ARCHIVE_AFTER_DAYS
+    if batch_size is None:
+        batch_size = settings.AUCTION_ARCHIVE_BATCH_SIZE
+
+    cutoff = clock.now() - datetime.timedelta(days=days)
+    # Usa finished_auctions_idx (-end_time)
+    products = Product.objects.filter(
+        end_time__lt=cutoff,
+        archived_at__isnull=True,
+    ).order_by('-end_time')
+    if limit:
+        products = products[:limit]
+
+    summary = {'products': 0, 'bids': 0, 'messages': 0}
+    for product in products:
+        bids_copied, messages_copied = archive_product(product, batch_size)
+        summary['products'] += 1
+        summary['bids'] += bids_copied
+        summary['messages'] += messages_copied
+    return summary
@@ -0,0 +1,73 @@
+"""
+Servidor de archivos estáticos (STATIC_URL) para cuando no hay un servidor web delante.
+
+- Archivos con hash de collectstatic (bids/storage.py): Cache-Control de un año,
+  immutable. El navegador no los vuelve a pedir hasta que cambie la URL.
+- El resto (sin hash, o sin collectstatic en desarrollo): no-cache con Last-Modified.
+- Si el cliente acepta br o gzip y existe la versión precomprimida, se manda esa.
+"""
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+# (Accept-Encoding, sufijo) en orden de preferencia
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _find(name):
+    if settings.STATIC_ROOT:
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            # Fuera de STATIC_ROOT ('../'): como cualquier archivo inexistente
+            raise Http404('Archivo no encontrado')
+        if os.path.isfile(path):
+            return path
+    # Sin collectstatic (desarrollo, tests): desde las carpetas de la app
+    return finders.find(name)
+
+
+def serve_static(request, path):
+    name = posixpath.normpath(path).lstrip('/')
+    fullpath = _find(name)
+    if not fullpath:
+        raise Http404('Archivo no encontrado')
+
+    is_hashed = getattr(staticfiles_storage, 'is_hashed', None)
+    immutable = is_hashed is not None and is_hashed(name)
+    stat = os.stat(fullpath)
+    if not immutable and not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type, _ = mimetypes.guess_type(fullpath)
+    accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    encoding, body = None, fullpath
+    for candidate, suffix in PRECOMPRESSED:
+        if candidate in accept and os.path.isfile(fullpath + suffix):
+            encoding, body = candidate, fullpath + suffix
+            break
+
+    response = FileResponse(
+        open(body, 'rb'),
+        content_type=content_type or 'application/octet-stream',
+        filename=os.path.basename(fullpath),
+    )
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if immutable:
+        patch_cache_control(response, public=True, max_age=settings.STATIC_MAX_AGE, immutable=True)
+    else:
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,288 @@
+"""
+Bus de invalidación entre procesos.
+
+Un mensaje es un par (topic, key), por ejemplo ('product', 42). `publish`
+entrega el mensaje de inmediato a los suscriptores de este proceso y lo envía
+a los demás procesos a través del transporte configurado en INVALIDATION_BUS.
+Los mensajes que vuelven al proceso que los originó se descartan (ya se
+entregaron localmente).
+
+Transportes:
+- local: un solo proceso, no hay a quién más avisar.
+- channels: el channel layer de Channels (channels_redis entre servidores).
+- notify: LISTEN/NOTIFY de PostgreSQL.
+- table: tabla InvalidationEvent consultada cada INVALIDATION_POLL_INTERVAL
+  segundos. Funciona con cualquier base de datos (SQLite incluida).
+
+El transporte se arranca con `bus.start()` la primera vez que un caché guarda
+algo: un proceso que no cachea nada (migrate, shell) no escucha.
+
+Con gunicorn --preload (bids/startup.py) los workers nacen por fork del padre:
+cada hijo toma un ORIGIN propio y vuelve a arrancar su listener (los hilos no
+sobreviven al fork). Si heredaran el del padre, descartarían los mensajes de
+sus hermanos como propios.
+"""
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from .tasks import task_queue
+
+logger = logging.getLogger(__name__)
+
+
+def new_origin():
+    return f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+# Identifica a este proceso como origen de los mensajes (se renueva tras un fork)
+ORIGIN = new_origin()
+
+# Pausa antes de reintentar cuando el listener pierde la conexión
+RECONNECT_DELAY = 5.0
+
+
+def _encode(message):
+    return json.dumps(message, separators=(',', ':'))
+
+
+class LocalTransport:
+    """Para un solo proceso: no hay a quién más avisar"""
+
+    def send(self, message):
+        pass
+
+    def start(self, deliver):
+        pass
+
+
+class ChannelsTransport:
+    """Envía por group_send y escucha en un hilo con su propio event loop"""
+    GROUP = 'invalidation'
+    # channels_redis olvida los miembros de un grupo tras group_expiry (1 día por defecto)
+    REJOIN_INTERVAL = 60 * 60
+
+    def __init__(self):
+        from channels.layers import get_channel_layer
+
+        self.layer = get_channel_layer()
+        if self.layer is None:
+            raise RuntimeError('INVALIDATION_BUS=channels requiere CHANNEL_LAYERS')
+
+    def send(self, message):
+        from asgiref.sync import async_to_sync
+
+        async_to_sync(self.layer.group_send)(self.GROUP, {'type': 'invalidate', 'm': message})
+
+    def start(self, deliver):
+        thread = threading.Thread(
+            target=lambda: asyncio.run(self._listen(deliver)),
+            name='invalidation-bus', daemon=True,
+        )
+        thread.start()
+
+    async def _listen(self, deliver):
+        while True:
+            try:
+                channel = await self.layer.new_channel()
+                await self.layer.group_add(self.GROUP, channel)
+                joined_at = time.monotonic()
+                while True:
+                    if time.monotonic() - joined_at > self.REJOIN_INTERVAL:
+                        await self.layer.group_add(self.GROUP, channel)
+                        joined_at = time.monotonic()
+                    try:
+                        event = await asyncio.wait_for(self.layer.receive(channel), timeout=60)
+                    except asyncio.TimeoutError:
+                        continue
+                    deliver(event['m'])
+            except Exception:
+                logger.exception('Listener del bus (channels) caído, reintentando')
+                await asyncio.sleep(RECONNECT_DELAY)
+
+
+class PostgresNotifyTransport:
+    """pg_notify desde la conexión de Django y LISTEN en una conexión dedicada"""
+    CHANNEL = 'auction_invalidation'
+
+    def send(self, message):
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.CHANNEL, _encode(message)])
+
+    def start(self, deliver):
+        thread = threading.Thread(target=self._listen, args=(deliver,), name='invalidation-bus', daemon=True)
+        thread.start()
+
+    def _listen(self, deliver):
+        from django.db import connection
+
+        while True:
+            conn = None
+            try:
+                # Conexión propia, fuera del manejo de conexiones de Django
+                conn = connection.get_new_connection(connection.get_connection_params())
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.CHANNEL}')
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        deliver(json.loads(notify.payload))
+            except Exception:
+                logger.exception('Listener del bus (notify) caído, reintentando')
+                time.sleep(RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+class TableTransport:
+    """Inserta cada mensaje en InvalidationEvent y los lee por id creciente"""
+    BATCH_SIZE = 500
+
+    def __init__(self, interval):
+        self.interval = interval
+
+    def send(self, message):
+        from .models import InvalidationEvent
+
+        InvalidationEvent.objects.create(topic=message['t'], key=_encode(message['k']), origin=message['o'])
+
+    def start(self, deliver):
+        thread = threading.Thread(target=self._listen, args=(deliver,), name='invalidation-bus', daemon=True)
+        thread.start()
+
+    def _listen(self, deliver):
+        from django.db import close_old_connections
+        from django.db.models import Max
+        from .models import InvalidationEvent
+
+        last_id = None
+        while True:
+            try:
+                if last_id is None:
+                    # Solo interesan los mensajes posteriores al arranque
+                    last_id = InvalidationEvent.objects.aggregate(last=Max('id'))['last'] or 0
+                events = list(
+                    InvalidationEvent.objects.filter(id__gt=last_id)
+                    .exclude(origin=ORIGIN)
+                    .order_by('id')[:self.BATCH_SIZE]
+                )
+                for event in events:
+                    deliver({'t': event.topic, 'k': json.loads(event.key), 'o': event.origin})
+                if events:
+                    last_id = events[-1].id
+                    if len(events) == self.BATCH_SIZE:
+                        continue
+            except Exception:
+                logger.exception('Listener del bus (table) caído, reintentando')
+                close_old_connections()
+                time.sleep(RECONNECT_DELAY)
+                continue
+            time.sleep(self.interval)
+
+
+def prune_invalidation_events():
+    """Borra los eventos de la tabla más viejos que INVALIDATION_EVENT_RETENTION"""
+    import datetime
+    from django.utils import timezone
+    from .models import InvalidationEvent
+
+    cutoff = timezone.now() - datetime.timedelta(seconds=settings.INVALIDATION_EVENT_RETENTION)
+    deleted, _ = InvalidationEvent.objects.filter(created_at__lt=cutoff).delete()
+    return {'deleted': deleted}
+
+
+def build_transport(name):
+    if name == 'local':
+        return LocalTransport()
+    if name == 'channels':
+        return ChannelsTransport()
+    if name == 'notify':
+        return PostgresNotifyTransport()
+    if name == 'table':
+        return TableTransport(settings.INVALIDATION_POLL_INTERVAL)
+    raise ValueError(f'INVALIDATION_BUS desconocido: {name}')
+
+
+class Bus:
+    def __init__(self, transport_name):
+        self.transport_name = transport_name
+        self.transport = None
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def _get_transport(self):
+        if self.transport is None:
+            self.transport = build_transport(self.transport_name)
+        return self.transport
+
+    def subscribe(self, topic, handler):
+        """Registra handler(key) para los mensajes de un topic"""
+        with self._lock:
+            self._subscribers.setdefault(topic, []).append(handler)
+
+    def start(self):
+        """Empieza a escuchar a los demás procesos. Llamarlo cuando se cachea algo"""
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self._get_transport().start(self._receive)
+
+    def publish(self, topic, key, local=True):
+        """local=False: solo a los demás procesos (este ya aplicó el cambio)"""
+        if local:
+            self._dispatch(topic, key)
+        transport = self._get_transport()
+        if isinstance(transport, LocalTransport):
+            return
+        # El envío sale del hilo de la petición y se reintenta si falla (bids/tasks.py).
+        # Si aun así no llega, los demás procesos se recuperan por TTL
+        task_queue.submit(transport.send, {'t': topic, 'k': key, 'o': ORIGIN})
+
+    def reset_after_fork(self):
+        """En el hijo: el listener del padre no existe aquí, se arranca de nuevo al cachear"""
+        self.transport = None
+        self._lock = threading.Lock()
+        self._started = False
+
+    def _receive(self, message):
+        if message.get('o') == ORIGIN:
+            return
+        self._dispatch(message['t'], message['k'])
+
+    def _dispatch(self, topic, key):
+        for handler in self._subscribers.get(topic, ()):
+            try:
+                handler(key)
+            except Exception:
+                logger.exception('Error en el suscriptor de %s:%s', topic, key)
+
+
+bus = Bus(settings.INVALIDATION_BUS)
+
+
+def _after_fork_in_child():
+    global ORIGIN
+    ORIGIN = new_origin()
+    bus.reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
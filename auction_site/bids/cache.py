@@ -0,0 +1,83 @@
+"""
+Caché de resultados de subastas finalizadas.
+
+Cuando end_time ya pasó (las extensiones anti-sniping solo ocurren mientras la
+subasta está en curso), las pujas, el ganador, el precio y el estado ya no cambian.
+Como el end_time sale del estado en memoria, que puede ir atrasado respecto de otro
+worker, se espera FINISHED_CACHE_GRACE segundos (Product.is_settled) antes de guardar.
+Sus respuestas se guardan sin expiración y solo se invalidan cuando un admin
+edita el producto o sus pujas: cada invalidación incrementa la versión del
+producto y las entradas viejas simplemente dejan de leerse.
+
+La invalidación viaja por el bus (topic 'finished') para que cada worker
+incremente su versión aunque el caché sea local (LocMemCache).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+
+from .bus import bus
+from .encoding import encoded_response
+
+VERSION_KEY = 'auction:v:{}'
+ENTRY_KEY = 'auction:finished:{}:{}:{}'
+
+
+def product_version(product_id):
+    return cache.get(VERSION_KEY.format(product_id), 0)
+
+
+def invalidate_product(product_id):
+    """Descarta todo lo cacheado para el producto (versión nueva) en todos los workers"""
+    bus.publish('finished', product_id)
+
+
+def _bump_version(product_id):
+    key = VERSION_KEY.format(product_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # La clave no existe todavía
+        cache.set(key, 1, timeout=None)
+
+
+def get_finished(product_id, name):
+    """
+    Devuelve (version, valor). El valor es None si no está cacheado.
+    La versión debe pasarse a set_finished para no guardar datos calculados
+    antes de una invalidación bajo la versión nueva.
+    """
+    version = product_version(product_id)
+    return version, cache.get(ENTRY_KEY.format(product_id, version, name))
+
+
+def set_finished(product_id, version, name, value):
+    bus.start()
+    cache.set(ENTRY_KEY.format(product_id, version, name), value, timeout=None)
+
+
+def get_or_set_finished(product_id, name, compute):
+    version, value = get_finished(product_id, name)
+    if value is None:
+        value = compute()
+        set_finished(product_id, version, name, value)
+    return value
+
+
+bus.subscribe('finished', _bump_version)
+
+
+def mark_immutable(response):
+    """Permite que navegadores y proxies guarden la respuesta sin revalidar"""
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.FINISHED_AUCTION_MAX_AGE,
+        immutable=True,
+    )
+    return response
+
+
+def finished_response(content, fmt):
+    """Respuesta a partir de bytes ya codificados en el formato negociado"""
+    return mark_immutable(encoded_response(content, fmt))
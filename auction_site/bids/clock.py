@@ -0,0 +1,100 @@
+"""
+Reloj de las subastas. Todo lo que decide por tiempo (en curso, tiempo restante,
+anti-sniping, filtros de la portada y la búsqueda, fecha de las pujas) pregunta
+aquí en vez de a timezone.now(), para poder simular el paso del tiempo.
+
+- Normal: el reloj del sistema.
+- CLOCK_SPEED != 1 en settings: tiempo acelerado desde CLOCK_START (p. ej. 60 = una
+  hora por minuto). Con varios workers fija CLOCK_START para que coincidan.
+- simulated(): reloj detenido que avanza con advance()/set(), para benchmarks
+  y tests de una subasta completa en segundos (comando simulate_auction).
+
+El reloj es global (no por hilo): la cola de tareas también lo ve.
+Lo que mide tiempo real (TTL de cachés, presencia, retención de sesiones) sigue
+usando el reloj del sistema.
+"""
+import datetime
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+class SystemClock:
+    def now(self):
+        return timezone.now()
+
+
+class SimulatedClock:
+    """
+    start + (tiempo real transcurrido × speed) + lo avanzado a mano.
+    Con speed=0 el tiempo solo se mueve con advance() y set().
+    """
+
+    def __init__(self, start=None, speed=0.0, anchor=None):
+        self._lock = threading.Lock()
+        self._start = start or timezone.now()
+        self._anchor = time.time() if anchor is None else anchor
+        self.speed = speed
+        self._offset = 0.0
+
+    def now(self):
+        elapsed = (time.time() - self._anchor) * self.speed + self._offset
+        return self._start + datetime.timedelta(seconds=elapsed)
+
+    def advance(self, seconds):
+        if isinstance(seconds, datetime.timedelta):
+            seconds = seconds.total_seconds()
+        with self._lock:
+            self._offset += seconds
+        return self.now()
+
+    def set(self, moment):
+        """Lleva el reloj a `moment` (hacia adelante o atrás)"""
+        with self._lock:
+            self._offset += (moment - self.now()).total_seconds()
+        return moment
+
+
+def _configured_clock():
+    if settings.CLOCK_SPEED == 1:
+        return SystemClock()
+    start = parse_datetime(settings.CLOCK_START) if settings.CLOCK_START else timezone.now()
+    if start is None:
+        raise ValueError(f'CLOCK_START inválido: {settings.CLOCK_START!r}')
+    if timezone.is_naive(start):
+        start = timezone.make_aware(start)
+    # Ancla en el propio CLOCK_START: todos los workers calculan el mismo instante
+    anchor = start.timestamp() if settings.CLOCK_START else None
+    return SimulatedClock(start, speed=settings.CLOCK_SPEED, anchor=anchor)
+
+
+_clock = _configured_clock()
+
+
+def now():
+    """Instante actual de las subastas (aware, como timezone.now())"""
+    return _clock.now()
+
+
+def get_clock():
+    return _clock
+
+
+@contextmanager
+def use(clock):
+    """Instala `clock` mientras dura el bloque"""
+    global _clock
+    previous, _clock = _clock, clock
+    try:
+        yield clock
+    finally:
+        _clock = previous
+
+
+def simulated(start=None):
+    """with clock.simulated() as sim: ... sim.advance(60)"""
+    return use(SimulatedClock(start))
@@ -0,0 +1,35 @@
+"""
+Transacciones de escritura en SQLite.
+
+Una transacción de SQLite empieza diferida: toma el bloqueo de escritura con la
+primera escritura. Si antes leyó y otro hilo ya está escribiendo, falla al
+instante con "database is locked" (no espera el timeout). Las que leen y después
+escriben bajo concurrencia (pujas, estadísticas, limpiezas por lotes) usan
+write_transaction(): BEGIN IMMEDIATE toma el bloqueo al empezar y espera su turno.
+El resto (admin, reportes, lecturas) sigue diferido y no se serializa.
+
+En PostgreSQL y MySQL es un transaction.atomic() normal (select_for_update bloquea la fila).
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+@contextmanager
+def write_transaction(using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    # transaction_mode se lee de OPTIONS al conectar: conectar antes de cambiarlo
+    connection.ensure_connection()
+    previous = connection.transaction_mode
+    # El BEGIN se ejecuta al entrar en atomic(): el modo solo afecta a esta transacción
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            connection.transaction_mode = previous
+            yield
+    finally:
+        connection.transaction_mode = previous
@@ -0,0 +1,70 @@
+"""
+Codificación de las respuestas de las APIs de lectura.
+
+Se negocia con la cabecera Accept:
+- application/msgpack: esquema compacto. Montos enteros, fechas como epoch en
+  milisegundos y sin campos preformateados (el cliente formatea).
+- cualquier otra cosa: el JSON de siempre, serializado con orjson si está
+  instalado (es opcional) y si no con json sin espacios.
+"""
+import json
+
+import msgpack
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+JSON = 'json'
+MSGPACK = 'msgpack'
+
+CONTENT_TYPES = {
+    JSON: 'application/json',
+    MSGPACK: 'application/msgpack',
+}
+
+
+def negotiate(request):
+    """Formato pedido por el cliente: MSGPACK o JSON"""
+    accept = request.META.get('HTTP_ACCEPT', '')
+    if 'application/msgpack' in accept or 'application/x-msgpack' in accept:
+        return MSGPACK
+    return JSON
+
+
+def epoch_ms(value):
+    """datetime -> milisegundos desde epoch (None se mantiene)"""
+    if value is None:
+        return None
+    return round(value.timestamp() * 1000)
+
+
+def format_amount(amount):
+    """Mismo formato que amount_formatted: separador de miles con punto"""
+    return f"{amount:,}".replace(",", ".")
+
+
+def dumps_json(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def encode(data, fmt):
+    if fmt == MSGPACK:
+        return msgpack.packb(data, use_bin_type=True)
+    return dumps_json(data)
+
+
+def encoded_response(content, fmt, status=200):
+    """Respuesta a partir de bytes ya codificados (p. ej. desde el caché)"""
+    response = HttpResponse(content, content_type=CONTENT_TYPES[fmt], status=status)
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def api_response(data, fmt, status=200):
+    return encoded_response(encode(data, fmt), fmt, status=status)
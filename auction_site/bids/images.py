@@ -0,0 +1,99 @@
+"""
+Procesamiento de imágenes de productos con Pillow.
+
+Las funciones de este módulo no dependen de Django para poder ejecutarse
+dentro de un pool de procesos (reciben y devuelven rutas, no modelos).
+"""
+import os
+
+# Lado máximo (px) de la imagen original que se guarda en MEDIA_ROOT/products/
+MAX_IMAGE_SIDE = 1600
+
+# Variantes responsivas: nombre -> ancho máximo en px
+VARIANT_WIDTHS = {
+    'thumb': 400,
+    'medium': 800,
+}
+
+
+def prepare_product_image(source_path, dest_dir, basename):
+    """
+    Valida, normaliza y guarda una imagen de producto.
+    Devuelve el nombre del archivo generado (relativo a dest_dir).
+    Lanza ValueError si el archivo no es una imagen válida.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(source_path) as img:
+            img.verify()
+        # verify() deja la imagen inutilizable: hay que abrirla de nuevo
+        with Image.open(source_path) as img:
+            img = ImageOps.exif_transpose(img)
+            has_alpha = img.mode in ('RGBA', 'LA', 'P')
+            img = img.convert('RGBA' if has_alpha else 'RGB')
+            img.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+
+            extension = 'png' if has_alpha else 'jpg'
+            filename = f"{basename}.{extension}"
+            os.makedirs(dest_dir, exist_ok=True)
+            target = os.path.join(dest_dir, filename)
+            # Escribir a un temporal y renombrar: una importación interrumpida no deja archivos a medias
+            tmp_target = f"{target}.tmp"
+            if has_alpha:
+                img.save(tmp_target, 'PNG', optimize=True)
+            else:
+                img.save(tmp_target, 'JPEG', quality=88, optimize=True, progressive=True)
+            os.replace(tmp_target, target)
+            return filename
+    except (OSError, UnidentifiedImageError) as e:
+        raise ValueError(f"Imagen inválida {source_path}: {e}")
+
+
+def generate_variants(source_path, dest_dir, basename):
+    """
+    Genera las variantes responsivas de una imagen (en su formato original y en WebP)
+    junto al archivo original. Devuelve un dict serializable para Product.image_variants:
+    {'width': ancho original, 'variants': [{'name', 'width', 'file', 'webp'}]}
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as img:
+        img = ImageOps.exif_transpose(img)
+        original_width = img.width
+        has_alpha = img.mode in ('RGBA', 'LA', 'P')
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+
+        variants = []
+        for name, width in VARIANT_WIDTHS.items():
+            # No tiene sentido generar variantes más grandes que el original
+            if width >= original_width:
+                continue
+            height = round(img.height * width / original_width)
+            resized = img.resize((width, height), Image.Resampling.LANCZOS)
+
+            extension = 'png' if has_alpha else 'jpg'
+            filename = f"{basename}_{name}.{extension}"
+            webp_filename = f"{basename}_{name}.webp"
+            if has_alpha:
+                resized.save(os.path.join(dest_dir, filename), 'PNG', optimize=True)
+            else:
+                resized.save(os.path.join(dest_dir, filename), 'JPEG', quality=82, optimize=True, progressive=True)
+            resized.save(os.path.join(dest_dir, webp_filename), 'WEBP', quality=80, method=4)
+            variants.append({'name': name, 'width': width, 'file': filename, 'webp': webp_filename})
+
+        # WebP del tamaño original, para navegadores que lo soportan
+        if source_path.lower().endswith('.webp'):
+            original_webp = os.path.basename(source_path)
+        else:
+            original_webp = f"{basename}.webp"
+            img.save(os.path.join(dest_dir, original_webp), 'WEBP', quality=80, method=4)
+
+    return {'width': original_width, 'webp': original_webp, 'variants': variants}
+
+
+def import_product_image(source_path, dest_dir, basename):
+    """Normaliza la imagen y genera sus variantes en un solo paso (usado por import_products)"""
+    filename = prepare_product_image(source_path, dest_dir, basename)
+    variants = generate_variants(os.path.join(dest_dir, filename), dest_dir, basename)
+    return filename, variants
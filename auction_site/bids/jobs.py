@@ -0,0 +1,38 @@
+"""
+Registro de tareas periódicas de mantenimiento.
+
+No dependemos de un scheduler externo: el comando `run_jobs` ejecuta las tareas
+que estén vencidas, ya sea en bucle (proceso dedicado) o una sola vez (cron).
+"""
+import time
+
+
+class Job:
+    def __init__(self, name, func, interval):
+        self.name = name
+        self.func = func
+        self.interval = interval  # segundos
+        self.last_run = None
+
+    def is_due(self, now):
+        return self.last_run is None or now - self.last_run >= self.interval
+
+    def run(self, now=None):
+        self.last_run = now if now is not None else time.monotonic()
+        return self.func()
+
+
+def get_jobs():
+    """Lista de tareas registradas"""
+    from .archive import archive_finished_auctions
+    from .bus import prune_invalidation_events
+    from .retention import prune_data
+    from .warmup import warm_upcoming_auctions
+
+    return [
+        Job('archive_auctions', archive_finished_auctions, interval=60 * 60),
+        Job('prune_invalidation_events', prune_invalidation_events, interval=10 * 60),
+        Job('prune_data', prune_data, interval=6 * 60 * 60),
+        # Más frecuente que AUCTION_WARMUP_AHEAD: ninguna subasta empieza sin precalentar
+        Job('warm_auctions', warm_upcoming_auctions, interval=60),
+    ]
@@ -0,0 +1,54 @@
+"""
+Cachés pequeños en memoria del proceso, invalidados por el bus.
+
+Cada entrada vence tras LOCAL_CACHE_TTL segundos; un mensaje del bus con el
+mismo topic y clave la descarta antes. Se usan para consultas que se repiten
+en casi todas las peticiones y cambian muy poco.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .bus import bus
+
+# Marca las claves cacheadas cuyo valor es None (p. ej. "esta IP no está baneada")
+_MISSING = object()
+
+
+class LocalCache:
+    def __init__(self, topic, ttl=None, max_entries=10000):
+        self.topic = topic
+        self.ttl = ttl if ttl is not None else settings.LOCAL_CACHE_TTL
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._evictions = 0
+        bus.subscribe(topic, self.evict)
+
+    def get(self, key, load):
+        """Valor cacheado para key, o load() si no está o venció"""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() < entry[1]:
+            value = entry[0]
+            return None if value is _MISSING else value
+
+        bus.start()
+        evictions = self._evictions
+        value = load()
+        with self._lock:
+            if evictions != self._evictions:
+                # Llegó una invalidación mientras se cargaba: el valor puede ser viejo
+                return value
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (_MISSING if value is None else value, time.monotonic() + self.ttl)
+        return value
+
+    def evict(self, key):
+        with self._lock:
+            self._evictions += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
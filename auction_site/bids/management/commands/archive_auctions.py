@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bids.archive import archive_finished_auctions
+
+
+class Command(BaseCommand):
+    help = 'Mueve las pujas y el chat de subastas finalizadas hace más de N días a las tablas de archivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.AUCTION_ARCHIVE_AFTER_DAYS,
+            help=f'Antigüedad mínima (días desde end_time). Por defecto {settings.AUCTION_ARCHIVE_AFTER_DAYS}',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.AUCTION_ARCHIVE_BATCH_SIZE,
+            help=f'Filas por lote. Por defecto {settings.AUCTION_ARCHIVE_BATCH_SIZE}',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Máximo de subastas a archivar en esta ejecución',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n📦 Archivando subastas finalizadas hace más de {options['days']} días..."
+        ))
+        started = time.monotonic()
+        summary = archive_finished_auctions(
+            days=options['days'],
+            batch_size=options['batch_size'],
+            limit=options['limit'],
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {summary['products']} subastas archivadas: "
+            f"{summary['bids']} pujas y {summary['messages']} mensajes en {elapsed:.1f}s"
+        ))
@@ -0,0 +1,92 @@
+import csv
+import datetime
+import json
+import sys
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bids.analytics import INCREMENT_LABELS, build_report
+from bids.models import Product
+
+AUCTION_COLUMNS = [
+    'id', 'name', 'silent', 'bids', 'unique_bidders', 'bidding_seconds', 'bids_per_minute',
+    'peak_bids_per_minute', 'final_price', 'anti_sniping_extensions', 'chat_messages',
+]
+
+
+class Command(BaseCommand):
+    help = 'Reporte de subastas finalizadas: velocidad, incrementos, anti-sniping y patrones sospechosos (JSON o CSV)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, action='append', help='Analizar solo este producto (se puede repetir)')
+        parser.add_argument('--days', type=int, default=None, help='Solo subastas finalizadas en los últimos N días')
+        parser.add_argument('--format', choices=['json', 'csv'], default='json', help='Por defecto json')
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Archivo de salida. En CSV escribe además <nombre>_pairs.csv y <nombre>_ips.csv. Por defecto JSON por pantalla',
+        )
+        parser.add_argument('--chunk-size', type=int, default=50_000, help='Pujas por lote. Por defecto 50000')
+        parser.add_argument('--min-pair-count', type=int, default=3, help='Veces que un invitado debe pujar justo por encima de otro para reportarlo. Por defecto 3')
+        parser.add_argument('--min-ip-guests', type=int, default=3, help='Invitados desde una IP para reportarla. Por defecto 3')
+        parser.add_argument('--top', type=int, default=50, help='Máximo de parejas e IPs en el reporte. Por defecto 50')
+
+    def handle(self, *args, **options):
+        if options['format'] == 'csv' and not options['output']:
+            raise CommandError('--format csv necesita --output')
+
+        now = timezone.now()
+        products = Product.objects.filter(end_time__lt=now)
+        if options['product']:
+            products = Product.objects.filter(id__in=options['product'])
+        if options['days'] is not None:
+            products = products.filter(end_time__gte=now - datetime.timedelta(days=options['days']))
+
+        self.stderr.write(self.style.MIGRATE_HEADING('\n📊 Analizando pujas...'))
+        try:
+            report = build_report(
+                products,
+                chunk_size=options['chunk_size'],
+                min_pair_count=options['min_pair_count'],
+                min_ip_guests=options['min_ip_guests'],
+                top=options['top'],
+            )
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+
+        if options['format'] == 'csv':
+            self._write_csv(Path(options['output']), report)
+        elif options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+            sys.stdout.write('\n')
+
+        rate = report['bids_processed'] / report['elapsed_seconds'] if report['elapsed_seconds'] else 0
+        self.stderr.write(self.style.SUCCESS(
+            f"✅ {len(report['auctions'])} subastas, {report['bids_processed']:,} pujas en "
+            f"{report['elapsed_seconds']}s ({rate:,.0f} pujas/s)"
+        ))
+        if report['suspicious_pairs'] or report['ip_clusters']:
+            self.stderr.write(self.style.WARNING(
+                f"⚠️ {len(report['suspicious_pairs'])} parejas sospechosas, "
+                f"{len(report['ip_clusters'])} IPs con varios invitados"
+            ))
+
+    def _write_csv(self, path, report):
+        with path.open('w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(AUCTION_COLUMNS + [f'increment {label}' for label in INCREMENT_LABELS])
+            for row in report['auctions']:
+                writer.writerow([row[column] for column in AUCTION_COLUMNS] + list(row['increments'].values()))
+
+        sections = [('pairs', 'suspicious_pairs', ['leader', 'follower', 'times', 'auctions']),
+                    ('ips', 'ip_clusters', ['ip', 'guests', 'shared_auctions'])]
+        for suffix, key, columns in sections:
+            with path.with_name(f'{path.stem}_{suffix}.csv').open('w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                writer.writeheader()
+                writer.writerows(report[key])
@@ -0,0 +1,75 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.utils import timezone
+
+from bids.encoding import JSON, MSGPACK, api_response, orjson
+from bids.models import ArchivedBid
+from bids.views import bid_data, price_data
+
+
+class Command(BaseCommand):
+    help = 'Compara tamaño y tiempo de serialización de la respuesta de pujas: JsonResponse, JSON rápido y msgpack'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bids', type=int, default=10, help='Pujas por respuesta. Por defecto 10 (lo que devuelve get_bids_data)')
+        parser.add_argument('--iterations', type=int, default=5000, help='Repeticiones por formato. Por defecto 5000')
+
+    def handle(self, *args, **options):
+        bids = self._sample_bids(options['bids'])
+        iterations = options['iterations']
+
+        def legacy():
+            # Lo que hacía get_bids_data antes de la negociación
+            return JsonResponse({
+                'bids': [bid_data(bid, JSON) for bid in bids],
+                **price_data('current_price', 1_250_000, JSON),
+                'is_silent': False,
+            })
+
+        def encoded(fmt):
+            return lambda: api_response({
+                'bids': [bid_data(bid, fmt) for bid in bids],
+                **price_data('current_price', 1_250_000, fmt),
+                'is_silent': False,
+            }, fmt)
+
+        fast_json = 'JSON (orjson)' if orjson is not None else 'JSON (json compacto)'
+        cases = [
+            ('JsonResponse', legacy),
+            (fast_json, encoded(JSON)),
+            ('msgpack', encoded(MSGPACK)),
+        ]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n⏱️ {options['bids']} pujas por respuesta, {iterations} repeticiones por formato"
+        ))
+        baseline = None
+        for name, build in cases:
+            size = len(build().content)
+            started = time.perf_counter()
+            for _ in range(iterations):
+                build()
+            micros = (time.perf_counter() - started) / iterations * 1_000_000
+            if baseline is None:
+                baseline = (size, micros)
+            self.stdout.write(
+                f"{name:<22} {size:>7} bytes ({size / baseline[0]:.0%})"
+                f"   {micros:>8.1f} µs/respuesta ({micros / baseline[1]:.0%})"
+            )
+        self.stdout.write(self.style.SUCCESS('✅ Listo'))
+
+    def _sample_bids(self, count):
+        """Pujas sin guardar: no hace falta base de datos"""
+        now = timezone.now()
+        return [
+            ArchivedBid(
+                id=index,
+                bidder_name=f'postor_{index % 7}',
+                amount=1_000_000 + index * 25_000,
+                created_at=now - datetime.timedelta(seconds=index * 13),
+            )
+            for index in range(count)
+        ]
@@ -0,0 +1,143 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Se ejecuta en un proceso nuevo por corrida: carga la aplicación WSGI (settings,
+# apps, middleware y, con STARTUP_PREWARM, el precalentamiento) y le hace dos
+# peticiones. Sin django.test, para no sumar sus imports a la medición
+PROBE = r'''
+import io, json, sys, time
+started = time.perf_counter()
+from auction_site.wsgi import application
+loaded = time.perf_counter()
+from django.conf import settings
+host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+path, _, query = sys.argv[1].partition('?')
+
+def request():
+    began = time.perf_counter()
+    status = []
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': host, 'SERVER_PORT': '80', 'HTTP_HOST': host, 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+    }
+    b''.join(application(environ, lambda code, headers, exc_info=None: status.append(code)))
+    return (time.perf_counter() - began) * 1000, int(status[0].split()[0])
+
+first, status = request()
+second, _ = request()
+print(json.dumps({
+    'load_ms': (loaded - started) * 1000,
+    'first_request_ms': first,
+    'second_request_ms': second,
+    'status': status,
+    'modules': sorted(sys.modules),
+}))
+'''
+
+# Paquetes que un worker de la API no necesita al arrancar
+HEAVY_PACKAGES = ['numpy', 'PIL', 'channels', 'django.contrib.admin', 'django.contrib.messages', 'django.contrib.staticfiles', 'urllib.request']
+
+
+def parse_importtime(stderr):
+    """Microsegundos propios por paquete de la salida de -X importtime"""
+    packages = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        parts = name.strip().split('.')
+        # django.contrib.* por app; el resto por paquete raíz
+        depth = 3 if parts[:2] == ['django', 'contrib'] else 1
+        packages['.'.join(parts[:depth])] += int(own)
+    return packages
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el arranque en frío de un worker por perfil de settings (python -X importtime en un '
+        'proceso nuevo): carga de la aplicación, primera petición y paquetes importados'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append', help='Módulo de settings (se puede repetir). Por defecto auction_site.settings y auction_site.settings_api')
+        parser.add_argument('--path', default='/api/products/status/?ids=1', help='Primera petición. Por defecto /api/products/status/?ids=1')
+        parser.add_argument('--runs', type=int, default=5, help='Procesos por perfil (se toma la mediana). Por defecto 5')
+        parser.add_argument('--top', type=int, default=10, help='Paquetes más lentos de importar a mostrar. Por defecto 10')
+        parser.add_argument('--output', default=None, help='Guardar el reporte en JSON')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs tiene que ser positivo')
+        profiles = options['profile'] or ['auction_site.settings', 'auction_site.settings_api']
+        report = {}
+        for profile in profiles:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n⏱️ {profile} ({options['runs']} arranques, {options['path']})"))
+            # Una corrida descartada: compila los .pyc
+            self._run(profile, options['path'])
+            runs = [self._run(profile, options['path']) for _ in range(options['runs'])]
+            report[profile] = result = self._summary(runs)
+            self.stdout.write(
+                f"  carga {result['load_ms']:.0f} ms  primera petición {result['first_request_ms']:.1f} ms "
+                f"(HTTP {result['status']})  segunda {result['second_request_ms']:.1f} ms  "
+                f"total {result['total_ms']:.0f} ms\n"
+                f"  imports {result['import_ms']:.0f} ms  {result['module_count']} módulos"
+            )
+            if result['heavy_packages']:
+                self.stdout.write(self.style.WARNING(f"  pesados cargados: {', '.join(result['heavy_packages'])}"))
+            for name, ms in list(result['packages_ms'].items())[:options['top']]:
+                self.stdout.write(f'  {ms:>8.1f} ms  {name}')
+
+        if len(report) > 1:
+            baseline, *others = report
+            for profile in others:
+                saved = report[baseline]['total_ms'] - report[profile]['total_ms']
+                self.stdout.write(self.style.SUCCESS(
+                    f"\n✅ {profile}: {saved:.0f} ms menos que {baseline} hasta servir la primera petición "
+                    f"({report[profile]['module_count'] - report[baseline]['module_count']:+d} módulos)"
+                ))
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2))
+
+    def _run(self, profile, path):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile}
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE, path],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if process.returncode:
+            raise CommandError(f'{profile} no arrancó:\n{process.stderr[-2000:]}')
+        result = json.loads(process.stdout.splitlines()[-1])
+        result['packages'] = parse_importtime(process.stderr)
+        return result
+
+    def _summary(self, runs):
+        def median(key):
+            return statistics.median(run[key] for run in runs)
+
+        packages = Counter()
+        for run in runs:
+            packages.update(run['packages'])
+        # importtime no ve los módulos cargados con importlib.import_module (apps,
+        # middleware, URLconf): su tiempo propio queda en "carga"
+        modules = set(runs[-1]['modules'])
+        return {
+            'load_ms': median('load_ms'),
+            'first_request_ms': median('first_request_ms'),
+            'second_request_ms': median('second_request_ms'),
+            'total_ms': statistics.median(run['load_ms'] + run['first_request_ms'] for run in runs),
+            'status': runs[-1]['status'],
+            'import_ms': statistics.median(sum(run['packages'].values()) for run in runs) / 1000,
+            'module_count': len(modules),
+            'heavy_packages': [name for name in HEAVY_PACKAGES if name in modules],
+            'packages_ms': {name: round(us / len(runs) / 1000, 1) for name, us in packages.most_common()},
+        }
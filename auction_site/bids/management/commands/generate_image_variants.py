@@ -0,0 +1,58 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from bids.images import generate_variants
+from bids.models import Product
+from bids.variants import variant_paths
+from bids.warmup import forget_detail
+
+
+class Command(BaseCommand):
+    help = 'Genera las variantes responsivas (thumbnail, medium, WebP) de las imágenes de productos existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenera también los productos que ya tienen variantes',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos para el procesamiento de imágenes',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        products = Product.objects.exclude(image='').only('id', 'image', 'image_variants')
+        pending = [
+            (p.id, p.image.name) for p in products.iterator()
+            if options['force'] or p.image_variants.get('source') != p.image.name
+        ]
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n🖼️  {len(pending)} imágenes por procesar...'))
+
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            # A los procesos solo van rutas: bids.images no depende de Django (sirve también con spawn)
+            futures = {pool.submit(generate_variants, *variant_paths(image_name)): (product_id, image_name)
+                       for product_id, image_name in pending}
+            for future in as_completed(futures):
+                product_id, image_name = futures[future]
+                try:
+                    variants = future.result()
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    self.stderr.write(self.style.ERROR(f'❌ {image_name}: {e}'))
+                    continue
+                variants['source'] = image_name
+                Product.objects.filter(id=product_id, image=image_name).update(image_variants=variants)
+                # update() no dispara señales: el producto cacheado para product_detail queda viejo
+                forget_detail(product_id)
+                done += 1
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'✅ {done} productos actualizados, {failed} con errores, en {elapsed:.1f}s'))
@@ -0,0 +1,246 @@
+import csv
+import datetime
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from bids.db import write_transaction
+from bids.images import import_product_image
+from bids.models import Product
+
+TRUE_VALUES = {'1', 'true', 'yes', 'si', 'sí', 'x'}
+# El sku es el nombre de las imágenes en MEDIA_ROOT/products: sin '/', '..' ni espacios
+SKU_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]*$')
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa productos desde un manifiesto CSV/JSON y un directorio de imágenes. '
+        'Es idempotente por sku: volver a ejecutarlo solo crea los productos que falten.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest', help='Archivo .csv o .json con los productos')
+        parser.add_argument(
+            '--images',
+            required=True,
+            help='Directorio donde están las imágenes referenciadas en el manifiesto',
+        )
+        parser.add_argument('--batch-size', type=int, default=200, help='Productos por bulk_create')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos para el procesamiento de imágenes',
+        )
+        parser.add_argument(
+            '--start',
+            help='Inicio (ISO 8601) de la primera subasta para filas sin start_time',
+        )
+        parser.add_argument(
+            '--duration',
+            type=int,
+            default=60,
+            help='Duración en minutos de cada subasta para filas sin end_time (por defecto 60)',
+        )
+        parser.add_argument(
+            '--stagger',
+            type=int,
+            default=0,
+            help='Minutos entre el inicio de subastas consecutivas (por defecto 0)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo valida el manifiesto, no crea productos ni procesa imágenes',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rows = self._load_manifest(options['manifest'])
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n📄 {len(rows)} filas en el manifiesto'))
+
+        schedule_start = self._parse_start(options['start'])
+        products, errors = self._validate(rows, options, schedule_start)
+        for line, error in errors:
+            self.stderr.write(self.style.ERROR(f'❌ Fila {line}: {error}'))
+
+        # Idempotencia: se omiten los sku que ya existen (importación previa o interrumpida)
+        existing = self._existing_skus([p['sku'] for p in products])
+        pending = [p for p in products if p['sku'] not in existing]
+        self.stdout.write(
+            f'   Válidas: {len(products)} | Ya importadas: {len(products) - len(pending)} | '
+            f'Pendientes: {len(pending)} | Con errores: {len(errors)}'
+        )
+
+        if options['dry_run'] or not pending:
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\n🖼️  Procesando imágenes y variantes...'))
+        pending = self._process_images(pending, options['workers'])
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\n💾 Creando productos...'))
+        created = self._bulk_create(pending, options['batch_size'])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'\n✅ {created} productos importados en {elapsed:.1f}s'))
+
+    def _load_manifest(self, path):
+        if not os.path.exists(path):
+            raise CommandError(f'No existe el manifiesto {path}')
+        with open(path, encoding='utf-8') as f:
+            if path.lower().endswith('.json'):
+                data = json.load(f)
+                if not isinstance(data, list):
+                    raise CommandError('El manifiesto JSON debe ser una lista de objetos')
+                return data
+            return list(csv.DictReader(f))
+
+    def _parse_start(self, value):
+        if not value:
+            return timezone.now()
+        start = parse_datetime(value)
+        if start is None:
+            raise CommandError(f'--start inválido: {value}')
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start)
+        return start
+
+    def _parse_datetime(self, value):
+        value = str(value or '').strip()
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f'fecha inválida "{value}"')
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def _validate(self, rows, options, schedule_start):
+        """Valida cada fila y calcula su horario. Devuelve (válidas, errores)"""
+        products = []
+        errors = []
+        seen = set()
+        duration = datetime.timedelta(minutes=options['duration'])
+        stagger = datetime.timedelta(minutes=options['stagger'])
+
+        for line, row in enumerate(rows, start=1):
+            try:
+                sku = str(row.get('sku') or '').strip()
+                name = str(row.get('name') or '').strip()
+                image = str(row.get('image') or '').strip()
+                if not sku or not name or not image:
+                    raise ValueError('sku, name e image son obligatorios')
+                if len(sku) > 64 or len(name) > 200:
+                    raise ValueError('sku o name demasiado largo')
+                if not SKU_RE.match(sku):
+                    raise ValueError(f'sku inválido "{sku}": solo letras, números, "-" y "_"')
+                if sku in seen:
+                    raise ValueError(f'sku duplicado "{sku}"')
+
+                starting_price = int(row.get('starting_price') or 0)
+                if starting_price < 0:
+                    raise ValueError('starting_price no puede ser negativo')
+
+                image_path = os.path.join(options['images'], image)
+                if not os.path.isfile(image_path):
+                    raise ValueError(f'no existe la imagen {image}')
+
+                # Horario escalonado para las filas que no traen fechas explícitas
+                start_time = self._parse_datetime(row.get('start_time')) or schedule_start + stagger * len(products)
+                end_time = self._parse_datetime(row.get('end_time')) or start_time + duration
+                if end_time <= start_time:
+                    raise ValueError('end_time debe ser posterior a start_time')
+
+                silent = row.get('is_silent_auction')
+                if not isinstance(silent, bool):
+                    silent = str(silent or '').strip().lower() in TRUE_VALUES
+            except (TypeError, ValueError) as e:
+                errors.append((line, str(e)))
+                continue
+
+            seen.add(sku)
+            products.append({
+                'sku': sku,
+                'name': name,
+                'description': str(row.get('description') or ''),
+                'image_path': image_path,
+                'starting_price': starting_price,
+                'start_time': start_time,
+                'end_time': end_time,
+                'is_silent_auction': silent,
+            })
+        return products, errors
+
+    def _existing_skus(self, skus, chunk_size=500):
+        existing = set()
+        for i in range(0, len(skus), chunk_size):
+            existing.update(
+                Product.objects.filter(sku__in=skus[i:i + chunk_size]).values_list('sku', flat=True)
+            )
+        return existing
+
+    def _process_images(self, products, workers):
+        """Procesa las imágenes en paralelo. Los productos cuya imagen falla se descartan"""
+        dest_dir = os.path.join(settings.MEDIA_ROOT, 'products')
+        ready = []
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {
+                pool.submit(import_product_image, p['image_path'], dest_dir, p['sku']): p
+                for p in products
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                product = futures[future]
+                try:
+                    filename, variants = future.result()
+                    product['image'] = f"products/{filename}"
+                    product['image_variants'] = dict(variants, source=product['image'])
+                    ready.append(product)
+                except (ValueError, OSError) as e:
+                    # OSError: archivo truncado, disco lleno... se descarta solo este producto
+                    self.stderr.write(self.style.ERROR(f"❌ {product['sku']}: {e}"))
+                if done % 100 == 0:
+                    self.stdout.write(f'   {done}/{len(products)} imágenes')
+        # Mantener el orden del manifiesto (as_completed devuelve en orden de finalización)
+        order = {p['sku']: i for i, p in enumerate(products)}
+        ready.sort(key=lambda p: order[p['sku']])
+        return ready
+
+    def _bulk_create(self, products, batch_size):
+        """Devuelve los productos realmente insertados (sin los sku que otra ejecución creó antes)"""
+        created = 0
+        done = 0
+        for i in range(0, len(products), batch_size):
+            batch = [
+                Product(
+                    sku=p['sku'],
+                    name=p['name'],
+                    description=p['description'],
+                    image=p['image'],
+                    image_variants=p['image_variants'],
+                    starting_price=p['starting_price'],
+                    # bulk_create no llama a save(): el precio actual se inicializa aquí
+                    current_price=p['starting_price'],
+                    start_time=p['start_time'],
+                    end_time=p['end_time'],
+                    is_silent_auction=p['is_silent_auction'],
+                )
+                for p in products[i:i + batch_size]
+            ]
+            skus = [product.sku for product in batch]
+            with write_transaction():
+                before = Product.objects.filter(sku__in=skus).count()
+                # ignore_conflicts: si otra ejecución creó el mismo sku en paralelo, se omite
+                Product.objects.bulk_create(batch, ignore_conflicts=True)
+                created += Product.objects.filter(sku__in=skus).count() - before
+            done += len(batch)
+            self.stdout.write(f'   {done}/{len(products)} procesados, {created} creados')
+        return created
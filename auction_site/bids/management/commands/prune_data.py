@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bids.retention import prune_data
+
+LABELS = {
+    'sessions': 'Sesiones expiradas',
+    'chat': 'Mensajes de chat',
+    'archived_chat': 'Mensajes de chat archivados',
+    'guests': 'Invitados inactivos',
+}
+
+
+class Command(BaseCommand):
+    help = 'Borra en lotes sesiones expiradas, invitados inactivos sin pujas y chat viejo (se puede ejecutar con subastas en vivo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.RETENTION_BATCH_SIZE,
+            help=f'Filas por lote. Por defecto {settings.RETENTION_BATCH_SIZE}',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=settings.RETENTION_PAUSE,
+            help=f'Segundos de pausa entre lotes. Por defecto {settings.RETENTION_PAUSE}',
+        )
+        parser.add_argument(
+            '--guest-days',
+            type=int,
+            default=settings.GUEST_RETENTION_DAYS,
+            help=f'Antigüedad mínima de los invitados a borrar. Por defecto {settings.GUEST_RETENTION_DAYS}',
+        )
+        parser.add_argument(
+            '--chat-days',
+            type=int,
+            default=settings.CHAT_RETENTION_DAYS,
+            help=f'Días de chat que se conservan. Por defecto {settings.CHAT_RETENTION_DAYS}',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING('\n🧹 Limpiando datos viejos...'))
+        summary = prune_data(
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            guest_days=options['guest_days'],
+            chat_days=options['chat_days'],
+        )
+        for key, result in summary.items():
+            line = (
+                f"{LABELS[key]}: {result['deleted']} borrados en {result['batches']} lotes, "
+                f"{result['seconds']}s ({result['rows_per_second']} filas/s)"
+            )
+            if result['errors']:
+                self.stdout.write(self.style.WARNING(f"⚠️ {line}, {result['errors']} lotes saltados por conflicto"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✅ {line}'))
@@ -0,0 +1,87 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bids.models import Product
+from bids.traffic import TrafficReplayer, read_trace
+
+
+class Command(BaseCommand):
+    help = 'Reproduce una traza de TrafficCaptureMiddleware contra una instancia local y reporta latencias por endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('traces', nargs='+', help='Archivos de traza (se mezclan por instante)')
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Por defecto http://127.0.0.1:8000')
+        parser.add_argument('--speed', type=float, default=1.0, help='1 = tiempo real, 10 = diez veces más rápido, 0 = sin esperas')
+        parser.add_argument('--concurrency', type=int, default=50, help='Peticiones simultáneas como máximo. Por defecto 50')
+        parser.add_argument('--product', type=int, action='append', help='Producto local al que reasignar (se puede repetir). Por defecto los en curso')
+        parser.add_argument('--limit', type=int, default=None, help='Reproducir solo los primeros N registros')
+        parser.add_argument('--timeout', type=float, default=10.0, help='Segundos por petición. Por defecto 10')
+        parser.add_argument('--output', default=None, help='Guardar el reporte en JSON')
+
+    def handle(self, *args, **options):
+        if options['speed'] < 0:
+            raise CommandError('--speed no puede ser negativo')
+        records = read_trace(options['traces'])
+        if options['limit']:
+            records = records[:options['limit']]
+        if not records:
+            raise CommandError('La traza está vacía')
+
+        if options['product']:
+            products = Product.objects.filter(id__in=options['product'])
+        else:
+            now = timezone.now()
+            products = Product.objects.filter(start_time__lte=now, end_time__gt=now)
+        targets = list(products.order_by('id').values_list('id', 'current_price', 'name'))
+        if not targets:
+            raise CommandError('No hay productos locales a los que reasignar la traza (usa --product)')
+
+        traced = {record['p'] for record in records if 'p' in record}
+        seconds = (records[-1]['ts'] - records[0]['ts']) / 1000
+        speed = f"{options['speed']:g}x" if options['speed'] else 'máxima velocidad'
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'\n🔁 Reproduciendo {len(records):,} peticiones ({seconds:.0f}s de traza, {len(traced)} productos → '
+            f"{len(targets)} locales) a {speed} contra {options['base_url']}"
+        ))
+        replayer = TrafficReplayer(
+            records,
+            base_url=options['base_url'],
+            products=[product_id for product_id, _, _ in targets],
+            prices={product_id: price for product_id, price, _ in targets},
+            search_terms=[word for _, _, name in targets for word in name.split() if len(word) > 3],
+            speed=options['speed'],
+            concurrency=options['concurrency'],
+            timeout=options['timeout'],
+        )
+        report = replayer.run()
+
+        header = f"{'endpoint':<22}{'n':>8}{'err':>6}{'503':>6}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'cap p50':>9}{'cap p99':>9}"
+        self.stdout.write(header)
+        for endpoint in report['endpoints']:
+            latency, captured = endpoint['latency_ms'], endpoint['captured_ms']
+            line = (
+                f"{endpoint['view']:<22}{endpoint['requests']:>8}{endpoint['errors']:>6}{endpoint['shed']:>6}"
+                + ''.join(f'{_ms(latency[key]):>9}' for key in ('p50', 'p90', 'p99', 'max'))
+                + ''.join(f'{_ms(captured[key]):>9}' for key in ('p50', 'p99'))
+            )
+            style = self.style.ERROR if endpoint['errors'] else self.style.SUCCESS
+            self.stdout.write(style(line))
+
+        self.stdout.write(
+            f"\n✅ {report['requests']:,} peticiones en {report['elapsed_seconds']}s "
+            f"({report['requests_per_second']} req/s), {report['guests']} invitados"
+        )
+        lag = report['schedule_lag_ms']['p99']
+        if lag is not None and lag > 100:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ El reproductor va atrasado (p99 {lag:.0f} ms): sube --concurrency o baja --speed'
+            ))
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+def _ms(value):
+    return '-' if value is None else f'{value:.1f}'
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bids.jobs import get_jobs
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta las tareas periódicas de mantenimiento (archivo, limpieza, etc.)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Ejecuta todas las tareas una vez y termina (útil desde cron)',
+        )
+        parser.add_argument(
+            '--job',
+            action='append',
+            dest='jobs',
+            help='Ejecuta solo la tarea indicada (puede repetirse)',
+        )
+        parser.add_argument(
+            '--tick',
+            type=int,
+            default=30,
+            help='Segundos entre revisiones de tareas vencidas (por defecto 30)',
+        )
+
+    def handle(self, *args, **options):
+        jobs = get_jobs()
+        if options['jobs']:
+            known = {job.name for job in jobs}
+            unknown = set(options['jobs']) - known
+            if unknown:
+                raise CommandError(f"Tareas desconocidas: {', '.join(sorted(unknown))}")
+            jobs = [job for job in jobs if job.name in options['jobs']]
+
+        while True:
+            now = time.monotonic()
+            for job in jobs:
+                if options['once'] or job.is_due(now):
+                    self._run(job, now)
+            if options['once']:
+                return
+            time.sleep(options['tick'])
+
+    def _run(self, job, now):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'▶️  {job.name}'))
+        started = time.monotonic()
+        try:
+            result = job.run(now)
+        except Exception as e:
+            # Una tarea fallida no debe tumbar el proceso: se reintenta en el siguiente intervalo
+            self.stderr.write(self.style.ERROR(f'❌ {job.name} falló: {e}'))
+            return
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'✅ {job.name} ({elapsed:.1f}s): {result}'))
@@ -0,0 +1,236 @@
+import datetime
+import json
+import random
+import time
+from importlib import import_module
+
+import numpy as np
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from bids import clock, singleflight
+from bids.models import GuestUser, Product
+from bids.state import state_store
+
+# Mismas reglas que Product.extend_auction_if_needed
+ANTI_SNIPING_WINDOW = 30
+ANTI_SNIPING_MIN_INCREMENT = 1_000_000
+# Monto máximo que acepta SubmitBidView
+BID_MAX_AMOUNT = 512_000_000
+BID_INCREMENTS = [100, 500, 1_000, 5_000, 10_000]
+
+
+class Command(BaseCommand):
+    help = (
+        'Simula una subasta completa (horas de pujas, cierre con anti-sniping y miles de postores) '
+        'con el reloj simulado de bids/clock.py: corre en segundos y mide el throughput por tramo'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=int, default=7200, help='Segundos simulados de subasta. Por defecto 7200 (2 horas)')
+        parser.add_argument('--bidders', type=int, default=2000, help='Postores. Por defecto 2000')
+        parser.add_argument('--bids', type=int, default=5_000, help='Pujas en total. Por defecto 5000')
+        parser.add_argument('--closing-window', type=int, default=300, help='La ráfaga de cierre empieza estos segundos antes del fin. Por defecto 300')
+        parser.add_argument('--closing-share', type=float, default=0.3, help='Fracción de las pujas en la ráfaga de cierre. Por defecto 0.3')
+        parser.add_argument('--closing-rate', type=float, default=3.0, help='Pujas por segundo simulado en la ráfaga de cierre. Por defecto 3')
+        parser.add_argument('--snipe-ratio', type=float, default=0.2, help='Fracción de pujas de +1M en los últimos 30 s (extienden la subasta). Por defecto 0.2')
+        parser.add_argument('--polls-per-bid', type=float, default=1.0, help='Polls de estado por puja. Por defecto 1')
+        parser.add_argument('--report-every', type=int, default=600, help='Segundos simulados por tramo del reporte. Por defecto 600')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--keep', action='store_true', help='No borrar la subasta, los postores ni sus sesiones al terminar')
+        parser.add_argument('--output', default=None, help='Guardar el reporte en JSON')
+
+    def handle(self, *args, **options):
+        if options['closing_window'] >= options['duration']:
+            raise CommandError('--closing-window tiene que ser menor que --duration')
+        if options['bidders'] < 1 or options['bids'] < 1 or options['closing_rate'] <= 0:
+            raise CommandError('--bidders, --bids y --closing-rate tienen que ser positivos')
+        self.rng = random.Random(options['seed'])
+        self.options = options
+
+        with clock.simulated() as sim:
+            self.sim = sim
+            self.start = sim.now()
+            product = Product.objects.create(
+                name='Simulación simulate_auction',
+                description='Subasta generada por simulate_auction',
+                image='',
+                starting_price=1_000,
+                start_time=self.start,
+                end_time=self.start + datetime.timedelta(seconds=options['duration']),
+            )
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\n⏩ Subasta simulada de {options['duration'] / 3600:g} h: {options['bids']:,} pujas "
+                f"de {options['bidders']:,} postores (producto {product.id})"
+            ))
+            sessions = self._create_bidders(product, options['bidders'])
+            try:
+                report = self._run(product, sessions)
+            finally:
+                if not options['keep']:
+                    self._cleanup(product, sessions)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2, ensure_ascii=False)
+
+    def _create_bidders(self, product, count):
+        """Invitados con sesión, como los deja join_auction"""
+        engine = import_module(settings.SESSION_ENGINE)
+        prefix = f'sim{product.id}-'
+        with transaction.atomic():
+            GuestUser.objects.bulk_create(GuestUser(username=f'{prefix}{index}') for index in range(count))
+            guests = GuestUser.objects.filter(username__startswith=prefix).order_by('id')
+            sessions = []
+            for guest in guests:
+                session = engine.SessionStore()
+                session['username'] = guest.username
+                session['guest_user_id'] = guest.id
+                session.create()
+                sessions.append(session.session_key)
+        return sessions
+
+    def _cleanup(self, product, sessions):
+        GuestUser.objects.filter(username__startswith=f'sim{product.id}-').delete()
+        product.delete()
+        if settings.SESSION_ENGINE.endswith(('.db', '.cached_db')):
+            Session.objects.filter(session_key__in=sessions).delete()
+
+    def _run(self, product, sessions):
+        options, rng, sim = self.options, self.rng, self.sim
+        client = Client()
+        bid_url = reverse('submit_bid', args=[product.id])
+        status_url = reverse('get_product_status', args=[product.id])
+        self.price = product.starting_price
+        self.segment = self._new_segment(0)
+        self.segments = []
+        totals = {'bids': 0, 'accepted': 0, 'polls': 0, 'extensions': 0}
+        end_time = product.end_time
+        started = time.perf_counter()
+
+        def request(method, url, session_key, **kwargs):
+            client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+            began = time.perf_counter()
+            response = getattr(client, method)(url, **kwargs)
+            return response, (time.perf_counter() - began) * 1000
+
+        def bid(amount):
+            nonlocal end_time
+            self._roll_segment(sim.now())
+            response, elapsed = request(
+                'post', bid_url, rng.choice(sessions),
+                data=json.dumps({'amount': amount}), content_type='application/json',
+            )
+            result = response.json()
+            totals['bids'] += 1
+            self.segment['bids'].append(elapsed)
+            if result.get('success'):
+                totals['accepted'] += 1
+                self.price = result['new_price']
+                new_end = state_store.get(product.id).end_time
+                if new_end > end_time:
+                    totals['extensions'] += 1
+                    self.segment['extensions'] += 1
+                    end_time = new_end
+            polls = int(options['polls_per_bid']) + (rng.random() < options['polls_per_bid'] % 1)
+            for _ in range(polls):
+                _, elapsed = request('get', status_url, rng.choice(sessions))
+                totals['polls'] += 1
+                self.segment['polls'].append(elapsed)
+
+        # Pujas a lo largo de la subasta: momentos uniformes antes de la ráfaga de cierre
+        closing_bids = round(options['bids'] * options['closing_share'])
+        regular_end = options['duration'] - options['closing_window']
+        for offset in sorted(rng.uniform(0, regular_end) for _ in range(options['bids'] - closing_bids)):
+            sim.set(self.start + datetime.timedelta(seconds=offset))
+            bid(self.price + self._increment())
+
+        # Ráfaga de cierre: llegadas de Poisson hasta agotar las pujas o que termine la subasta.
+        # Las pujas de +1M en los últimos 30 s la extienden mientras queden postores
+        sim.set(self.start + datetime.timedelta(seconds=regular_end))
+        remaining = closing_bids
+        while remaining:
+            now = sim.advance(rng.expovariate(options['closing_rate']))
+            if now > end_time:
+                break
+            snipe = (
+                (end_time - now).total_seconds() <= ANTI_SNIPING_WINDOW
+                and rng.random() < options['snipe_ratio']
+                and self.price + ANTI_SNIPING_MIN_INCREMENT <= BID_MAX_AMOUNT
+            )
+            bid(self.price + (ANTI_SNIPING_MIN_INCREMENT if snipe else self._increment()))
+            remaining -= 1
+
+        # Cierre: el reloj pasa el fin y la subasta tiene que figurar como finalizada
+        sim.set(end_time + datetime.timedelta(seconds=1))
+        # Sin la respuesta compartida de un poll anterior (single-flight mide frescura en tiempo real)
+        singleflight.clear()
+        status, _ = request('get', status_url, sessions[0])
+        finished = not status.json()['is_ongoing']
+        self._roll_segment(None)
+        wall = time.perf_counter() - started
+        return self._report(product, totals, end_time, wall, finished)
+
+    def _increment(self):
+        """Incremento habitual (montos de los botones de puja rápida)"""
+        return self.rng.choice(BID_INCREMENTS)
+
+    def _new_segment(self, index):
+        return {'index': index, 'bids': [], 'polls': [], 'extensions': 0, 'started': time.perf_counter()}
+
+    def _roll_segment(self, now):
+        """Cierra el tramo actual del reporte si `now` ya cae en otro (None: el último)"""
+        index = None if now is None else int((now - self.start).total_seconds() // self.options['report_every'])
+        if index is not None and index <= self.segment['index']:
+            return
+        segment = self.segment
+        if segment['bids'] or segment['polls']:
+            wall = time.perf_counter() - segment['started']
+            bids = np.asarray(segment['bids'])
+            row = {
+                'from_minute': segment['index'] * self.options['report_every'] // 60,
+                'bids': len(bids),
+                'polls': len(segment['polls']),
+                'wall_seconds': round(wall, 2),
+                'bids_per_second': round(len(bids) / wall, 1) if wall else 0,
+                'bid_p50_ms': round(float(np.percentile(bids, 50)), 2) if len(bids) else None,
+                'bid_p99_ms': round(float(np.percentile(bids, 99)), 2) if len(bids) else None,
+                'extensions': segment['extensions'],
+                'price': self.price,
+            }
+            self.segments.append(row)
+            self.stdout.write(
+                f"  min {row['from_minute']:>5}  {row['bids']:>6} pujas  {row['polls']:>6} polls  "
+                f"{row['bids_per_second']:>8} pujas/s  p50 {row['bid_p50_ms']} ms  p99 {row['bid_p99_ms']} ms  "
+                f"{row['extensions']:>3} extensiones  ${row['price']:,}"
+            )
+        if index is not None:
+            self.segment = self._new_segment(index)
+
+    def _report(self, product, totals, end_time, wall, finished):
+        simulated = (end_time - self.start).total_seconds()
+        report = {
+            **totals,
+            'simulated_seconds': round(simulated),
+            'overtime_seconds': round(simulated - self.options['duration']),
+            'wall_seconds': round(wall, 2),
+            'speedup': round(simulated / wall, 1) if wall else None,
+            'bids_per_second': round(totals['bids'] / wall, 1) if wall else None,
+            'requests_per_second': round((totals['bids'] + totals['polls']) / wall, 1) if wall else None,
+            'final_price': self.price,
+            'finished': finished,
+            'segments': self.segments,
+        }
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {report['simulated_seconds']:,}s simulados ({report['overtime_seconds']}s por "
+            f"{totals['extensions']} extensiones) en {report['wall_seconds']}s reales (x{report['speedup']}): "
+            f"{totals['accepted']:,}/{totals['bids']:,} pujas aceptadas, {report['bids_per_second']} pujas/s, "
+            f"{report['requests_per_second']} peticiones/s, precio final ${self.price:,}"
+        ))
+        if not finished:
+            self.stdout.write(self.style.ERROR('❌ La subasta sigue en curso después de su fin simulado'))
+        return report
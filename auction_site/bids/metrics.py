@@ -0,0 +1,75 @@
+"""
+Métricas en memoria del proceso (contadores y tiempos).
+
+Son intencionalmente simples: cada worker lleva las suyas y las expone en
+/api/metrics/ para el staff. No hay dependencias externas.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Cantidad de muestras recientes que se guardan por métrica de tiempo (para percentiles)
+SAMPLE_SIZE = 1024
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_samples = defaultdict(lambda: deque(maxlen=SAMPLE_SIZE))
+_totals = defaultdict(lambda: [0, 0.0, 0.0])  # count, sum, max
+
+
+def incr(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name, value):
+    """Registra una medición (por ejemplo milisegundos)"""
+    with _lock:
+        _samples[name].append(value)
+        totals = _totals[name]
+        totals[0] += 1
+        totals[1] += value
+        totals[2] = max(totals[2], value)
+
+
+@contextmanager
+def timer(name):
+    """Mide en milisegundos lo que tarda el bloque"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - started) * 1000)
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    index = min(int(len(ordered) * fraction), len(ordered) - 1)
+    return ordered[index]
+
+
+def snapshot():
+    with _lock:
+        counters = dict(_counters)
+        timings = {}
+        for name, samples in _samples.items():
+            ordered = sorted(samples)
+            count, total, maximum = _totals[name]
+            timings[name] = {
+                'count': count,
+                'avg': round(total / count, 3) if count else 0.0,
+                'p50': round(_percentile(ordered, 0.50), 3),
+                'p95': round(_percentile(ordered, 0.95), 3),
+                'p99': round(_percentile(ordered, 0.99), 3),
+                'max': round(maximum, 3),
+            }
+    return {'counters': counters, 'timings': timings}
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _samples.clear()
+        _totals.clear()
@@ -1,25 +1,48 @@
-from django.http import HttpResponseForbidden
+import atexit
+import math
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.middleware.gzip import GZipMiddleware
+from . import metrics
+from .encoding import negotiate
+from .localcache import LocalCache
 from .models import BannedIP
+from .state import state_store
+
+# ip -> True si está baneada. Se invalida por el bus al banear/desbanear (bids/signals.py)
+banned_ips = LocalCache('banned_ip')
+
+# Respuestas de polling recientes que se guardan para servir bajo carga
+STALE_MAX_ENTRIES = 2048
+
+def client_ip(request):
+    """IP del cliente. Si usas ngrok, viene en 'X-Forwarded-For'"""
+    forwarded_ip = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded_ip:
+        # Puede venir como lista (algunas configuraciones), entonces toma el primero
+        if isinstance(forwarded_ip, list):
+            return forwarded_ip[0]
+        return forwarded_ip.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
+
 
 class IPBanMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        ip = request.META.get('REMOTE_ADDR')
-        # Si usas ngrok, prueba también con 'X-Forwarded-For'
-        forwarded_ip = request.META.get('HTTP_X_FORWARDED_FOR')
-        if forwarded_ip:
-            # Puede venir como lista (algunas configuraciones), entonces toma el primero
-            if isinstance(forwarded_ip, list):
-                ip_to_check = forwarded_ip[0]
-            else:
-                ip_to_check = forwarded_ip.split(',')[0].strip()
-        else:
-            ip_to_check = ip
-
-
-        if BannedIP.objects.filter(ip_address=ip_to_check).exists():
+        ip_to_check = client_ip(request)
+        is_banned = banned_ips.get(
+            ip_to_check,
+            lambda: BannedIP.objects.filter(ip_address=ip_to_check).exists(),
+        )
+        if is_banned:
             return HttpResponseForbidden("Acceso bloqueado (IP baneada)")
         return self.get_response(request)
 
@@ -38,9 +61,230 @@ class DisableAuthMiddleware:
         if any(request.path.startswith(path) for path in self.public_paths):
             # Desactivar completamente la autenticación para estas paths
             request.user = None
-            # Crear sesión si no existe
-            if not request.session.session_key:
+            # Crear sesión si no existe. Las APIs no la crean: solo leen la que deja join_auction,
+            # y así las respuestas públicas (p. ej. subastas finalizadas) no llevan Vary: Cookie
+            if not request.path.startswith('/api/') and not request.session.session_key:
                 request.session.create()
         
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+
+def sheddable(view):
+    """Marca una vista de polling que el control de admisión puede rechazar bajo carga"""
+    view.sheddable = True
+    return view
+
+
+class LoadMonitor:
+    """
+    Peticiones en curso y latencia reciente de las consultas a la base de datos.
+    La latencia es una media exponencial que además decae con el tiempo: si se
+    deja de consultar (porque se está rechazando), la presión baja sola.
+    """
+    # Segundos de la ventana de la media exponencial
+    WINDOW = 2.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self._db_latency = 0.0
+        self._updated_at = time.monotonic()
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _decayed(self, now):
+        return self._db_latency * math.exp(-(now - self._updated_at) / self.WINDOW)
+
+    def db_latency(self):
+        with self._lock:
+            return self._decayed(time.monotonic())
+
+    def track_query(self, execute, sql, params, many, context):
+        """execute_wrapper: mide cada consulta de la petición"""
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            now = time.monotonic()
+            elapsed_ms = (now - started) * 1000
+            with self._lock:
+                # Cada consulta pesa según cuánto tiempo pasó desde la anterior
+                weight = 1 - math.exp(-max(now - self._updated_at, 0.001) / self.WINDOW)
+                self._db_latency = self._decayed(now) + weight * elapsed_ms
+                self._updated_at = now
+
+    def under_pressure(self):
+        return (
+            self.in_flight > settings.ADMISSION_MAX_IN_FLIGHT
+            or self.db_latency() > settings.ADMISSION_MAX_DB_LATENCY_MS
+        )
+
+
+class AdmissionControlMiddleware:
+    """
+    Bajo carga (muchas peticiones en curso o consultas lentas) rechaza los polls
+    de lectura marcados con @sheddable para dejar la base de datos a las pujas.
+    Si hay una copia reciente de la respuesta la devuelve (X-Stale); si no,
+    503 con Retry-After. Las pujas y el resto de las vistas siempre entran.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.monitor = LoadMonitor()
+        self._stale = {}  # (path, query string, formato) -> (content, content_type, vary, guardado_en)
+
+    def __call__(self, request):
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            return self.get_response(request)
+
+        self.monitor.enter()
+        try:
+            with connection.execute_wrapper(self.monitor.track_query):
+                response = self.get_response(request)
+        finally:
+            self.monitor.exit()
+
+        stale_key = getattr(request, 'admission_key', None)
+        if (
+            stale_key is not None
+            and response.status_code == 200
+            and not getattr(response, 'coalesce_private', False)
+            and not response.streaming
+        ):
+            if len(self._stale) >= STALE_MAX_ENTRIES:
+                self._stale.clear()
+            self._stale[stale_key] = (
+                response.content, response['Content-Type'], response.get('Vary'), time.monotonic(),
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            not settings.ADMISSION_CONTROL_ENABLED
+            or request.method != 'GET'
+            or not getattr(view_func, 'sheddable', False)
+        ):
+            return None
+
+        # Con la query string: ?ids= y ?points= cambian la respuesta (como en singleflight.coalesce)
+        request.admission_key = (request.path, request.GET.urlencode(), negotiate(request))
+        if not self.monitor.under_pressure():
+            return None
+
+        stale = self._stale.get(request.admission_key)
+        if stale is not None:
+            content, content_type, vary, stored_at = stale
+            age = time.monotonic() - stored_at
+            if age <= settings.ADMISSION_STALE_MAX_AGE:
+                metrics.incr('admission.stale')
+                request.admission_key = None
+                response = HttpResponse(content, content_type=content_type)
+                response['Age'] = str(int(age))
+                response['X-Stale'] = '1'
+                if vary:
+                    response['Vary'] = vary
+                return response
+
+        metrics.incr('admission.shed')
+        request.admission_key = None
+        response = JsonResponse({'error': 'Servidor ocupado, reintenta en unos segundos'}, status=503)
+        response['Retry-After'] = str(settings.ADMISSION_RETRY_AFTER)
+        return response
+
+
+class JSONCompressionMiddleware(GZipMiddleware):
+    """
+    gzip para las respuestas JSON desde JSON_COMPRESSION_MIN_BYTES (chat, historial,
+    pujas). Las chicas (estado, resultado de una puja) van sin comprimir: lo ahorrado
+    no paga la CPU. Las páginas HTML y msgpack quedan igual.
+    """
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or not response.get('Content-Type', '').startswith('application/json')
+            or len(response.content) < settings.JSON_COMPRESSION_MIN_BYTES
+        ):
+            return response
+        return super().process_response(request, response)
+
+
+class TrafficCaptureMiddleware:
+    """
+    Graba una traza anónima del tráfico (bids/traffic.py) para reproducirla con
+    replay_traffic. Desactivado salvo con TRAFFIC_CAPTURE_ENABLED. La muestra es
+    por visitante: se graban todas las peticiones de los visitantes elegidos.
+    """
+    SKIPPED_PREFIXES = ('/admin/', settings.STATIC_URL, settings.MEDIA_URL)
+
+    def __init__(self, get_response):
+        if not settings.TRAFFIC_CAPTURE_ENABLED:
+            raise MiddlewareNotUsed
+        # bids.traffic trae también el reproductor (urllib): solo con la captura activa
+        from . import traffic
+
+        self.traffic = traffic
+        self.get_response = get_response
+        self.sample = settings.TRAFFIC_CAPTURE_SAMPLE
+        self.writer = traffic.TraceWriter(
+            settings.TRAFFIC_CAPTURE_PATH,
+            max_bytes=settings.TRAFFIC_CAPTURE_MAX_MB * 1024 * 1024,
+            flush_interval=settings.TRAFFIC_CAPTURE_FLUSH_INTERVAL,
+        )
+        atexit.register(self.writer.flush)
+
+    def __call__(self, request):
+        if self.writer.full or request.path.startswith(self.SKIPPED_PREFIXES):
+            return self.get_response(request)
+
+        session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        visitor = self.traffic.visitor_hash(session_key) if session_key else None
+        sampled = (visitor % 10_000 if visitor is not None else random.randrange(10_000)) < self.sample * 10_000
+        if not sampled:
+            return self.get_response(request)
+
+        record = {'ts': round(time.time() * 1000, 1), 'm': request.method}
+        if visitor is not None:
+            record['g'] = visitor
+        if request.GET:
+            record['q'] = {key: self.traffic.value_shape(value, key) for key, value in request.GET.items()}
+        if 'msgpack' in request.META.get('HTTP_ACCEPT', ''):
+            record['a'] = 1
+        if request.method == 'POST':
+            shape = self.traffic.body_shape(request)
+            if shape:
+                record['b'] = shape
+
+        started = time.monotonic()
+        response = self.get_response(request)
+        record['d'] = round((time.monotonic() - started) * 1000, 1)
+
+        match = request.resolver_match
+        if match is None or not match.url_name:
+            return response
+        record['v'] = match.url_name
+        record['s'] = response.status_code
+        if not response.streaming:
+            record['n'] = len(response.content)
+        product_id = match.kwargs.get('product_id')
+        if product_id is not None:
+            record['p'] = product_id
+        if match.url_name == 'submit_bid' and isinstance(record.get('b', {}).get('amount'), int):
+            # Incremento sobre el precio previo: al reproducir se puja igual de lejos del precio local
+            before = getattr(request, 'price_before_bid', None)
+            if before is not None:
+                record['i'] = record['b']['amount'] - before
+        self.writer.add(record)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method == 'POST' and request.resolver_match.url_name == 'submit_bid':
+            # Estado en memoria (bids/state.py): normalmente sin consulta
+            product = state_store.get(view_kwargs['product_id'])
+            if product is not None:
+                request.price_before_bid = product.current_price
+        return None
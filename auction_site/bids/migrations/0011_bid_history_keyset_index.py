@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0010_alter_bid_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bid',
+            name='product_bids_idx',
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['product', '-created_at', '-id'], name='product_bids_idx'),
+        ),
+    ]
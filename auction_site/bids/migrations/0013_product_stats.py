@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+from bids.hll import HyperLogLog
+
+
+def backfill_stats(apps, schema_editor):
+    """Calcula por única vez las estadísticas de las pujas ya existentes"""
+    Bid = apps.get_model('bids', 'Bid')
+    ArchivedBid = apps.get_model('bids', 'ArchivedBid')
+    ProductStats = apps.get_model('bids', 'ProductStats')
+
+    for model, bidder_field in ((Bid, 'guest_user_id'), (ArchivedBid, 'bidder_name')):
+        totals = model.objects.values('product_id').annotate(
+            count=Count('id'), first=Min('created_at'), last=Max('created_at')
+        ).order_by()
+        for row in totals:
+            sketch = HyperLogLog()
+            bidders = model.objects.filter(product_id=row['product_id']).values_list(bidder_field, flat=True).distinct()
+            for bidder in bidders.iterator():
+                sketch.add(bidder)
+            ProductStats.objects.update_or_create(product_id=row['product_id'], defaults={
+                'bid_count': row['count'],
+                'unique_bidders': sketch.count(),
+                'bidders_sketch': sketch.to_bytes(),
+                'first_bid_at': row['first'],
+                'last_bid_at': row['last'],
+            })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0012_archive_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductStats',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='bids.product')),
+                ('bid_count', models.IntegerField(default=0)),
+                ('unique_bidders', models.IntegerField(default=0)),
+                ('bidders_sketch', models.BinaryField(default=bytes)),
+                ('first_bid_at', models.DateTimeField(blank=True, null=True)),
+                ('last_bid_at', models.DateTimeField(blank=True, null=True)),
+                ('bid_rate', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Product stats',
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
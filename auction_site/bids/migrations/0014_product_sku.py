@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0013_product_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(blank=True, help_text='Identificador externo (clave natural usada por import_products)', max_length=64, null=True, unique=True),
+        ),
+    ]
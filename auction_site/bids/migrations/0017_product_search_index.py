@@ -0,0 +1,96 @@
+from django.db import migrations
+
+# SQLite: tabla FTS5 con contenido externo (no duplica el texto) sincronizada por triggers.
+# Los triggers cubren también bulk_create (import_products).
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE bids_product_fts USING fts5(
+        name, description,
+        content='bids_product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER bids_product_fts_ai AFTER INSERT ON bids_product BEGIN
+        INSERT INTO bids_product_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER bids_product_fts_ad AFTER DELETE ON bids_product BEGIN
+        INSERT INTO bids_product_fts(bids_product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER bids_product_fts_au AFTER UPDATE OF name, description ON bids_product BEGIN
+        INSERT INTO bids_product_fts(bids_product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO bids_product_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    "INSERT INTO bids_product_fts(bids_product_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS bids_product_fts_ai',
+    'DROP TRIGGER IF EXISTS bids_product_fts_ad',
+    'DROP TRIGGER IF EXISTS bids_product_fts_au',
+    'DROP TABLE IF EXISTS bids_product_fts',
+]
+
+# PostgreSQL: índice GIN de expresión; bids/search.py usa exactamente la misma expresión
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX IF NOT EXISTS product_search_idx ON bids_product
+    USING GIN (to_tsvector('spanish', coalesce(name, '') || ' ' || coalesce(description, '')))
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS product_search_idx',
+]
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)')
+        except Exception:
+            return False
+        cursor.execute('DROP TABLE temp.fts5_probe')
+        return True
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite' and _sqlite_has_fts5(schema_editor.connection):
+        _run(schema_editor, SQLITE_FORWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    # Otros motores (o SQLite sin FTS5): la búsqueda usa icontains
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0016_invalidation_event'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
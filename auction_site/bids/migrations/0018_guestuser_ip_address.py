@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0017_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guestuser',
+            name='ip_address',
+            field=models.CharField(blank=True, db_index=True, max_length=45, null=True),
+        ),
+    ]
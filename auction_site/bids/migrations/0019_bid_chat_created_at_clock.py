@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:52
+
+import bids.clock
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0018_guestuser_ip_address'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bid',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=bids.clock.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='created_at',
+            field=models.DateTimeField(default=bids.clock.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='start_time',
+            field=models.DateTimeField(db_index=True, default=bids.clock.now),
+        ),
+    ]
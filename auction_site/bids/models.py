@@ -1,54 +1,56 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
 from django.db import models
 from django.contrib.auth.models import User
-from django.utils import timezone
 import datetime
+import math
+import posixpath
 
-class Product(models.Model):
-    name = models.CharField(max_length=200)
-    description = models.TextField()
-    image = models.ImageField(upload_to='products/')
-    starting_price = models.IntegerField(default=0)
-    current_price = models.IntegerField(default=0)
-    start_time = models.DateTimeField(default=timezone.now, db_index=True)
-    end_time = models.DateTimeField()
-    is_active = models.BooleanField(default=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    anti_sniping_active = models.BooleanField(default=False)
-    is_silent_auction = models.BooleanField(
-        default=False,
-        verbose_name="Subasta Silenciosa",
-        help_text="En subastas silenciosas, los usuarios no ven las pujas de otros hasta que termine"
-    )
+from . import cache as finished_cache
+from . import clock
+from .hll import HyperLogLog
+from .encoding import epoch_ms
 
-    class Meta:
-        # ✅ AGREGAR índices compuestos para queries complejas
-        indexes = [
-            models.Index(fields=['start_time', 'end_time', 'is_active'], name='active_auctions_idx'),
-            models.Index(fields=['-end_time'], name='finished_auctions_idx'),
-        ]
+class AuctionTimingMixin:
+    """
+    Lógica de tiempos y precios de una subasta. La comparten Product y el
+    read model en memoria AuctionState (bids/state.py); solo requiere los atributos
+    id, start_time, end_time, is_silent_auction, anti_sniping_active,
+    current_price, starting_price y archived_at.
+    """
     
     @property
     def is_upcoming(self):
         """Verifica si la subasta está programada para el futuro"""
-        return self.start_time > timezone.now()
+        return self.start_time > clock.now()
     
     @property
     def is_ongoing(self):
         """Verifica si la subasta está en curso"""
-        now = timezone.now()
+        now = clock.now()
         return self.start_time <= now <= self.end_time
     
     @property
     def is_finished(self):
         """Verifica si la subasta ha finalizado"""
-        return self.end_time < timezone.now()
+        return self.end_time < clock.now()
+    
+    @property
+    def is_settled(self):
+        """
+        Finalizada hace más de FINISHED_CACHE_GRACE segundos. Solo entonces se cachea para
+        siempre: el end_time del estado en memoria puede tener hasta AUCTION_STATE_TTL de
+        atraso (más lo que tarde el bus) y no ver una extensión anti-sniping de otro worker.
+        """
+        return self.end_time + datetime.timedelta(seconds=settings.FINISHED_CACHE_GRACE) < clock.now()
     
     @property
     def status(self):
-        """Devuelve el estado de la subasta"""
-        if self.is_upcoming:
+        """Devuelve el estado de la subasta (una sola lectura del reloj)"""
+        now = clock.now()
+        if self.start_time > now:
             return "upcoming"
-        elif self.is_ongoing:
+        elif now <= self.end_time:
             return "ongoing"
         else:
             return "finished"
@@ -57,7 +59,7 @@ class Product(models.Model):
     def time_remaining(self):
         """Devuelve el tiempo restante en segundos"""
         if self.is_ongoing:
-            return (self.end_time - timezone.now()).total_seconds()
+            return (self.end_time - clock.now()).total_seconds()
         return 0
     
     @property
@@ -81,33 +83,116 @@ class Product(models.Model):
             return False
         return self.is_in_anti_sniping_period or self.anti_sniping_active
     
+    def bid_queryset(self):
+        """Pujas del producto, leídas del archivo si la subasta ya fue archivada"""
+        if self.archived_at:
+            return ArchivedBid.objects.filter(product_id=self.id)
+        return Bid.objects.filter(product_id=self.id).select_related('user', 'guest_user')
+    
+    @property
+    def current_price_formatted(self):
+        """Precio actual formateado con separadores de miles"""
+        return f"{self.current_price:,}".replace(",", ".")
+    
+    @property
+    def starting_price_formatted(self):
+        """Precio inicial formateado con separadores de miles"""
+        return f"{self.starting_price:,}".replace(",", ".")
+
+class Product(AuctionTimingMixin, models.Model):
+    sku = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Identificador externo (clave natural usada por import_products)"
+    )
+    name = models.CharField(max_length=200)
+    description = models.TextField()
+    image = models.ImageField(upload_to='products/')
+    # Variantes responsivas generadas en segundo plano (ver bids/variants.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    starting_price = models.IntegerField(default=0)
+    current_price = models.IntegerField(default=0)
+    start_time = models.DateTimeField(default=clock.now, db_index=True)
+    end_time = models.DateTimeField()
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    anti_sniping_active = models.BooleanField(default=False)
+    archived_at = models.DateTimeField(null=True, blank=True)
+    is_silent_auction = models.BooleanField(
+        default=False,
+        verbose_name="Subasta Silenciosa",
+        help_text="En subastas silenciosas, los usuarios no ven las pujas de otros hasta que termine"
+    )
+
+    class Meta:
+        # ✅ AGREGAR índices compuestos para queries complejas
+        indexes = [
+            models.Index(fields=['start_time', 'end_time', 'is_active'], name='active_auctions_idx'),
+            models.Index(fields=['-end_time'], name='finished_auctions_idx'),
+            # Paginación por cursor de la búsqueda (bids/pagination.py)
+            models.Index(fields=['-created_at', '-id'], name='product_created_idx'),
+        ]
+    
+    def get_stats(self):
+        """Estadísticas del producto (sin guardar si aún no tiene pujas)"""
+        try:
+            return self.stats
+        except ProductStats.DoesNotExist:
+            return ProductStats(product=self)
+    
     @property
     def winning_bid(self):
         """Obtiene la puja ganadora"""
         if self.is_finished:
-            return self.bid_set.order_by('-amount').first()
+            return self.bid_queryset().order_by('-amount').first()
         return None
     
     @property
     def winner(self):
-        """Obtiene el ganador de la subasta"""
+        """Obtiene el ganador de la subasta (cacheado: una vez finalizada ya no cambia)"""
+        if not self.is_finished:
+            return None
+        if not self.is_settled:
+            return self._compute_winner() or None
+        # '' representa "sin pujas" para poder cachear también ese resultado
+        return finished_cache.get_or_set_finished(self.id, 'winner', self._compute_winner) or None
+    
+    def _compute_winner(self):
         winning_bid = self.winning_bid
-        if winning_bid:
-            if winning_bid.user:
-                return winning_bid.user.username
-            else:
-                return winning_bid.guest_user.username
-        return None
+        return winning_bid.bidder_name if winning_bid else ''
+    
+    def _variant_url(self, filename):
+        directory = posixpath.dirname(self.image.name)
+        return default_storage.url(posixpath.join(directory, filename))
     
     @property
-    def current_price_formatted(self):
-        """Precio actual formateado con separadores de miles"""
-        return f"{self.current_price:,}".replace(",", ".")
+    def has_image_variants(self):
+        """Las variantes existen y corresponden a la imagen actual"""
+        return (
+            bool(self.image)
+            and self.image_variants.get('source') == self.image.name
+            and 'variants' in self.image_variants
+        )
     
     @property
-    def starting_price_formatted(self):
-        """Precio inicial formateado con separadores de miles"""
-        return f"{self.starting_price:,}".replace(",", ".")
+    def image_srcset(self):
+        """srcset en el formato original (JPEG/PNG), incluyendo la imagen completa"""
+        if not self.has_image_variants:
+            return ''
+        sources = [f"{self._variant_url(v['file'])} {v['width']}w" for v in self.image_variants['variants']]
+        sources.append(f"{self.image.url} {self.image_variants['width']}w")
+        return ', '.join(sources)
+    
+    @property
+    def image_webp_srcset(self):
+        """srcset en WebP, incluyendo la imagen completa"""
+        if not self.has_image_variants:
+            return ''
+        sources = [f"{self._variant_url(v['webp'])} {v['width']}w" for v in self.image_variants['variants']]
+        sources.append(f"{self._variant_url(self.image_variants['webp'])} {self.image_variants['width']}w")
+        return ', '.join(sources)
     
     def extend_auction_if_needed(self, bid_amount, previous_price):
         """
@@ -132,6 +217,13 @@ class Product(models.Model):
         
         super().save(*args, **kwargs)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Imagen con la que se cargó: solo se generan variantes si cambia
+        instance._loaded_image = instance.__dict__.get('image')
+        return instance
+    
     def __str__(self):
         return self.name
 
@@ -140,6 +232,15 @@ class GuestUser(models.Model):
     session_key = models.CharField(max_length=40, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     last_bid_time = models.DateTimeField(null=True, blank=True)
+    # IP desde la que se unió (reporte de varios invitados desde la misma IP)
+    ip_address = models.CharField(max_length=45, blank=True, null=True, db_index=True)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Nombre con el que se cargó: al renombrar hay que invalidar también el anterior
+        instance._loaded_username = instance.__dict__.get('username')
+        return instance
     
     def __str__(self):
         return self.username
@@ -156,11 +257,15 @@ class ChatMessage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     guest_user = models.ForeignKey(GuestUser, on_delete=models.CASCADE)
     message = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=clock.now, editable=False)
     
     class Meta:
         ordering = ['created_at']
     
+    @property
+    def author_name(self):
+        return self.guest_user.username
+    
     def __str__(self):
         return f"{self.guest_user.username}: {self.message[:50]}"
 
@@ -169,25 +274,31 @@ class Bid(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     guest_user = models.ForeignKey(GuestUser, on_delete=models.CASCADE, null=True, blank=True)
     amount = models.IntegerField()  # Dólares enteros
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Reloj de las subastas (bids/clock.py) y no auto_now_add: con tiempo simulado la puja lleva la hora simulada
+    created_at = models.DateTimeField(default=clock.now, editable=False, db_index=True)
 
     @property
     def amount_formatted(self):
         """Monto de puja formateado con separadores de miles"""
         return f"{self.amount:,}".replace(",", ".")
     
+    @property
+    def bidder_name(self):
+        return self.user.username if self.user else self.guest_user.username
+    
     class Meta:
         ordering = ['-amount', 'created_at']
         # ✅ Índice compuesto para queries de pujas por producto
+        # (id desempata pujas con el mismo created_at en la paginación por cursor)
         indexes = [
-            models.Index(fields=['product', '-created_at'], name='product_bids_idx'),
+            models.Index(fields=['product', '-created_at', '-id'], name='product_bids_idx'),
         ]
     
     @staticmethod
     def get_user_latest_bid(product, guest_user):
         """Obtiene la última puja del usuario en una subasta"""
         return Bid.objects.filter(
-            product=product,
+            product_id=product.id,
             guest_user=guest_user
         ).order_by('-created_at').first()
     
@@ -195,4 +306,126 @@ class Bid(models.Model):
         if self.user:
             return f"{self.user.username} - ${self.amount}"
         else:
-            return f"{self.guest_user.username} - ${self.amount}"
\ No newline at end of file
+            return f"{self.guest_user.username} - ${self.amount}"
+
+
+class ProductStats(models.Model):
+    """
+    Estadísticas de pujas por producto, mantenidas de forma incremental
+    dentro de la misma transacción que registra cada puja (ver SubmitBidView).
+    Leerlas cuesta O(1): nunca se agrega sobre la tabla Bid.
+    """
+    # Constante de tiempo (segundos) del promedio móvil exponencial de pujas por minuto
+    RATE_WINDOW = 60
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    bid_count = models.IntegerField(default=0)
+    unique_bidders = models.IntegerField(default=0)
+    bidders_sketch = models.BinaryField(default=bytes)  # Registros HyperLogLog
+    first_bid_at = models.DateTimeField(null=True, blank=True)
+    last_bid_at = models.DateTimeField(null=True, blank=True)
+    bid_rate = models.FloatField(default=0)  # Pujas/minuto al momento de last_bid_at
+
+    class Meta:
+        verbose_name_plural = 'Product stats'
+
+    def record_bid(self, bidder, now=None):
+        """
+        Registra una puja. NO hace save() - esto lo maneja la tarea record_bid_stats
+        con la fila de estadísticas bloqueada. Las tareas pueden llegar fuera de orden:
+        first/last_bid_at solo se mueven hacia afuera.
+        """
+        now = now or clock.now()
+        self.bid_rate = self.bids_per_minute(now) + 60 / self.RATE_WINDOW
+        self.bid_count += 1
+        if self.first_bid_at is None or now < self.first_bid_at:
+            self.first_bid_at = now
+        if self.last_bid_at is None or now > self.last_bid_at:
+            self.last_bid_at = now
+
+        sketch = HyperLogLog(self.bidders_sketch)
+        if sketch.add(bidder):
+            self.bidders_sketch = sketch.to_bytes()
+            self.unique_bidders = sketch.count()
+
+    def bids_per_minute(self, now=None):
+        """Tasa de pujas por minuto, decaída exponencialmente hasta `now`"""
+        if self.last_bid_at is None:
+            return 0.0
+        now = now or clock.now()
+        elapsed = max((now - self.last_bid_at).total_seconds(), 0)
+        return self.bid_rate * math.exp(-elapsed / self.RATE_WINDOW)
+
+    def as_dict(self, now=None, compact=False):
+        """compact=True: fechas como epoch en milisegundos (respuestas msgpack)"""
+        if compact:
+            first_bid_at, last_bid_at = epoch_ms(self.first_bid_at), epoch_ms(self.last_bid_at)
+        else:
+            first_bid_at = self.first_bid_at.isoformat() if self.first_bid_at else None
+            last_bid_at = self.last_bid_at.isoformat() if self.last_bid_at else None
+        return {
+            'bid_count': self.bid_count,
+            'unique_bidders': self.unique_bidders,
+            'first_bid_at': first_bid_at,
+            'last_bid_at': last_bid_at,
+            'bids_per_minute': round(self.bids_per_minute(now), 2),
+        }
+
+    def __str__(self):
+        return f"{self.product_id}: {self.bid_count} pujas"
+
+
+class ArchivedBid(models.Model):
+    """
+    Copia compacta de una puja de una subasta finalizada hace tiempo.
+    Conserva el id original (para que los cursores del historial sigan siendo válidos)
+    y desnormaliza el nombre del pujador para no depender de GuestUser/User.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    bidder_name = models.CharField(max_length=150)
+    amount = models.IntegerField()
+    created_at = models.DateTimeField()
+
+    @property
+    def amount_formatted(self):
+        """Monto de puja formateado con separadores de miles"""
+        return f"{self.amount:,}".replace(",", ".")
+
+    class Meta:
+        ordering = ['-amount', 'created_at']
+        indexes = [
+            models.Index(fields=['product', '-created_at', '-id'], name='archived_bids_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.bidder_name} - ${self.amount}"
+
+
+class ArchivedChatMessage(models.Model):
+    """Copia compacta de un mensaje de chat de una subasta archivada"""
+    id = models.BigIntegerField(primary_key=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    author_name = models.CharField(max_length=100)
+    message = models.TextField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['product', '-created_at'], name='archived_chat_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.author_name}: {self.message[:50]}"
+
+
+class InvalidationEvent(models.Model):
+    """Mensaje del bus de invalidación cuando INVALIDATION_BUS = 'table' (ver bids/bus.py)"""
+    topic = models.CharField(max_length=32)
+    key = models.CharField(max_length=100)  # JSON
+    origin = models.CharField(max_length=32)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.topic}:{self.key}"
@@ -0,0 +1,59 @@
+import base64
+import datetime
+
+from django.db.models import Q
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class InvalidCursor(ValueError):
+    """El cursor recibido no es válido o fue manipulado"""
+
+
+def encode_cursor(created_at, pk):
+    """
+    Codifica la posición (created_at, id) como un token opaco.
+    Se usan microsegundos desde epoch para que el cursor sea estable
+    sin importar la zona horaria del servidor.
+    """
+    micros = (created_at - EPOCH) // datetime.timedelta(microseconds=1)
+    raw = f"{micros}:{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decodifica un cursor y devuelve la tupla (created_at, id)"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        micros, pk = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+        created_at = EPOCH + datetime.timedelta(microseconds=int(micros))
+        return created_at, int(pk)
+    except (ValueError, UnicodeDecodeError, OverflowError):
+        raise InvalidCursor(token)
+
+
+def keyset_page(queryset, cursor=None, limit=20):
+    """
+    Devuelve una página ordenada por (-created_at, -id) usando keyset pagination
+    (pujas o productos: ambos modelos tienen created_at).
+    A diferencia de OFFSET, el costo no crece con la profundidad de la página:
+    la condición sobre (created_at, id) se resuelve con un índice del modelo
+    (product_bids_idx en Bid, product_created_idx en Product).
+
+    Retorna (items, next_cursor). next_cursor es None si no hay más resultados.
+    """
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    # Pedimos uno extra para saber si existe una página siguiente
+    items = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return items, next_cursor
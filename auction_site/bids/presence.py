@@ -0,0 +1,142 @@
+"""
+Espectadores por subasta (presencia) con memoria acotada.
+
+Cada poll (estado, chat) o visita a product_detail marca al visitante en un
+HyperLogLog del intervalo de tiempo actual (PRESENCE_BUCKET segundos). Los
+espectadores son la unión de los intervalos dentro de PRESENCE_WINDOW: ~1 KB por
+intervalo y producto, sean 10 o 50.000 visitantes.
+
+Cada worker acumula en memoria y cada PRESENCE_FLUSH_INTERVAL segundos une su
+sketch con el del caché compartido (Redis con REDIS_URL), así el conteo incluye
+a los visitantes de todos los workers. Nada se escribe en la base de datos.
+"""
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .hll import HyperLogLog
+
+BUCKET_KEY = 'presence:{}:{}'
+# Segundos que se reutiliza un conteo ya calculado
+COUNT_TTL = 1.0
+# Productos con sketch en memoria por worker (ids inventados no hacen crecer la memoria)
+MAX_PRODUCTS = 1024
+
+
+class _Pending:
+    __slots__ = ('bucket', 'sketch', 'flushed_at')
+
+    def __init__(self, bucket, now):
+        self.bucket = bucket
+        self.sketch = HyperLogLog()
+        self.flushed_at = now
+
+
+class PresenceTracker:
+    def __init__(self, window, bucket, flush_interval):
+        self.bucket = bucket
+        self.buckets_in_window = max(int(window // bucket), 1)
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = {}  # product_id -> _Pending del intervalo actual
+        self._counts = {}  # product_id -> (expira, conteo)
+
+    def touch(self, product_id, viewer, now=None):
+        """Marca a `viewer` como presente en la subasta"""
+        now = time.time() if now is None else now
+        bucket = int(now // self.bucket)
+        flush = []
+        with self._lock:
+            entry = self._pending.get(product_id)
+            if entry is None or entry.bucket != bucket:
+                if entry is not None:
+                    flush.append(entry)  # Cierra el intervalo anterior
+                elif len(self._pending) >= MAX_PRODUCTS and not self._purge(bucket):
+                    return
+                entry = _Pending(bucket, now)
+                self._pending[product_id] = entry
+            entry.sketch.add(viewer)
+            if now - entry.flushed_at >= self.flush_interval:
+                entry.flushed_at = now
+                flush.append(entry)
+        for pending in flush:
+            self._flush(product_id, pending)
+
+    def count(self, product_id, now=None):
+        """Espectadores distintos en la ventana (estimación, error ~3%)"""
+        now = time.time() if now is None else now
+        cached = self._counts.get(product_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        bucket = int(now // self.bucket)
+        first = bucket - self.buckets_in_window + 1
+        keys = [BUCKET_KEY.format(product_id, b) for b in range(first, bucket + 1)]
+        total = HyperLogLog()
+        for registers in cache.get_many(keys).values():
+            total.merge(HyperLogLog(registers))
+        entry = self._pending.get(product_id)
+        if entry is not None and entry.bucket >= first:
+            total.merge(entry.sketch)
+
+        result = total.count()
+        if len(self._counts) >= MAX_PRODUCTS:
+            self._counts.clear()
+        self._counts[product_id] = (now + COUNT_TTL, result)
+        return result
+
+    def _flush(self, product_id, entry):
+        """
+        Une el sketch local con el compartido. Se sube el sketch completo del intervalo
+        (no solo lo nuevo): si dos workers escriben a la vez y se pierde una unión,
+        el siguiente flush la repone.
+        """
+        key = BUCKET_KEY.format(product_id, entry.bucket)
+        sketch = HyperLogLog(entry.sketch.to_bytes())
+        stored = cache.get(key)
+        if stored:
+            sketch.merge(HyperLogLog(stored))
+        cache.set(key, sketch.to_bytes(), timeout=(self.buckets_in_window + 1) * self.bucket)
+
+    def _purge(self, bucket):
+        """Descarta los sketches que quedaron fuera de la ventana. Devuelve si liberó espacio"""
+        first = bucket - self.buckets_in_window + 1
+        expired = [pid for pid, entry in self._pending.items() if entry.bucket < first]
+        for product_id in expired:
+            del self._pending[product_id]
+        return bool(expired)
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._counts.clear()
+
+
+presence = PresenceTracker(
+    window=settings.PRESENCE_WINDOW,
+    bucket=settings.PRESENCE_BUCKET,
+    flush_interval=settings.PRESENCE_FLUSH_INTERVAL,
+)
+
+
+def viewer_id(request):
+    """Identifica al visitante por su cookie de sesión; sin sesión, por IP + navegador"""
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session_key:
+        return session_key
+    return '{}|{}'.format(request.META.get('REMOTE_ADDR', ''), request.META.get('HTTP_USER_AGENT', ''))
+
+
+def track_presence(view):
+    """
+    Cuenta al visitante en cada poll del producto y en product_detail. Va por fuera de @coalesce:
+    las peticiones que reutilizan la respuesta de otra también son espectadores.
+    """
+    @wraps(view)
+    def wrapper(request, product_id, *args, **kwargs):
+        presence.touch(product_id, viewer_id(request))
+        return view(request, product_id, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,123 @@
+"""
+Limpieza periódica de datos que solo crecen: sesiones expiradas, invitados
+inactivos sin pujas y chat viejo.
+
+Todo se borra en lotes por tramos de clave primaria: se leen hasta batch_size
+claves a partir de la última borrada (keyset, sin OFFSET ni volver a recorrer
+lo ya revisado) y se borra el rango [primera, última] con el mismo filtro en
+una transacción corta. Entre lotes se hace una pausa para que las pujas en
+curso tomen los bloqueos sin esperar.
+"""
+import datetime
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import DatabaseError
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .db import write_transaction
+from .models import ArchivedBid, ArchivedChatMessage, Bid, ChatMessage, GuestUser
+
+DB_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def delete_in_batches(queryset, batch_size, pause=0.0):
+    """
+    Borra las filas de `queryset` por rangos de clave primaria.
+    Devuelve {'deleted', 'batches', 'errors', 'seconds', 'rows_per_second'}.
+    """
+    label = queryset.model._meta.label
+    started = time.monotonic()
+    deleted = batches = errors = 0
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        keys = list(page.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not keys:
+            break
+        try:
+            with write_transaction():
+                # Se vuelve a aplicar el filtro: una fila que dejó de cumplirlo entre la lectura y el borrado se queda
+                _, per_model = queryset.filter(pk__gte=keys[0], pk__lte=keys[-1]).delete()
+            deleted += per_model.get(label, 0)
+        except DatabaseError:
+            # Conflicto con una escritura en vivo (p. ej. un invitado que pujó justo ahora): se salta el tramo
+            errors += 1
+        batches += 1
+        last = keys[-1]
+        if len(keys) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    seconds = time.monotonic() - started
+    return {
+        'deleted': deleted,
+        'batches': batches,
+        'errors': errors,
+        'seconds': round(seconds, 2),
+        'rows_per_second': round(deleted / seconds) if seconds else deleted,
+    }
+
+
+def db_sessions_enabled():
+    return settings.SESSION_ENGINE in DB_SESSION_ENGINES
+
+
+def expired_sessions(now):
+    return Session.objects.filter(expire_date__lt=now)
+
+
+def idle_guests(now, days):
+    """
+    Invitados creados hace más de `days` días que nunca pujaron ni escribieron en
+    el chat y cuya sesión ya no existe (no pueden estar en una subasta en vivo).
+    El archivo guarda solo el nombre: se busca por username, así no se borra a
+    ganadores de subastas archivadas (ni se libera su nombre)
+    """
+    guests = GuestUser.objects.filter(
+        created_at__lt=now - datetime.timedelta(days=days),
+        last_bid_time__isnull=True,
+    ).filter(
+        ~Exists(Bid.objects.filter(guest_user=OuterRef('pk'))),
+        ~Exists(ChatMessage.objects.filter(guest_user=OuterRef('pk'))),
+        ~Exists(ArchivedBid.objects.filter(bidder_name=OuterRef('username'))),
+        ~Exists(ArchivedChatMessage.objects.filter(author_name=OuterRef('username'))),
+    )
+    if db_sessions_enabled():
+        guests = guests.filter(~Exists(Session.objects.filter(
+            session_key=OuterRef('session_key'), expire_date__gte=now,
+        )))
+    return guests
+
+
+def prune_data(batch_size=None, pause=None, guest_days=None, chat_days=None):
+    """
+    Punto de entrada del comando prune_data y del job periódico.
+    Primero las sesiones: así los invitados de sesiones vencidas pasan a ser borrables.
+    """
+    if batch_size is None:
+        batch_size = settings.RETENTION_BATCH_SIZE
+    if pause is None:
+        pause = settings.RETENTION_PAUSE
+    if guest_days is None:
+        guest_days = settings.GUEST_RETENTION_DAYS
+    if chat_days is None:
+        chat_days = settings.CHAT_RETENTION_DAYS
+    now = timezone.now()
+    chat_cutoff = now - datetime.timedelta(days=chat_days)
+
+    summary = {}
+    if db_sessions_enabled():
+        summary['sessions'] = delete_in_batches(expired_sessions(now), batch_size, pause)
+    summary['chat'] = delete_in_batches(ChatMessage.objects.filter(created_at__lt=chat_cutoff), batch_size, pause)
+    summary['archived_chat'] = delete_in_batches(
+        ArchivedChatMessage.objects.filter(created_at__lt=chat_cutoff), batch_size, pause,
+    )
+    summary['guests'] = delete_in_batches(idle_guests(now, guest_days), batch_size, pause)
+    return summary
@@ -0,0 +1,89 @@
+"""
+Búsqueda de texto completo sobre Product.name y description.
+
+- SQLite: tabla FTS5 bids_product_fts (contenido externo) mantenida por triggers.
+- PostgreSQL: índice GIN product_search_idx sobre to_tsvector('spanish', ...).
+- Otros motores, o SQLite sin FTS5: icontains por palabra (sin índice).
+
+El índice lo crea la migración 0017 y se mantiene solo al guardar productos,
+también con bulk_create. Ojo: en SQLite, una migración que reconstruya la tabla
+bids_product borra los triggers; hay que volver a crearlos en esa migración.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'bids_product_fts'
+# Debe coincidir con la expresión del índice product_search_idx
+POSTGRES_DOCUMENT = "to_tsvector('spanish', coalesce(name, '') || ' ' || coalesce(description, ''))"
+
+# Palabras que se toman de la consulta (el resto de caracteres se ignora)
+MAX_TERMS = 8
+
+_fts_available = None
+
+
+def search_terms(text):
+    return re.findall(r'\w+', text or '')[:MAX_TERMS]
+
+
+def _sqlite_fts_available():
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available
+
+
+def search_products(queryset, text):
+    """Filtra el queryset por las palabras de `text` (todas deben aparecer)"""
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+
+    vendor = connection.vendor
+    if vendor == 'sqlite' and _sqlite_fts_available():
+        # Cada palabra entre comillas (sin sintaxis FTS del usuario) y como prefijo: "cam"* → cámara
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match],
+        ))
+    if vendor == 'postgresql':
+        return queryset.filter(RawSQL(
+            f"{POSTGRES_DOCUMENT} @@ plainto_tsquery('spanish', %s)", [' '.join(terms)],
+            output_field=BooleanField(),
+        ))
+
+    for term in terms:
+        queryset = queryset.filter(Q(name__icontains=term) | Q(description__icontains=term))
+    return queryset
+
+
+def filter_by_status(queryset, status, now):
+    """Mismos filtros que la página principal (usan active_auctions_idx / finished_auctions_idx)"""
+    if status == 'ongoing':
+        return queryset.filter(start_time__lte=now, end_time__gte=now, is_active=True)
+    if status == 'upcoming':
+        return queryset.filter(start_time__gt=now, is_active=True)
+    if status == 'finished':
+        return queryset.filter(end_time__lt=now)
+    raise ValueError(status)
+
+
+def filter_by_price(queryset, min_price, max_price, now):
+    """
+    Rango sobre current_price. En las subastas silenciosas en curso el precio actual
+    es secreto: se filtra por starting_price para que el filtro no lo revele.
+    """
+    hidden = Q(is_silent_auction=True, start_time__lte=now, end_time__gte=now)
+    visible_range, hidden_range = Q(), Q()
+    if min_price is not None:
+        visible_range &= Q(current_price__gte=min_price)
+        hidden_range &= Q(starting_price__gte=min_price)
+    if max_price is not None:
+        visible_range &= Q(current_price__lte=max_price)
+        hidden_range &= Q(starting_price__lte=max_price)
+    if not visible_range:
+        return queryset
+    return queryset.filter((~hidden & visible_range) | (hidden & hidden_range))
@@ -0,0 +1,76 @@
+"""
+Señales de modelos.
+
+Tras cada commit se publica en el bus de invalidación (bids/bus.py) un mensaje
+(topic, clave) para que cada worker descarte lo que tenga cacheado:
+
+- 'product' (id): estado en memoria de la subasta (bids/state.py).
+- 'banned_ip' (ip): caché de IPs baneadas del middleware.
+- 'guest' (username): caché de invitados por nombre.
+
+Las pujas nuevas no publican nada propio: ya actualizan el producto. Sí lo
+hacen las ediciones de pujas existentes (admin). Los borrados de pujas llegan
+por los hooks del admin y por el archivado; un receptor post_delete obligaría
+a Django a cargar cada fila en los borrados por lotes.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .bus import bus
+from .models import BannedIP, Bid, GuestUser, Product
+from .state import product_changed, product_deleted
+from .variants import schedule_variants
+from .warmup import LIVE_FIELDS, forget_detail
+
+
+def publish_on_commit(topic, key):
+    transaction.on_commit(lambda: bus.publish(topic, key))
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Genera las variantes si cambió la imagen y refresca el estado en memoria tras el commit"""
+    if raw:
+        return
+    if update_fields is None or 'image' in update_fields:
+        image_name = instance.image.name
+        if created or image_name != getattr(instance, '_loaded_image', None):
+            instance._loaded_image = image_name
+            transaction.on_commit(lambda: schedule_variants(instance))
+    if update_fields is None or not set(update_fields) <= set(LIVE_FIELDS):
+        # Edición fuera de una puja: el producto cacheado para product_detail queda viejo
+        transaction.on_commit(lambda: forget_detail(instance.id))
+    transaction.on_commit(lambda: product_changed(instance))
+
+
+@receiver(post_delete, sender=Product)
+def product_removed(sender, instance, **kwargs):
+    product_id = instance.id
+    transaction.on_commit(lambda: product_deleted(product_id))
+    transaction.on_commit(lambda: forget_detail(product_id))
+
+
+@receiver(post_save, sender=Bid)
+def bid_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    publish_on_commit('product', instance.product_id)
+
+
+@receiver(post_save, sender=BannedIP)
+@receiver(post_delete, sender=BannedIP)
+def banned_ip_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        publish_on_commit('banned_ip', instance.ip_address)
+
+
+@receiver(post_save, sender=GuestUser)
+@receiver(post_delete, sender=GuestUser)
+def guest_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    publish_on_commit('guest', instance.username)
+    loaded_username = getattr(instance, '_loaded_username', None)
+    if loaded_username and loaded_username != instance.username:
+        publish_on_commit('guest', loaded_username)
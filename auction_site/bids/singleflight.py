@@ -0,0 +1,194 @@
+"""
+Coalescencia de lecturas idénticas concurrentes ("single-flight").
+
+Cuando entra una puja en un lote popular, cientos de clientes vuelven a pedir
+el mismo endpoint casi a la vez. Con single-flight, solo la primera petición
+(el "líder") ejecuta la vista; las que llegan mientras tanto (o dentro de una
+ventana de frescura muy corta) esperan y reutilizan los mismos bytes.
+
+La clave es (vista, product_id, query string, formato negociado, clase de visibilidad). Las respuestas que
+dependen del usuario (subastas silenciosas en curso) se marcan con
+`mark_private(response)` y no se comparten.
+"""
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from . import metrics
+from .encoding import negotiate
+
+# Cuánto tiempo se recuerda que un (vista, producto) responde distinto a cada usuario
+PRIVATE_SCOPE_TTL = 5.0
+# A partir de este tamaño se purgan las entradas viejas
+MAX_ENTRIES = 4096
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error', 'finished_at')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+
+class SingleFlight:
+    def __init__(self, freshness):
+        self.freshness = freshness
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, compute):
+        """
+        Ejecuta compute() una sola vez para todas las llamadas concurrentes con la misma clave.
+        Devuelve (resultado, compartido) donde compartido indica si se reutilizó otra ejecución.
+        """
+        now = time.monotonic()
+        with self._lock:
+            call = self._calls.get(key)
+            fresh = call is not None and (
+                call.finished_at is None or now - call.finished_at <= self.freshness
+            )
+            if not fresh:
+                if len(self._calls) >= MAX_ENTRIES:
+                    self._purge(now)
+                call = _Call()
+                self._calls[key] = call
+        if fresh:
+            call.event.wait()
+        else:
+            try:
+                call.result = compute()
+            except BaseException as e:
+                call.error = e
+                # Un error no se reutiliza fuera de las peticiones que ya estaban esperando
+                with self._lock:
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+            finally:
+                call.finished_at = time.monotonic()
+                call.event.set()
+        if call.error is not None:
+            raise call.error
+        return call.result, fresh
+
+    def _purge(self, now):
+        expired = [
+            key for key, call in self._calls.items()
+            if call.finished_at is not None and now - call.finished_at > self.freshness
+        ]
+        for key in expired:
+            del self._calls[key]
+
+    def clear(self):
+        """Descarta las respuestas recordadas (las llamadas en curso terminan igual)"""
+        with self._lock:
+            self._calls.clear()
+
+
+_flight = SingleFlight(settings.SINGLE_FLIGHT_FRESHNESS)
+_private_scopes = {}  # (vista, product_id) -> instante hasta el que se considera privado
+_private_lock = threading.Lock()
+
+
+def clear():
+    """Olvida respuestas compartidas y vistas privadas (p. ej. entre tests)"""
+    _flight.clear()
+    with _private_lock:
+        _private_scopes.clear()
+
+
+def mark_private(response):
+    """Indica que la respuesta depende del usuario y no debe compartirse"""
+    response.coalesce_private = True
+    return response
+
+
+def _freeze(response):
+    return (
+        response.status_code,
+        response.content,
+        list(response.items()),
+        getattr(response, 'coalesce_private', False),
+    )
+
+
+def _thaw(frozen):
+    status, content, headers, private = frozen
+    response = HttpResponse(content, status=status)
+    for header, value in headers:
+        response[header] = value
+    if private:
+        # Lo usa también el control de admisión para no guardar copias por usuario
+        mark_private(response)
+    return response
+
+
+def _is_private(scope_key):
+    with _private_lock:
+        until = _private_scopes.get(scope_key)
+        if until is None:
+            return False
+        if until < time.monotonic():
+            del _private_scopes[scope_key]
+            return False
+        return True
+
+
+def _remember_private(scope_key):
+    with _private_lock:
+        if len(_private_scopes) >= MAX_ENTRIES:
+            _private_scopes.clear()
+        _private_scopes[scope_key] = time.monotonic() + PRIVATE_SCOPE_TTL
+
+
+def coalesce(view_name):
+    """Decorador para vistas GET de solo lectura que reciben product_id"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, product_id, *args, **kwargs):
+            scope_key = (view_name, product_id)
+
+            def compute():
+                return _freeze(view(request, product_id, *args, **kwargs))
+
+            if _is_private(scope_key):
+                # Respuesta por usuario: solo se agrupan las peticiones del mismo usuario
+                visibility = f"user:{request.session.get('username', '')}"
+            else:
+                visibility = 'public'
+
+            key = (view_name, product_id, request.GET.urlencode(), negotiate(request), visibility)
+            frozen, shared = _flight.do(key, compute)
+            private = frozen[3]
+            if private and visibility == 'public':
+                _remember_private(scope_key)
+                if shared:
+                    # Recibimos la respuesta de otro usuario: calcular la propia
+                    frozen, shared = compute(), False
+
+            metrics.incr(f'singleflight.{view_name}.requests')
+            if shared:
+                metrics.incr(f'singleflight.{view_name}.coalesced')
+            return _thaw(frozen)
+        return wrapper
+    return decorator
+
+
+def coalescing_report(counters):
+    """Proporción de peticiones que reutilizaron otra ejecución, por vista"""
+    report = {}
+    for name, requests in counters.items():
+        if name.startswith('singleflight.') and name.endswith('.requests'):
+            view_name = name[len('singleflight.'):-len('.requests')]
+            coalesced = counters.get(f'singleflight.{view_name}.coalesced', 0)
+            report[view_name] = {
+                'requests': requests,
+                'coalesced': coalesced,
+                'ratio': round(coalesced / requests, 3) if requests else 0.0,
+            }
+    return report
@@ -0,0 +1,59 @@
+"""
+Arranque en frío de los workers (STARTUP_PREWARM, activo en auction_site.settings_api).
+
+Lo que pagaría la primera petición se hace al cargar la aplicación, antes de que
+el balanceador le mande tráfico:
+
+- Rutas: reverse() compila todas las expresiones del URLconf.
+- Base de datos: abre la conexión (persistente con CONN_MAX_AGE).
+- Caché: abre la conexión a Redis si REDIS_URL está configurado.
+
+Con gunicorn --preload la aplicación se carga en el proceso padre: antes de cada
+fork se cierra la conexión y cada worker abre la suya al nacer. Con ASGI las
+vistas corren en otro hilo y abren su propia conexión: ahí se aprovechan las rutas y el caché.
+"""
+import logging
+import os
+import time
+
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+_registered = False
+
+
+def connect_databases():
+    for conn in connections.all():
+        try:
+            conn.ensure_connection()
+        except DatabaseError:
+            # La primera petición vuelve a intentarlo
+            logger.warning('No se pudo precalentar la conexión %r', conn.alias, exc_info=True)
+
+
+def prewarm():
+    """Devuelve los milisegundos de cada paso"""
+    global _registered
+    timings = {}
+
+    started = time.perf_counter()
+    reverse('get_products_status')
+    timings['urls'] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    connect_databases()
+    timings['database'] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    cache.get('startup:prewarm')
+    timings['cache'] = (time.perf_counter() - started) * 1000
+
+    if not _registered and hasattr(os, 'register_at_fork'):
+        os.register_at_fork(before=connections.close_all, after_in_child=connect_databases)
+        _registered = True
+
+    logger.info('Worker precalentado: %s', ', '.join(f'{step} {ms:.1f} ms' for step, ms in timings.items()))
+    return timings
@@ -0,0 +1,164 @@
+"""
+Read model en memoria del estado de las subastas.
+
+Los endpoints de polling solo necesitan saber si la subasta está en curso,
+su precio, su end_time y si es silenciosa. En lugar de cargar Product desde la
+base de datos en cada petición, se consulta AuctionStateStore:
+
+- Se precarga con las subastas activas y programadas en el primer uso.
+- Se actualiza en los caminos de escritura (pujas, extensiones anti-sniping, admin)
+  cuando la transacción confirma (ver bids/signals.py), sin volver a la base.
+- Los demás procesos se enteran por el bus de invalidación y recargan la entrada.
+- Cada entrada vence tras AUCTION_STATE_TTL segundos. Con INVALIDATION_BUS='local'
+  y varios workers es la única forma en que un worker ve los cambios de otro.
+"""
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Optional
+
+from django.conf import settings
+
+from . import clock
+from . import metrics
+from .bus import bus
+from .models import AuctionTimingMixin, Product, ProductStats
+
+
+@dataclass
+class AuctionState(AuctionTimingMixin):
+    id: int
+    start_time: object
+    end_time: object
+    is_active: bool
+    is_silent_auction: bool
+    anti_sniping_active: bool
+    current_price: int
+    starting_price: int
+    archived_at: object = None
+    stats: Optional[ProductStats] = None
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_product(cls, product, stats=None, load_stats=True):
+        if stats is None and load_stats:
+            try:
+                stats = product.stats
+            except ProductStats.DoesNotExist:
+                stats = None
+        return cls(
+            id=product.id,
+            start_time=product.start_time,
+            end_time=product.end_time,
+            is_active=product.is_active,
+            is_silent_auction=product.is_silent_auction,
+            anti_sniping_active=product.anti_sniping_active,
+            current_price=product.current_price,
+            starting_price=product.starting_price,
+            archived_at=product.archived_at,
+            stats=stats,
+        )
+
+    def get_stats(self):
+        return self.stats if self.stats is not None else ProductStats(product_id=self.id)
+
+
+class AuctionStateStore:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._states = {}
+        self._lock = threading.Lock()
+        self._warmed = False
+
+    def _queryset(self):
+        return Product.objects.select_related('stats').defer('description', 'image', 'image_variants')
+
+    def warm(self):
+        """Carga las subastas en curso y programadas (índice active_auctions_idx)"""
+        with self._lock:
+            if self._warmed:
+                return
+            products = self._queryset().filter(is_active=True, end_time__gte=clock.now())
+            for product in products:
+                self._states[product.id] = AuctionState.from_product(product)
+            self._warmed = True
+
+    def get(self, product_id):
+        """Estado de la subasta o None si el producto no existe"""
+        if not self._warmed:
+            bus.start()
+            self.warm()
+        state = self._states.get(product_id)
+        if state is not None and time.monotonic() - state.loaded_at <= self.ttl:
+            metrics.incr('state.hit')
+            return state
+
+        metrics.incr('state.miss')
+        product = self._queryset().filter(id=product_id).first()
+        if product is None:
+            self._states.pop(product_id, None)
+            return None
+        state = AuctionState.from_product(product)
+        self._states[product_id] = state
+        return state
+
+    def get_many(self, product_ids):
+        """{id: estado} de los que existen; los que faltan o vencieron se cargan en una sola query"""
+        if not self._warmed:
+            bus.start()
+            self.warm()
+        now = time.monotonic()
+        states, missing = {}, []
+        for product_id in product_ids:
+            state = self._states.get(product_id)
+            if state is not None and now - state.loaded_at <= self.ttl:
+                states[product_id] = state
+            else:
+                missing.append(product_id)
+        metrics.incr('state.hit', len(states))
+        if missing:
+            metrics.incr('state.miss', len(missing))
+            for product in self._queryset().filter(id__in=missing):
+                state = AuctionState.from_product(product)
+                self._states[product.id] = state
+                states[product.id] = state
+        return states
+
+    def update(self, product):
+        """Actualiza el estado desde una instancia de Product ya confirmada en la BD"""
+        previous = self._states.get(product.id)
+        if previous is None:
+            # No estaba cargado: se cargará completo en el próximo get
+            return
+        # Las estadísticas siguen las de antes: las actualiza record_bid_stats (update_stats)
+        self._states[product.id] = AuctionState.from_product(product, stats=previous.stats, load_stats=False)
+
+    def update_stats(self, product_id, stats):
+        state = self._states.get(product_id)
+        if state is not None:
+            self._states[product_id] = replace(state, stats=stats, loaded_at=state.loaded_at)
+
+    def evict(self, product_id):
+        self._states.pop(product_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+            self._warmed = False
+
+
+state_store = AuctionStateStore(settings.AUCTION_STATE_TTL)
+bus.subscribe('product', state_store.evict)
+# Ediciones del admin (pujas borradas, precio corregido): recargar también las estadísticas
+bus.subscribe('finished', state_store.evict)
+
+
+def product_changed(product):
+    """Actualiza el estado local y avisa a los demás procesos. Llamar tras el commit"""
+    state_store.update(product)
+    # Sin despachar aquí: el suscriptor local (evict) borraría la entrada recién actualizada
+    bus.publish('product', product.id, local=False)
+
+
+def product_deleted(product_id):
+    bus.publish('product', product_id)
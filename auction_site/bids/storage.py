@@ -0,0 +1,66 @@
+"""
+Archivos estáticos con el hash del contenido en el nombre y precomprimidos.
+
+collectstatic (ManifestStaticFilesStorage) copia cada archivo a STATIC_ROOT como
+product_detail.3f2a9c1b8e4d.js: un cambio cambia la URL, así que se sirven con
+caché de un año (bids/assets.py). Junto a cada archivo con hash deja su versión
+.gz y, si el paquete brotli está instalado (es opcional), .br.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.svg', '.json', '.map', '.txt', '.html')
+# Por debajo de esto la versión comprimida no ahorra nada
+MIN_COMPRESS_SIZE = 256
+
+
+def compressed_variants(content):
+    """[(sufijo, bytes)] que valen la pena para `content`"""
+    variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(content, quality=11)))
+    # Solo si ahorra al menos un 5 %
+    return [(suffix, data) for suffix, data in variants if len(data) < len(content) * 0.95]
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._hashed_names = None
+
+    def stored_name(self, name):
+        # Sin collectstatic (desarrollo, tests) no hay manifiesto: el nombre sin hash,
+        # que sirven los finders
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def is_hashed(self, name):
+        """True si `name` es un archivo con hash del manifiesto (se puede cachear para siempre)"""
+        if self._hashed_names is None:
+            self._hashed_names = frozenset(self.hashed_files.values())
+        return name in self._hashed_names
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        self._hashed_names = None
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS) or not self.exists(name):
+                continue
+            with self.open(name) as source:
+                content = source.read()
+            if len(content) < MIN_COMPRESS_SIZE:
+                continue
+            # Se escriben directo: con save() un .gz previo del mismo archivo cambiaría de nombre
+            for suffix, data in compressed_variants(content):
+                path = self.path(name + suffix)
+                with open(path, 'wb') as output:
+                    output.write(data)
@@ -0,0 +1,131 @@
+"""
+Cola de tareas en segundo plano, en memoria del proceso.
+
+Para el trabajo que sigue a una puja y no tiene por qué hacerse con la fila
+del producto bloqueada (estadísticas, avisos al bus, notificaciones). Se encola
+con `submit_on_commit` para que solo corra si la transacción confirmó.
+
+- Acotada: como mucho TASK_QUEUE_MAX_SIZE tareas pendientes.
+- Contrapresión: si está llena, submit espera un momento y, si sigue llena,
+  ejecuta la tarea en el hilo que la encoló (la petición se frena en lugar de
+  perder trabajo).
+- Reintentos: hasta TASK_QUEUE_MAX_RETRIES con espera exponencial.
+- Al terminar el proceso (atexit) deja de aceptar tareas y vacía la cola.
+
+Con TASK_QUEUE_WORKERS = 0 las tareas se ejecutan en el momento (útil en tests).
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Cuánto espera submit a que se libere lugar antes de ejecutar la tarea en el hilo actual
+PUT_TIMEOUT = 0.5
+# Tiempo máximo para vaciar la cola al apagar el proceso
+DRAIN_TIMEOUT = 10.0
+
+_STOP = object()
+
+
+class TaskQueue:
+    def __init__(self, workers, max_size, max_retries, retry_delay):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue(maxsize=max_size)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _start(self):
+        with self._lock:
+            if self._threads or self._closed:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'tasks-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, func, *args, **kwargs):
+        """Encola func(*args, **kwargs). Devuelve False si se ejecutó en el hilo actual"""
+        metrics.incr('tasks.submitted')
+        if self.workers == 0 or self._closed:
+            self._run(func, args, kwargs)
+            return False
+        if not self._threads:
+            self._start()
+        try:
+            self._queue.put((func, args, kwargs, time.monotonic()), timeout=PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            metrics.incr('tasks.inline')
+            logger.warning('Cola de tareas llena, ejecutando %s en el hilo actual', func.__name__)
+            self._run(func, args, kwargs)
+            return False
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                func, args, kwargs, queued_at = item
+                metrics.observe('tasks.wait_ms', (time.monotonic() - queued_at) * 1000)
+                close_old_connections()
+                self._run(func, args, kwargs)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, func, args, kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                func(*args, **kwargs)
+                metrics.incr('tasks.completed')
+                return
+            except Exception:
+                if attempt == self.max_retries:
+                    metrics.incr('tasks.failed')
+                    logger.exception('La tarea %s falló tras %s intentos', func.__name__, attempt + 1)
+                    return
+                metrics.incr('tasks.retried')
+                time.sleep(self.retry_delay * 2 ** attempt)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def drain(self, timeout=DRAIN_TIMEOUT):
+        """Deja de aceptar tareas y espera a que terminen las pendientes"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put(_STOP)
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        if self._queue.qsize():
+            logger.warning('Se apagó con %s tareas sin ejecutar', self._queue.qsize())
+
+
+task_queue = TaskQueue(
+    workers=settings.TASK_QUEUE_WORKERS,
+    max_size=settings.TASK_QUEUE_MAX_SIZE,
+    max_retries=settings.TASK_QUEUE_MAX_RETRIES,
+    retry_delay=settings.TASK_QUEUE_RETRY_DELAY,
+)
+atexit.register(task_queue.drain)
+
+
+def submit_on_commit(func, *args, **kwargs):
+    """Encola la tarea cuando la transacción actual confirma (o ya, si no hay transacción)"""
+    transaction.on_commit(lambda: task_queue.submit(func, *args, **kwargs))
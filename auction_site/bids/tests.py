@@ -1,3 +1,700 @@
-from django.test import TestCase
+"""
+Regresiones de rendimiento y concurrencia.
 
-# Create your tests here.
+- Presupuesto de consultas por endpoint (assertNumQueries) para subastas normales,
+  silenciosas, programadas y finalizadas. Los conteos son el contrato: un N+1 en
+  get_bids_data o una lectura de más en SubmitBidView hace fallar el test.
+- Carreras de pujas con hilos: precio monótono, ninguna puja ni estadística perdida
+  y extensiones anti-sniping bajo pujas simultáneas.
+- Ciclo de vida completo de una subasta con el reloj simulado (bids/clock.py).
+- La traza de TrafficCaptureMiddleware no guarda nombres, mensajes ni sesiones.
+- JavaScript de product_detail como estático con hash y precomprimido; JSON grande con gzip.
+- El perfil auction_site.settings_api arranca sin numpy, Pillow, admin ni channels.
+- Las variantes de imagen se encolan solo al crear el producto o cambiar su imagen.
+- La limpieza de datos no borra invitados cuyas pujas ya están en el archivo.
+- product_detail toma del estado en memoria todo lo que cambia sin editar el catálogo.
+- Espectadores: cuentan las visitas a product_detail y vencen con la ventana.
+- Cada worker creado por fork (gunicorn --preload) tiene su propio origen en el bus.
+
+Corren en SQLite (base de test en archivo, ver settings) y en PostgreSQL con DATABASE_URL.
+"""
+import datetime
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import bus, clock, search, singleflight
+from .archive import archive_product
+from .middleware import LoadMonitor, banned_ips
+from .models import Bid, ChatMessage, GuestUser, Product, ProductStats
+from .presence import PresenceTracker, presence
+from .retention import prune_data
+from .state import state_store
+from .tasks import task_queue
+from .traffic import read_trace
+from .warmup import DETAIL_KEY
+from .views import guest_ids
+
+
+def reset_process_state(test):
+    """Vacía los cachés en memoria del proceso: cada test empieza en frío.
+
+    Sin generar variantes de imagen: products/test.png no existe en MEDIA_ROOT.
+    Queda en test.variants para comprobar cuándo se encolan
+    """
+    cache.clear()
+    state_store.clear()
+    singleflight.clear()
+    presence.clear()
+    guest_ids.clear()
+    banned_ips.clear()
+    patcher = mock.patch('bids.signals.schedule_variants')
+    test.variants = patcher.start()
+    test.addCleanup(patcher.stop)
+
+
+def create_product(status='ongoing', silent=False, price=100, **fields):
+    now = timezone.now()
+    start, end = {
+        'ongoing': (now - datetime.timedelta(hours=1), now + datetime.timedelta(hours=1)),
+        'upcoming': (now + datetime.timedelta(hours=1), now + datetime.timedelta(hours=2)),
+        'finished': (now - datetime.timedelta(hours=2), now - datetime.timedelta(hours=1)),
+    }[status]
+    fields.setdefault('start_time', start)
+    fields.setdefault('end_time', end)
+    return Product.objects.create(
+        name=f'Lote {status}',
+        description='Carta de colección',
+        image='products/test.png',
+        starting_price=price,
+        is_silent_auction=silent,
+        **fields,
+    )
+
+
+def guest_client(username):
+    """Cliente con sesión de invitado (lo que deja join_auction)"""
+    guest = GuestUser.objects.create(username=username)
+    client = Client()
+    session = client.session
+    session['username'] = username
+    session['guest_user_id'] = guest.id
+    session.save()
+    return client, guest
+
+
+def add_bids(product, guests, count, start_amount=None):
+    amount = start_amount or product.starting_price
+    bids = []
+    for i in range(count):
+        amount += 10
+        bids.append(Bid(product=product, guest_user=guests[i % len(guests)], amount=amount))
+    Bid.objects.bulk_create(bids)
+    Product.objects.filter(id=product.id).update(current_price=amount)
+
+
+def submit_bid(client, product, amount):
+    response = client.post(
+        reverse('submit_bid', args=[product.id]),
+        json.dumps({'amount': amount}),
+        content_type='application/json',
+    )
+    return response.json()
+
+
+@override_settings(ADMISSION_CONTROL_ENABLED=False)
+class QueryBudgetTests(TestCase):
+    """Consultas por petición en frío; en caliente los polls no deberían tocar la base de datos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ongoing = create_product('ongoing')
+        cls.silent = create_product('ongoing', silent=True)
+        cls.upcoming = create_product('upcoming')
+        cls.finished = create_product('finished')
+        cls.finished_silent = create_product('finished', silent=True)
+        guests = [GuestUser.objects.create(username=f'postor{i}') for i in range(5)]
+        for product in (cls.ongoing, cls.silent, cls.finished, cls.finished_silent):
+            add_bids(product, guests, 20)
+            ProductStats.objects.create(product=product, bid_count=20)
+            ChatMessage.objects.create(product=product, guest_user=guests[0], message='hola')
+
+    def setUp(self):
+        patcher = mock.patch.object(task_queue, 'workers', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.reset()
+
+    def reset(self):
+        reset_process_state(self)
+        # Caché de IPs baneadas y detección de FTS5 ya calientes: solo se cuentan las consultas de la vista
+        banned_ips.get('127.0.0.1', lambda: False)
+        search._sqlite_fts_available()
+
+    def assertQueries(self, count, url, client=None, cold=True):
+        """
+        Una petición medida. En frío se vacían los cachés del proceso antes; en
+        caliente solo single-flight, para que la respuesta no salga de otra petición
+        """
+        if cold:
+            self.reset()
+        singleflight.clear()
+        client = client or self.client
+        with self.assertNumQueries(count):
+            response = client.get(url)
+        self.assertLess(response.status_code, 500)
+        return response
+
+    # Polls de solo lectura. En frío: 1 consulta para cargar las subastas en curso/programadas en
+    # bids/state.py, más 1 para un producto finalizado (no está en esa carga). En caliente: 0
+
+    def test_product_status(self):
+        for product, count in [(self.ongoing, 1), (self.silent, 1), (self.upcoming, 1), (self.finished, 2)]:
+            with self.subTest(status=product.status, silent=product.is_silent_auction):
+                url = reverse('get_product_status', args=[product.id])
+                self.assertQueries(count, url)
+                self.assertQueries(0, url, cold=False)
+
+    def test_products_status_batch(self):
+        ids = ','.join(str(p.id) for p in (self.ongoing, self.silent, self.upcoming, self.finished))
+        url = reverse('get_products_status') + f'?ids={ids}'
+        self.assertQueries(2, url)
+        self.assertQueries(0, url, cold=False)
+
+    def test_bids_data(self):
+        for product, count in [(self.ongoing, 2), (self.upcoming, 2), (self.finished, 3)]:
+            with self.subTest(status=product.status):
+                url = reverse('get_bids_data', args=[product.id])
+                self.assertQueries(count, url)
+
+    def test_bids_data_does_not_grow_with_bids(self):
+        url = reverse('get_bids_data', args=[self.ongoing.id])
+        self.assertQueries(2, url)
+        add_bids(self.ongoing, list(GuestUser.objects.all()), 50, start_amount=10_000)
+        self.assertQueries(2, url)
+
+    def test_bids_data_silent(self):
+        client, guest = guest_client('silencioso')
+        url = reverse('get_bids_data', args=[self.silent.id])
+        # Sesión, id del invitado y su puja (sin cargar el invitado para el nombre)
+        Bid.objects.create(product=self.silent, guest_user=guest, amount=5000)
+        self.assertQueries(4, url, client=client)
+        # Anónimo: ni sesión ni pujas
+        self.assertQueries(1, url)
+
+    def test_finished_bids_are_cached(self):
+        for product in (self.finished, self.finished_silent):
+            with self.subTest(silent=product.is_silent_auction):
+                url = reverse('get_bids_data', args=[product.id])
+                self.assertQueries(3, url)
+                self.assertQueries(0, url, cold=False)
+
+    def test_bid_history(self):
+        for product, count in [(self.ongoing, 2), (self.finished, 3)]:
+            with self.subTest(status=product.status):
+                response = self.assertQueries(count, reverse('get_bid_history', args=[product.id]))
+                self.assertEqual(len(response.json()['bids']), 20)
+
+    def test_price_history(self):
+        for product, count in [(self.ongoing, 2), (self.silent, 1), (self.finished, 3)]:
+            with self.subTest(status=product.status, silent=product.is_silent_auction):
+                url = reverse('get_price_history', args=[product.id])
+                self.assertQueries(count, url)
+                if product.is_finished:
+                    self.assertQueries(0, url, cold=False)
+
+    def test_chat(self):
+        self.assertQueries(1, reverse('get_chat_messages', args=[self.ongoing.id]))
+
+    # Páginas y escrituras (la sesión se carga solo si la vista la lee)
+
+    def test_product_detail(self):
+        client, _ = guest_client('visitante')
+        # En caliente (producto en caché e invitado conocido) solo quedan la sesión y las pujas
+        # (las de una finalizada están en los fragmentos cacheados)
+        cases = [(self.ongoing, 5, 2), (self.silent, 4, 1), (self.upcoming, 3, 1), (self.finished, 6, 1)]
+        for product, cold, warm in cases:
+            with self.subTest(status=product.status, silent=product.is_silent_auction):
+                url = reverse('product_detail', args=[product.id])
+                self.assertQueries(cold, url, client=client)
+                self.assertQueries(warm, url, client=client, cold=False)
+
+    def test_product_detail_at_start(self):
+        """La ola del inicio: producto precalentado y sin pujas; quedan la sesión y el invitado"""
+        with clock.simulated() as sim:
+            product = create_product(start_time=sim.now() + datetime.timedelta(seconds=60))
+            client, _ = guest_client('puntual')
+            url = reverse('product_detail', args=[product.id])
+            response = self.assertQueries(3, url, client=client)
+            self.assertEqual(response.context['next_url'], url)
+            self.assertGreaterEqual(response.context['reload_in_ms'], response.context['starts_in_ms'])
+
+            sim.set(product.start_time + datetime.timedelta(seconds=1))
+            response = self.assertQueries(2, url, client=client, cold=False)
+            self.assertEqual(response.context['bids'], [])
+
+    def test_join_is_a_single_insert(self):
+        url = reverse('join_auction', args=[self.ongoing.id])
+        self.client.get(url)
+        # Sesión, INSERT del invitado y guardado de la sesión (cada escritura entre SAVEPOINT y RELEASE)
+        with self.assertNumQueries(7):
+            response = self.client.post(url, {'username': 'recien-llegado'})
+        self.assertRedirects(response, reverse('product_detail', args=[self.ongoing.id]), fetch_redirect_response=False)
+
+        other = Client()
+        other.get(url)
+        response = other.post(url, {'username': 'recien-llegado'})
+        self.assertContains(response, 'ya está en uso')
+        self.assertEqual(GuestUser.objects.filter(username='recien-llegado').count(), 1)
+
+    def test_index(self):
+        client, _ = guest_client('portada')
+        # Tres listas y el ganador de cada finalizada (cacheado después)
+        self.assertQueries(5, reverse('index'), client=client)
+        self.assertQueries(3, reverse('index'), client=client, cold=False)
+
+    def test_search(self):
+        self.assertQueries(1, reverse('product_search') + '?q=carta&status=ongoing')
+
+    # Las pujas corren dentro de transaction.atomic: en TestCase se cuentan SAVEPOINT y RELEASE
+
+    def test_submit_bid(self):
+        client, _ = guest_client('pujador')
+        # Sesión, invitado, producto bloqueado, INSERT y UPDATE; la silenciosa busca además la puja previa
+        for product, amount, count in [(self.ongoing, 1_000_000, 7), (self.silent, 2_000_000, 8)]:
+            with self.subTest(silent=product.is_silent_auction):
+                with self.assertNumQueries(count):
+                    result = submit_bid(client, product, amount)
+                self.assertTrue(result['success'], result)
+
+    def test_submit_bid_rejected_does_not_write(self):
+        client, _ = guest_client('tacaño')
+        with self.assertNumQueries(5):
+            result = submit_bid(client, self.ongoing, 1)
+        self.assertFalse(result['success'])
+
+    def test_bid_stats_are_recorded_after_commit(self):
+        client, guest = guest_client('estadistico')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(submit_bid(client, self.ongoing, 1_000_000)['success'])
+        stats = ProductStats.objects.get(product=self.ongoing)
+        self.assertEqual(stats.bid_count, 21)
+        self.assertIsNotNone(stats.last_bid_at)
+
+
+@override_settings(ADMISSION_CONTROL_ENABLED=False)
+class BidRaceTests(TransactionTestCase):
+    """Pujas simultáneas desde varios hilos, cada uno con su conexión"""
+
+    THREADS = 8
+    BIDS_PER_THREAD = 5
+
+    def setUp(self):
+        reset_process_state(self)
+        patcher = mock.patch.object(task_queue, 'workers', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_threads(self, jobs):
+        """Ejecuta cada job en su hilo, arrancando todos a la vez. Devuelve los resultados en orden"""
+        barrier = threading.Barrier(len(jobs))
+        results = [None] * len(jobs)
+        errors = []
+
+        def worker(index, job):
+            try:
+                barrier.wait()
+                results[index] = job()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(i, job)) for i, job in enumerate(jobs)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return results
+
+    def test_concurrent_bids_keep_price_monotonic(self):
+        product = create_product('ongoing')
+        clients = [guest_client(f'hilo{i}')[0] for i in range(self.THREADS)]
+
+        def bidder(index):
+            def job():
+                accepted = []
+                for round_ in range(self.BIDS_PER_THREAD):
+                    amount = product.starting_price + round_ * self.THREADS + index + 1
+                    if submit_bid(clients[index], product, amount)['success']:
+                        accepted.append(amount)
+                return accepted
+            return job
+
+        accepted = [amount for result in self.run_threads([bidder(i) for i in range(self.THREADS)]) for amount in result]
+
+        product.refresh_from_db()
+        amounts = list(Bid.objects.filter(product=product).order_by('created_at', 'id').values_list('amount', flat=True))
+        self.assertEqual(sorted(amounts), sorted(accepted))
+        self.assertEqual(amounts, sorted(amounts), 'Una puja aceptada quedó por debajo de la anterior')
+        self.assertEqual(len(set(amounts)), len(amounts))
+        self.assertEqual(product.current_price, max(accepted))
+        # Las estadísticas se actualizan fuera del bloqueo: no se pierde ninguna
+        stats = ProductStats.objects.get(product=product)
+        self.assertEqual(stats.bid_count, len(accepted))
+
+    def test_concurrent_silent_bids_keep_one_bid_per_guest(self):
+        product = create_product('ongoing', silent=True)
+        clients = [guest_client(f'silencio{i}')[0] for i in range(self.THREADS)]
+
+        def bidder(index):
+            def job():
+                for round_ in range(self.BIDS_PER_THREAD):
+                    submit_bid(clients[index], product, 1000 + round_ * 100 + index)
+            return job
+
+        self.run_threads([bidder(i) for i in range(self.THREADS)])
+
+        product.refresh_from_db()
+        self.assertEqual(Bid.objects.filter(product=product).count(), self.THREADS)
+        top = 1000 + (self.BIDS_PER_THREAD - 1) * 100 + self.THREADS - 1
+        self.assertEqual(product.current_price, top)
+
+    def test_anti_sniping_extends_once(self):
+        end_time = timezone.now() + datetime.timedelta(seconds=20)
+        product = create_product('ongoing', end_time=end_time)
+        clients = [guest_client(f'sniper{i}')[0] for i in range(self.THREADS)]
+
+        # Montos separados por 1M: cualquier puja aceptada supera el precio vigente en al menos 1M
+        def sniper(index):
+            return lambda: submit_bid(clients[index], product, product.starting_price + (index + 1) * 1_000_000)
+
+        results = self.run_threads([sniper(i) for i in range(self.THREADS)])
+        accepted = sum(1 for result in results if result['success'])
+
+        product.refresh_from_db()
+        self.assertGreaterEqual(accepted, 1)
+        self.assertTrue(product.anti_sniping_active)
+        # La primera puja aceptada deja 50 s (fuera del período): las demás, serializadas por el
+        # bloqueo, leen el end_time nuevo y ya no extienden
+        self.assertEqual(product.end_time, end_time + datetime.timedelta(seconds=30))
+        self.assertEqual(Bid.objects.filter(product=product).count(), accepted)
+
+
+@override_settings(ADMISSION_CONTROL_ENABLED=False)
+class SimulatedClockTests(TestCase):
+    def setUp(self):
+        reset_process_state(self)
+        patcher = mock.patch.object(task_queue, 'workers', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        simulated = clock.simulated()
+        self.sim = simulated.__enter__()
+        self.addCleanup(simulated.__exit__, None, None, None)
+
+    def bid(self, client, product, amount):
+        # Los callbacks on_commit refrescan el estado en memoria (bids/state.py)
+        with self.captureOnCommitCallbacks(execute=True):
+            return submit_bid(client, product, amount)['success']
+
+    def status(self, product):
+        singleflight.clear()
+        return self.client.get(reverse('get_product_status', args=[product.id])).json()
+
+    def test_auction_lifecycle_without_waiting(self):
+        start = self.sim.now() + datetime.timedelta(hours=1)
+        product = create_product(start_time=start, end_time=start + datetime.timedelta(hours=2), price=1000)
+        client, _ = guest_client('puntual')
+        self.assertEqual(state_store.get(product.id).status, 'upcoming')
+        self.assertFalse(self.bid(client, product, 2000))
+
+        self.sim.set(start + datetime.timedelta(minutes=30))
+        self.assertTrue(self.bid(client, product, 2000))
+        bid = Bid.objects.get(product=product)
+        self.assertEqual(bid.created_at, start + datetime.timedelta(minutes=30))
+
+        # A 10 s del cierre una puja de +1M extiende 30 s
+        self.sim.set(product.end_time - datetime.timedelta(seconds=10))
+        self.assertTrue(self.bid(client, product, 1_002_000))
+        product.refresh_from_db()
+        self.assertEqual(product.end_time, start + datetime.timedelta(hours=2, seconds=30))
+        self.assertTrue(self.status(product)['anti_sniping_active'])
+
+        self.sim.advance(25)
+        self.assertTrue(self.status(product)['is_ongoing'])
+        self.sim.advance(20)
+        self.assertFalse(self.status(product)['is_ongoing'])
+        self.assertFalse(self.bid(client, product, 2_000_000))
+
+    def test_bid_updates_local_state_without_reload(self):
+        product = create_product(price=1000)
+        client, _ = guest_client('local')
+        state_store.get(product.id)
+        self.assertTrue(self.bid(client, product, 2000))
+        self.assertTrue(self.bid(client, product, 3000))
+        # El estado se actualizó tras el commit: leerlo no vuelve a la base
+        with self.assertNumQueries(0):
+            state = state_store.get(product.id)
+        self.assertEqual(state.current_price, 3000)
+
+    def test_recently_finished_is_not_cached(self):
+        product = create_product(end_time=self.sim.now() + datetime.timedelta(seconds=10), price=1000)
+        url = reverse('get_product_status', args=[product.id])
+        self.sim.advance(15)
+        singleflight.clear()
+        response = self.client.get(url)
+        self.assertFalse(response.json()['is_ongoing'])
+        # Otro worker podría no haber visto todavía una extensión: nada inmutable
+        self.assertNotIn('immutable', response.get('Cache-Control', ''))
+
+        self.sim.advance(settings.FINISHED_CACHE_GRACE)
+        singleflight.clear()
+        self.assertIn('immutable', self.client.get(url)['Cache-Control'])
+
+
+@override_settings(ADMISSION_CONTROL_ENABLED=False)
+class TrafficCaptureTests(TestCase):
+    def setUp(self):
+        reset_process_state(self)
+        patcher = mock.patch.object(task_queue, 'workers', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'traffic.trace')
+
+    def test_trace_is_anonymous_and_replayable(self):
+        product = create_product('ongoing', price=1000)
+        with override_settings(TRAFFIC_CAPTURE_ENABLED=True, TRAFFIC_CAPTURE_PATH=self.path, TRAFFIC_CAPTURE_FLUSH_INTERVAL=0):
+            client, _ = guest_client('nombre-secreto')
+            self.assertTrue(submit_bid(client, product, 1500)['success'])
+            client.post(
+                reverse('send_chat_message', args=[product.id]),
+                json.dumps({'message': 'mensaje privado'}),
+                content_type='application/json',
+            )
+            # Un nombre solo con dígitos no se guarda como número
+            Client().post(reverse('join_auction', args=[product.id]), 'username=5551234567', content_type='application/x-www-form-urlencoded')
+            client.get(reverse('get_products_status') + f'?ids={product.id},999')
+
+        with open(self.path, 'rb') as trace:
+            raw = trace.read()
+        for secret in (b'nombre-secreto', b'mensaje privado', b'5551234567', client.session.session_key.encode()):
+            self.assertNotIn(secret, raw)
+
+        bid, chat, join, status = read_trace([self.path])
+        self.assertEqual(join['b'], {'username': '*10'})
+        self.assertEqual((bid['v'], bid['p'], bid['b'], bid['i']), ('submit_bid', product.id, {'amount': 1500}, 500))
+        self.assertEqual(chat['b'], {'message': '*15'})
+        self.assertEqual(status['q'], {'ids': [product.id, 999]})
+        self.assertEqual(len({bid['g'], chat['g'], status['g']}), 1)
+
+
+@override_settings(ADMISSION_CONTROL_ENABLED=False)
+class StaticAssetsTests(TestCase):
+    def setUp(self):
+        reset_process_state(self)
+        patcher = mock.patch.object(task_queue, 'workers', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.product = create_product('ongoing', price=1000)
+        self.client, self.guest = guest_client('estatico')
+
+    def get_script(self, path, **headers):
+        response = self.client.get(path, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_collectstatic_hashes_and_precompresses(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with override_settings(STATIC_ROOT=directory.name):
+            call_command('collectstatic', interactive=False, verbosity=0, ignore_patterns=['admin'])
+            page = self.client.get(reverse('product_detail', args=[self.product.id])).content.decode()
+            self.assertNotIn('function submitBid', page)
+            self.assertIn('id="product-detail-config"', page)
+            script = page.split('<script src="')[-1].split('"')[0]
+            self.assertRegex(script, r'^/static/bids/product_detail\.[0-9a-f]{12}\.js$')
+
+            response, plain = self.get_script(script)
+            self.assertIsNone(response.get('Content-Encoding'))
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertIn('function submitBid', plain.decode())
+
+            response, compressed = self.get_script(script, HTTP_ACCEPT_ENCODING='gzip, deflate')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+            self.assertEqual(gzip.decompress(compressed), plain)
+
+            # Sin hash (el original que también copia collectstatic): se revalida
+            response, _ = self.get_script('/static/bids/product_detail.js')
+            self.assertEqual(response['Cache-Control'], 'no-cache')
+
+            self.assertEqual(self.client.get('/static/..%2Fmanage.py').status_code, 404)
+
+    def test_large_json_is_compressed(self):
+        ChatMessage.objects.bulk_create(
+            ChatMessage(product=self.product, guest_user=self.guest, message=f'mensaje {i}') for i in range(20)
+        )
+        response = self.client.get(reverse('get_chat_messages', args=[self.product.id]), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['messages']), 20)
+
+        # Chicas o sin Accept-Encoding: sin comprimir
+        response = self.client.get(reverse('get_product_status', args=[self.product.id]), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertIsNone(response.get('Content-Encoding'))
+        singleflight.clear()
+        response = self.client.get(reverse('get_chat_messages', args=[self.product.id]))
+        self.assertIsNone(response.get('Content-Encoding'))
+
+
+class StartupTests(TestCase):
+    def test_api_profile_skips_heavy_imports(self):
+        heavy = ['numpy', 'PIL', 'channels', 'django.contrib.admin', 'django.contrib.messages', 'urllib.request']
+        probe = (
+            'import json, sys\n'
+            'from auction_site.wsgi import application\n'
+            'from django.urls import resolve, reverse\n'
+            "resolve(reverse('submit_bid', args=[1]))\n"
+            "resolve(reverse('get_products_status'))\n"
+            f'print(json.dumps([name for name in {heavy!r} if name in sys.modules]))\n'
+        )
+        # Sin precalentar: no abre la base del proceso de tests
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'auction_site.settings_api', 'STARTUP_PREWARM': 'False'}
+        process = subprocess.run(
+            [sys.executable, '-c', probe], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        self.assertEqual(process.returncode, 0, process.stderr)
+        self.assertEqual(json.loads(process.stdout), [])
+
+
+class AdmissionControlTests(TestCase):
+    def setUp(self):
+        reset_process_state(self)
+
+    def test_stale_copy_matches_query_string(self):
+        first, second = create_product(), create_product()
+        url = reverse('get_products_status')
+        self.assertEqual(self.client.get(f'{url}?ids={first.id}').status_code, 200)
+        with mock.patch.object(LoadMonitor, 'under_pressure', return_value=True):
+            stale = self.client.get(f'{url}?ids={first.id}')
+            other = self.client.get(f'{url}?ids={second.id}')
+        self.assertEqual(stale['X-Stale'], '1')
+        # Sin copia para otros ids: 503, nunca la respuesta de otro cliente
+        self.assertEqual(other.status_code, 503)
+
+
+class VariantSchedulingTests(TestCase):
+    def setUp(self):
+        reset_process_state(self)
+
+    def test_only_new_or_changed_images(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = create_product()
+        self.assertEqual(self.variants.call_count, 1)
+
+        product = Product.objects.get(id=product.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.name = 'Lote renombrado'
+            product.save()
+        self.assertEqual(self.variants.call_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.image = 'products/otra.png'
+            product.save()
+            # Un segundo save() sin cambios no vuelve a encolar
+            product.save()
+        self.assertEqual(self.variants.call_count, 2)
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        reset_process_state(self)
+
+    def test_archived_bidders_are_kept(self):
+        product = create_product('finished')
+        _, winner = guest_client('ganador')
+        _, idle = guest_client('de_paso')
+        add_bids(product, [winner], 1)
+        archive_product(product, batch_size=100)
+        self.assertFalse(Bid.objects.filter(guest_user=winner).exists())
+        GuestUser.objects.update(created_at=timezone.now() - datetime.timedelta(days=60), session_key=None)
+
+        summary = prune_data(guest_days=30)
+        self.assertEqual(summary['guests']['deleted'], 1)
+        self.assertTrue(GuestUser.objects.filter(id=winner.id).exists())
+        self.assertFalse(GuestUser.objects.filter(id=idle.id).exists())
+
+
+class BusTests(TestCase):
+    @skipUnless(hasattr(os, 'fork'), 'requiere fork')
+    def test_forked_worker_gets_own_origin(self):
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(write_end, bus.ORIGIN.encode())
+            os._exit(0)
+        os.close(write_end)
+        os.waitpid(pid, 0)
+        child_origin = os.read(read_end, 100).decode()
+        os.close(read_end)
+        self.assertTrue(child_origin.startswith(f'{pid}-'))
+        self.assertNotEqual(child_origin, bus.ORIGIN)
+
+
+class DetailCacheTests(TestCase):
+    def setUp(self):
+        reset_process_state(self)
+        patcher = mock.patch.object(task_queue, 'workers', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.product = create_product('ongoing', price=1000)
+        self.client, _ = guest_client('detalle')
+        self.url = reverse('product_detail', args=[self.product.id])
+
+    def test_edit_from_other_worker(self):
+        self.client.get(self.url)
+        self.assertIsNotNone(cache.get(DETAIL_KEY.format(self.product.id)))
+
+        # Otro worker la hizo silenciosa: aquí solo llega el mensaje 'product' del bus
+        Product.objects.filter(id=self.product.id).update(is_silent_auction=True)
+        bus.bus._receive({'t': 'product', 'k': self.product.id, 'o': 'otro'})
+        self.assertTrue(self.client.get(self.url).context['product'].is_silent_auction)
+
+        bus.bus._receive({'t': 'detail', 'k': self.product.id, 'o': 'otro'})
+        self.assertIsNone(cache.get(DETAIL_KEY.format(self.product.id)))
+
+
+class PresenceTests(TestCase):
+    def setUp(self):
+        reset_process_state(self)
+
+    def test_count_expires_with_window(self):
+        tracker = PresenceTracker(window=60, bucket=10, flush_interval=0)
+        tracker.touch(1, 'ana', now=1000)
+        tracker.touch(1, 'beto', now=1005)
+        tracker.touch(1, 'ana', now=1030)
+        self.assertEqual(tracker.count(1, now=1031), 2)
+        # El intervalo de beto (1000-1009) salió de la ventana; el último de ana sigue
+        self.assertEqual(tracker.count(1, now=1065), 1)
+        self.assertEqual(tracker.count(1, now=1100), 0)
+
+    def test_product_detail_counts_viewer(self):
+        product = create_product('upcoming')
+        self.client.get(reverse('product_detail', args=[product.id]))
+        guest_client('espectador')[0].get(reverse('product_detail', args=[product.id]))
+        self.assertEqual(presence.count(product.id), 2)
@@ -0,0 +1,90 @@
+"""
+Serie de precios de una subasta para el gráfico de product_detail.
+
+La serie completa (created_at, amount) se guarda en el caché como dos arrays
+de numpy, por producto y versión (bids/cache.py). En cada petición solo se
+leen las pujas posteriores a la última guardada (keyset sobre created_at, id
+con product_bids_idx) y se agregan al final. El reducido al presupuesto de
+puntos se hace vectorizado con min/max por intervalo de tiempo.
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Q
+
+from . import cache as finished_cache
+from .encoding import epoch_ms
+
+SERIES_KEY = 'auction:series:{}:{}'
+# Filas por lote al leer pujas de la base de datos
+CHUNK_SIZE = 2000
+
+
+def min_max_downsample(timestamps, values, budget):
+    """
+    Reduce la serie a como mucho `budget` puntos: divide el tiempo en budget/2
+    intervalos y conserva el mínimo y el máximo de cada uno (además del primer y
+    el último punto), así los saltos de precio no desaparecen del gráfico.
+    """
+    count = len(timestamps)
+    if count <= budget:
+        return timestamps, values
+
+    buckets = max((budget - 2) // 2, 1)
+    span = int(timestamps[-1] - timestamps[0]) + 1
+    bucket_ids = ((timestamps - timestamps[0]) * buckets // span).astype(np.int64)
+
+    # timestamps está ordenado, así que bucket_ids también: cada intervalo es un tramo contiguo
+    starts = np.flatnonzero(np.diff(bucket_ids)) + 1
+    starts = np.concatenate(([0], starts))
+    ends = np.concatenate((starts[1:], [count]))
+
+    # Dentro de cada intervalo, ordenado por valor: el primero es el mínimo y el último el máximo
+    order = np.lexsort((values, bucket_ids))
+    keep = np.unique(np.concatenate((order[starts], order[ends - 1], [0, count - 1])))
+    return timestamps[keep], values[keep]
+
+
+def _empty_series():
+    return {
+        'timestamps': np.empty(0, dtype=np.int64),
+        'amounts': np.empty(0, dtype=np.int64),
+        'last': None,  # (created_at, id) de la última puja incluida
+    }
+
+
+def _append_new_bids(product, series):
+    """Agrega las pujas posteriores a series['last']. Devuelve cuántas se agregaron"""
+    bids = product.bid_queryset().order_by('created_at', 'id')
+    if series['last'] is not None:
+        created_at, pk = series['last']
+        bids = bids.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+    timestamps, amounts, last = [], [], None
+    for created_at, pk, amount in bids.values_list('created_at', 'id', 'amount').iterator(chunk_size=CHUNK_SIZE):
+        timestamps.append(epoch_ms(created_at))
+        amounts.append(amount)
+        last = (created_at, pk)
+
+    if last is not None:
+        series['timestamps'] = np.concatenate((series['timestamps'], np.array(timestamps, dtype=np.int64)))
+        series['amounts'] = np.concatenate((series['amounts'], np.array(amounts, dtype=np.int64)))
+        series['last'] = last
+    return len(timestamps)
+
+
+def price_series(product):
+    """Serie completa (timestamps en ms, montos) del producto, incremental sobre el caché"""
+    version = finished_cache.product_version(product.id)
+    key = SERIES_KEY.format(product.id, version)
+    series = cache.get(key) or _empty_series()
+    if _append_new_bids(product, series):
+        cache.set(key, series, timeout=None if product.is_finished else 60 * 60)
+    return series['timestamps'], series['amounts']
+
+
+def price_history(product, budget):
+    """Puntos [timestamp_ms, monto] reducidos al presupuesto"""
+    timestamps, amounts = price_series(product)
+    sampled_ts, sampled_amounts = min_max_downsample(timestamps, amounts, budget)
+    points = np.column_stack((sampled_ts, sampled_amounts)).tolist()
+    return points, len(timestamps)
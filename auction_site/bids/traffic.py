@@ -0,0 +1,386 @@
+"""
+Captura y reproducción de tráfico real para pruebas de carga.
+
+TrafficCaptureMiddleware (bids/middleware.py, con TRAFFIC_CAPTURE_ENABLED) guarda
+cada petición como un registro msgpack anexado a TRAFFIC_CAPTURE_PATH: ruta,
+método, producto, duración en el servidor, status y la forma del cuerpo. No se
+guardan IPs, nombres, mensajes ni claves de sesión: el visitante es un hash con
+el SECRET_KEY y los textos quedan reducidos a su largo ("*12").
+
+El comando replay_traffic vuelve a lanzar la traza contra una instancia local a
+1x o acelerada: cada visitante de la traza es un cliente con sus cookies, los
+productos se reasignan a productos locales y las pujas conservan el incremento
+sobre el precio vigente.
+"""
+import hashlib
+import hmac
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+
+import msgpack
+from django.conf import settings
+from django.http import QueryDict
+from django.urls import reverse
+
+# Registros en memoria antes de anexarlos al archivo (o TRAFFIC_CAPTURE_FLUSH_INTERVAL segundos)
+FLUSH_RECORDS = 256
+# Cuerpos más grandes que esto no se inspeccionan
+MAX_BODY_BYTES = 64 * 1024
+# Campos de formulario que nunca se guardan
+SKIPPED_FIELDS = {'csrfmiddlewaretoken'}
+# Únicos campos cuyos números se guardan tal cual (los ids se reasignan al reproducir).
+# En cualquier otro, un número puede ser un nombre o un mensaje: solo su largo
+NUMERIC_FIELDS = {'amount', 'ids', 'points', 'limit', 'min_price', 'max_price'}
+# Vistas que necesitan un invitado unido a la subasta
+GUEST_VIEWS = {'product_detail', 'submit_bid', 'send_chat_message', 'change_username', 'logout_guest', 'get_bids_data'}
+
+
+# --- Captura ---------------------------------------------------------------
+
+def visitor_hash(session_key):
+    """Identificador anónimo y estable del visitante (entre workers con el mismo SECRET_KEY)"""
+    digest = hmac.new(settings.SECRET_KEY.encode(), session_key.encode(), hashlib.sha256).digest()
+    return int.from_bytes(digest[:6], 'big')
+
+
+def value_shape(value, key=None):
+    """Los números de NUMERIC_FIELDS (y sus listas de ids) se conservan; todo lo demás pasa a '*<largo>'"""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [value_shape(item, key) for item in value]
+    if isinstance(value, dict):
+        return {name: value_shape(item, name) for name, item in value.items()}
+    if key in NUMERIC_FIELDS:
+        if isinstance(value, (int, float)):
+            return value
+        text = str(value).strip()
+        if text.isdigit():
+            return int(text)
+        parts = [part.strip() for part in text.split(',')]
+        if len(parts) > 1 and all(part.isdigit() for part in parts):
+            return [int(part) for part in parts]
+    return f'*{len(str(value).strip())}'
+
+
+def body_shape(request):
+    """Forma del cuerpo de un POST con JSON o formulario. Se lee antes de la vista (queda cacheado)"""
+    content_type = request.content_type
+    if content_type not in ('application/json', 'application/x-www-form-urlencoded'):
+        return None
+    if int(request.META.get('CONTENT_LENGTH') or 0) > MAX_BODY_BYTES:
+        return None
+    body = request.body
+    if content_type == 'application/json':
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+    else:
+        data = QueryDict(body).dict()
+    return {key: value_shape(value, key) for key, value in data.items() if key not in SKIPPED_FIELDS}
+
+
+class TraceWriter:
+    """Acumula registros y los anexa al archivo en bloques (un write por bloque)"""
+
+    def __init__(self, path, max_bytes, flush_interval):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = []
+        self._flushed_at = time.monotonic()
+        self.full = False
+
+    def add(self, record):
+        if self.full:
+            return
+        with self._lock:
+            self._pending.append(record)
+            due = (
+                len(self._pending) >= FLUSH_RECORDS
+                or time.monotonic() - self._flushed_at >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            records, self._pending = self._pending, []
+            self._flushed_at = time.monotonic()
+        if not records:
+            return
+        packer = msgpack.Packer()
+        data = b''.join(packer.pack(record) for record in records)
+        with self._write_lock:
+            try:
+                if os.path.getsize(self.path) + len(data) > self.max_bytes:
+                    self.full = True
+                    return
+            except FileNotFoundError:
+                pass
+            with open(self.path, 'ab') as trace:
+                trace.write(data)
+
+
+def read_trace(paths):
+    """Registros de uno o varios archivos (p. ej. uno por servidor), ordenados por instante"""
+    records = []
+    for path in paths:
+        with open(path, 'rb') as trace:
+            records.extend(msgpack.Unpacker(trace, raw=False, strict_map_key=False))
+    records.sort(key=lambda record: record['ts'])
+    return records
+
+
+# --- Reproducción ----------------------------------------------------------
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Las redirecciones se miden como respuesta (no se sigue al destino)"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class VirtualGuest:
+    """Un visitante de la traza: sus propias cookies (sesión y CSRF)"""
+
+    def __init__(self, username):
+        self.username = username
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect)
+        self.joined = False
+        self.renames = 0
+        self.lock = threading.Lock()
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == settings.CSRF_COOKIE_NAME:
+                return cookie.value
+        return ''
+
+
+def percentiles(values):
+    # numpy solo para el reporte de replay_traffic: la captura corre en cada worker
+    import numpy as np
+
+    data = np.asarray(values, dtype=np.float64)
+    if not len(data):
+        return {'p50': None, 'p90': None, 'p99': None, 'max': None}
+    p50, p90, p99 = np.percentile(data, [50, 90, 99])
+    return {'p50': round(p50, 1), 'p90': round(p90, 1), 'p99': round(p99, 1), 'max': round(float(data.max()), 1)}
+
+
+class TrafficReplayer:
+    """
+    Reproduce los registros contra `base_url`. Los instantes de la traza se
+    dividen por `speed` (0: sin esperas). `products` son los ids locales a los
+    que se reasignan los de la traza, en orden de aparición y en ciclo.
+    """
+
+    def __init__(self, records, base_url, products, prices, search_terms=(), speed=1.0, concurrency=50, timeout=10.0):
+        self.records = records
+        self.base_url = base_url.rstrip('/')
+        self.products = list(products)
+        self.prices = dict(prices)  # product_id local -> último precio conocido
+        self.search_terms = list(search_terms) or ['subasta']
+        self.speed = speed
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.run_id = uuid.uuid4().hex[:6]
+        self._product_map = {}
+        self._guests = {}
+        self._anonymous = VirtualGuest(None)
+        self._lock = threading.Lock()
+        self._results = defaultdict(list)  # vista -> [(status, ms)]
+        self._lags = []
+
+    def local_product(self, product_id):
+        if product_id is None:
+            return None
+        with self._lock:
+            if product_id not in self._product_map:
+                self._product_map[product_id] = self.products[len(self._product_map) % len(self.products)]
+            return self._product_map[product_id]
+
+    def guest(self, visitor):
+        if visitor is None:
+            return self._anonymous
+        with self._lock:
+            guest = self._guests.get(visitor)
+            if guest is None:
+                guest = VirtualGuest(f'replay-{self.run_id}-{len(self._guests)}')
+                self._guests[visitor] = guest
+            return guest
+
+    def run(self):
+        started = time.monotonic()
+        if self.records:
+            first_ts = self.records[0]['ts']
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                for record in self.records:
+                    if self.speed:
+                        due = started + (record['ts'] - first_ts) / 1000 / self.speed
+                        wait = due - time.monotonic()
+                        if wait > 0:
+                            time.sleep(wait)
+                        self._lags.append(max(time.monotonic() - due, 0) * 1000)
+                    pool.submit(self.replay, record)
+        elapsed = time.monotonic() - started
+        return self.report(elapsed)
+
+    def replay(self, record):
+        view = record['v']
+        product_id = self.local_product(record.get('p'))
+        guest = self.guest(record.get('g'))
+        try:
+            if guest.username and not guest.joined and not (view == 'join_auction' and record['m'] == 'POST'):
+                if view in GUEST_VIEWS and product_id is not None:
+                    self._join(guest, product_id)
+            request = self._build(record, guest, product_id)
+        except Exception:
+            self._record(view, None, 0)
+            return
+        status, elapsed_ms, body = self._send(guest, request)
+        if view == 'join_auction' and status == 302:
+            guest.joined = True
+        elif view == 'submit_bid' and status == 200 and product_id is not None:
+            self._learn_price(product_id, body)
+        self._record(view, status, elapsed_ms)
+
+    def _join(self, guest, product_id):
+        """Unión implícita (no se mide) para visitantes cuya unión quedó antes de la captura"""
+        with guest.lock:
+            if guest.joined:
+                return
+            url = self.base_url + reverse('join_auction', args=[product_id])
+            self._send(guest, urllib.request.Request(url))
+            self._send(guest, self._post(guest, url, form={'username': guest.username}))
+            guest.joined = True
+
+    def _build(self, record, guest, product_id):
+        view = record['v']
+        args = [product_id] if product_id is not None else []
+        url = self.base_url + reverse(view, args=args)
+        query = record.get('q')
+        if query:
+            url += '?' + urllib.parse.urlencode(self._remap_query(query))
+        headers = {'Accept': 'application/msgpack'} if record.get('a') else {}
+        body = record.get('b') or {}
+
+        if record['m'] != 'POST':
+            return urllib.request.Request(url, headers=headers, method=record['m'])
+        if view == 'submit_bid':
+            price = self.prices.get(product_id, 0)
+            return self._post(guest, url, data={'amount': price + max(record.get('i') or 1, 1)}, headers=headers)
+        if view == 'send_chat_message':
+            return self._post(guest, url, data={'message': 'x' * self._length(body.get('message'), 20)}, headers=headers)
+        if view == 'join_auction':
+            return self._post(guest, url, form={'username': guest.username or f'replay-{self.run_id}-anon'})
+        if view == 'change_username':
+            guest.renames += 1
+            new_username = f'{guest.username}-{guest.renames}'
+            guest.username = new_username
+            return self._post(guest, url, form={'new_username': new_username})
+        return self._post(guest, url, form={key: 'x' * self._length(value, 1) for key, value in body.items()})
+
+    def _remap_query(self, query):
+        params = {}
+        for key, value in query.items():
+            if key == 'ids':
+                ids = value if isinstance(value, list) else [value]
+                params[key] = ','.join(str(self.local_product(product_id)) for product_id in ids)
+            elif key == 'q':
+                params[key] = random.choice(self.search_terms)
+            elif isinstance(value, str) and value.startswith('*'):
+                params[key] = 'x' * self._length(value, 1)
+            else:
+                params[key] = value
+        return params
+
+    @staticmethod
+    def _length(shape, default):
+        if isinstance(shape, str) and shape.startswith('*') and shape[1:].isdigit():
+            return max(int(shape[1:]), 1)
+        return default
+
+    def _post(self, guest, url, data=None, form=None, headers=None):
+        headers = dict(headers or {})
+        headers['X-CSRFToken'] = guest.csrf_token()
+        headers['Referer'] = url
+        if data is not None:
+            headers['Content-Type'] = 'application/json'
+            payload = json.dumps(data).encode()
+        else:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            payload = urllib.parse.urlencode(form).encode()
+        return urllib.request.Request(url, data=payload, headers=headers, method='POST')
+
+    def _send(self, guest, request):
+        started = time.monotonic()
+        try:
+            with guest.opener.open(request, timeout=self.timeout) as response:
+                body = response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            body = error.read()
+            status = error.code
+        except OSError:
+            body = b''
+            status = None
+        return status, (time.monotonic() - started) * 1000, body
+
+    def _learn_price(self, product_id, body):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return
+        if data.get('success') and data.get('new_price'):
+            with self._lock:
+                self.prices[product_id] = max(self.prices.get(product_id, 0), data['new_price'])
+
+    def _record(self, view, status, elapsed_ms):
+        with self._lock:
+            self._results[view].append((status, elapsed_ms))
+
+    def report(self, elapsed):
+        """Latencias por vista: las del cliente al reproducir y las del servidor al capturar"""
+        captured = defaultdict(list)
+        for record in self.records:
+            captured[record['v']].append(record['d'])
+
+        endpoints = []
+        for view, results in sorted(self._results.items(), key=lambda item: -len(item[1])):
+            latencies = [ms for status, ms in results if status is not None]
+            endpoints.append({
+                'view': view,
+                'requests': len(results),
+                'errors': sum(1 for status, _ in results if status is None or (status >= 500 and status != 503)),
+                'shed': sum(1 for status, _ in results if status == 503),
+                'latency_ms': percentiles(latencies),
+                'captured_ms': percentiles(captured[view]),
+            })
+        total = sum(endpoint['requests'] for endpoint in endpoints)
+        return {
+            'requests': total,
+            'elapsed_seconds': round(elapsed, 2),
+            'requests_per_second': round(total / elapsed, 1) if elapsed else 0,
+            'guests': len(self._guests),
+            'products': len(self._product_map),
+            'schedule_lag_ms': percentiles(self._lags),
+            'endpoints': endpoints,
+        }
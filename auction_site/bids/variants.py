@@ -0,0 +1,76 @@
+"""
+Generación en segundo plano de las variantes responsivas de Product.image.
+
+La petición que guarda el producto (admin) no espera a Pillow: el trabajo se
+encola en un pool de hilos cuando la transacción confirma.
+"""
+import logging
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection
+
+from .images import generate_variants
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_WORKERS,
+            thread_name_prefix='image-variants',
+        )
+    return _executor
+
+
+def variant_paths(image_name):
+    """(ruta del original, carpeta de destino, nombre base) para bids.images.generate_variants"""
+    source_path = default_storage.path(image_name)
+    basename = os.path.splitext(posixpath.basename(image_name))[0]
+    return source_path, os.path.dirname(source_path), basename
+
+
+def build_variants(image_name):
+    """Genera las variantes de un archivo de MEDIA_ROOT y devuelve el dict para image_variants"""
+    variants = generate_variants(*variant_paths(image_name))
+    variants['source'] = image_name
+    return variants
+
+
+def update_product_variants(product_id, image_name):
+    """Genera las variantes y las guarda si la imagen del producto no cambió entretanto"""
+    from .models import Product
+    from .warmup import forget_detail
+
+    try:
+        if not default_storage.exists(image_name):
+            # Una línea, sin traceback: pasa con productos cargados sin su archivo
+            logger.warning('No se generan variantes: no existe %s', image_name)
+            variants = {'source': image_name, 'failed': True}
+        else:
+            try:
+                variants = build_variants(image_name)
+            except (OSError, ValueError):
+                logger.exception('No se pudieron generar las variantes de %s', image_name)
+                # Se registra el intento para no reintentarlo en cada save() del producto
+                variants = {'source': image_name, 'failed': True}
+        # update() en lugar de save(): no vuelve a disparar post_save
+        Product.objects.filter(id=product_id, image=image_name).update(image_variants=variants)
+        forget_detail(product_id)
+    finally:
+        # Los hilos del pool no pasan por el ciclo request/response que cierra conexiones
+        connection.close()
+
+
+def schedule_variants(product):
+    """Encola la generación de variantes si la imagen actual aún no se procesó"""
+    if not product.image or product.image_variants.get('source') == product.image.name:
+        return
+    get_executor().submit(update_product_variants, product.id, product.image.name)
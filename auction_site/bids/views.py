@@ -1,17 +1,46 @@
-import json, html
+import json, html, random
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.db import transaction, IntegrityError, DatabaseError
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views import View
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.http import require_POST
-from .models import Product, Bid, GuestUser, ChatMessage
-from django.utils import timezone
+from django.contrib.auth.decorators import user_passes_test
+from .db import write_transaction
+from .models import Product, Bid, GuestUser, ChatMessage, ArchivedChatMessage, ProductStats
+from .pagination import keyset_page, InvalidCursor
+from . import cache as finished_cache
+from . import clock
+from . import metrics
+from .singleflight import coalesce, mark_private, coalescing_report
+from .state import state_store
+from .localcache import LocalCache
+from .tasks import submit_on_commit
+from .middleware import sheddable, client_ip
+from .search import search_products, filter_by_status, filter_by_price
+from .presence import presence, track_presence
+from .warmup import get_detail_product, starts_soon, warm_detail
+from .encoding import JSON, MSGPACK, negotiate, api_response, epoch_ms, format_amount
+
+BID_HISTORY_PAGE_SIZE = 20
+BID_HISTORY_MAX_PAGE_SIZE = 100
+# Campos que una puja puede cambiar en Product (UPDATE más corto dentro del bloqueo)
+BID_UPDATE_FIELDS = ['current_price', 'end_time', 'anti_sniping_active']
+# Productos por petición en /api/products/status/
+BATCH_STATUS_MAX_IDS = 100
+SEARCH_PAGE_SIZE = 24
+# Presupuesto de puntos del gráfico de precios
+PRICE_HISTORY_POINTS = 200
+PRICE_HISTORY_MIN_POINTS = 10
+PRICE_HISTORY_MAX_POINTS = 2000
+SEARCH_MAX_PAGE_SIZE = 100
 
 
 def index(request):
-    now = timezone.now()
+    now = clock.now()
     
     # Subastas en curso (activas)
     ongoing_auctions = Product.objects.filter(
@@ -35,18 +64,36 @@ def index(request):
         'ongoing_auctions': ongoing_auctions,
         'upcoming_auctions': upcoming_auctions,
         'finished_auctions': finished_auctions,
-        'now': now
+        'now': now,
+        # Ids por petición a /api/products/status/
+        'status_batch_size': BATCH_STATUS_MAX_IDS,
     })
 
 @ensure_csrf_cookie
+@track_presence
 def product_detail(request, product_id):
-    product = get_object_or_404(Product, id=product_id)
+    # Sin consultar Product: caché compartido + estado en memoria (bids/warmup.py)
+    product = get_detail_product(product_id)
+    if product is None:
+        raise Http404('Producto no encontrado')
     
     # Verificar si la subasta aún no ha comenzado
     if product.is_upcoming:
+        if starts_soon(product):
+            warm_detail(product, refresh=False)
+        time_until_start = product.start_time - clock.now()
+        # Al empezar, cada navegador recarga con su propio retraso: la ola se reparte en AUCTION_START_JITTER segundos
+        reload_in = time_until_start.total_seconds() + random.uniform(0, settings.AUCTION_START_JITTER)
+        if 'username' in request.session:
+            next_url = reverse('product_detail', args=[product_id])
+        else:
+            next_url = reverse('join_auction', args=[product_id])
         return render(request, 'auction_upcoming.html', {
             'product': product,
-            'time_until_start': product.start_time - timezone.now()
+            'time_until_start': time_until_start,
+            'starts_in_ms': max(int(time_until_start.total_seconds() * 1000), 0),
+            'reload_in_ms': max(int(reload_in * 1000), 0),
+            'next_url': next_url,
         })
     
     # Verificar sesión de guest para subastas en curso
@@ -56,7 +103,7 @@ def product_detail(request, product_id):
     # Verificar que el usuario guest exista
     if product.is_ongoing:
         try:
-            guest_user = GuestUser.objects.get(username=request.session['username'])
+            get_guest_id(request.session['username'])
         except GuestUser.DoesNotExist:
             if 'username' in request.session:
                 del request.session['username']
@@ -64,19 +111,38 @@ def product_detail(request, product_id):
     
     if product.is_silent_auction:
         # Silenciosas: Por monto desc, luego tiempo asc (primero en llegar gana en empate)
-        bids = Bid.objects.filter(product=product).select_related('guest_user').order_by('-amount', 'created_at')[:10]
+        bids = product.bid_queryset().order_by('-amount', 'created_at')[:10]
+    elif product.is_ongoing and product.current_price == product.starting_price:
+        # Recién empezada: toda puja sube current_price (del estado en memoria), así que no hay pujas que listar
+        bids = []
     else:
         # Normales: Por tiempo desc (más reciente primero)
-        bids = Bid.objects.filter(product=product).select_related('guest_user').order_by('-created_at')[:10]
+        bids = product.bid_queryset().order_by('-created_at')[:10]
     
+    username = request.session.get('username', '')
     return render(request, 'product_detail.html', {
         'product': product,
         'bids': bids,
-        'username': request.session.get('username', '')
+        'username': username,
+        # Para static/bids/product_detail.js (json_script)
+        'page_config': {
+            'productId': product.id,
+            'username': username,
+            'currentPrice': product.current_price,
+            'isFinished': product.is_finished,
+            'changeUsernameUrl': reverse('change_username', args=[product.id]),
+        },
+        # Versión para los fragmentos cacheados de subastas finalizadas
+        'cache_version': finished_cache.product_version(product.id) if product.is_finished else None,
+        # Recién finalizada (ver is_settled) los fragmentos no se guardan
+        'fragment_timeout': None if product.is_settled else 0,
     })
 
 def join_auction(request, product_id):
-    product = get_object_or_404(Product, id=product_id)
+    # La ola del inicio de la subasta también pasa por aquí (bids/warmup.py)
+    product = get_detail_product(product_id)
+    if product is None:
+        raise Http404('Producto no encontrado')
     
     # Asegurarse de que la sesión exista
     if not request.session.session_key:
@@ -85,7 +151,7 @@ def join_auction(request, product_id):
     # Si ya está logueado como guest, redirigir directamente a la subasta
     if 'username' in request.session:
         try:
-            GuestUser.objects.get(username=request.session['username'])
+            get_guest_id(request.session['username'])
             return redirect('product_detail', product_id=product_id)
         except GuestUser.DoesNotExist:
             # Limpiar sesión inválida
@@ -103,15 +169,9 @@ def join_auction(request, product_id):
             })
         
         try:
-            # Verificar si el nombre ya existe (excepto si es el mismo usuario)
             current_username = request.session.get('username', '')
-            if username != current_username and GuestUser.objects.filter(username=username).exists():
-                return render(request, 'join_auction.html', {
-                    'product': product,
-                    'error': 'Este nombre de usuario ya está en uso. Por favor elige otro.'
-                })
-            
             guest_user = None
+            ip_address = (client_ip(request) or '')[:45] or None
             
             # Si el usuario actual existe y queremos cambiarlo, actualizarlo
             if change_user and current_username:
@@ -124,19 +184,19 @@ def join_auction(request, product_id):
                     # Crear nuevo usuario si el antiguo no existe
                     guest_user = GuestUser.objects.create(
                         username=username,
-                        session_key=request.session.session_key
+                        session_key=request.session.session_key,
+                        ip_address=ip_address
                     )
             else:
-                # Crear o obtener usuario guest
-                guest_user, created = GuestUser.objects.get_or_create(
-                    username=username,
-                    defaults={'session_key': request.session.session_key}
-                )
-                
-                # Si el usuario ya existía pero no tenía session_key, actualizarlo
-                if not created:
-                    guest_user.session_key = request.session.session_key
-                    guest_user.save()
+                # Un solo INSERT y sin leer antes: si el nombre ya existe (o lo toma otro en la
+                # misma ola del inicio) la restricción unique lo rechaza sin bloqueos de por medio.
+                # Si el invitado de la sesión existiera, ya se habría redirigido arriba
+                with transaction.atomic():
+                    guest_user = GuestUser.objects.create(
+                        username=username,
+                        session_key=request.session.session_key,
+                        ip_address=ip_address
+                    )
             
             # Guardar username en sesión
             request.session['username'] = username
@@ -145,10 +205,10 @@ def join_auction(request, product_id):
             return redirect('product_detail', product_id=product_id)
         
         except IntegrityError:
-            # Error de integridad (nombre duplicado por race condition)
+            # Nombre duplicado (también por race condition)
             return render(request, 'join_auction.html', {
                 'product': product,
-                'error': 'Este nombre ya está en uso. Intenta con otro.'
+                'error': 'Este nombre de usuario ya está en uso. Por favor elige otro.'
             })
         
         except DatabaseError as e:
@@ -237,106 +297,237 @@ def change_username(request, product_id):
     })
 
 
+# username -> id del invitado. Se invalida por el bus al crear, renombrar o borrar invitados
+guest_ids = LocalCache('guest')
+
+
+def get_guest_id(username):
+    """Id del invitado con ese nombre (cacheado). Lanza GuestUser.DoesNotExist si no existe"""
+    guest_id = guest_ids.get(
+        username,
+        lambda: GuestUser.objects.filter(username=username).values_list('id', flat=True).first(),
+    )
+    if guest_id is None:
+        raise GuestUser.DoesNotExist
+    return guest_id
+
+
+def cache_if_finished(product, version, name, response):
+    """Guarda la respuesta de una subasta finalizada y la marca como inmutable (pasado el margen de is_settled)"""
+    if product.is_settled:
+        finished_cache.set_finished(product.id, version, name, response.content)
+        finished_cache.mark_immutable(response)
+    return response
+
+def price_data(name, amount, fmt):
+    """Precio con su versión formateada (en msgpack formatea el cliente)"""
+    if fmt == MSGPACK:
+        return {name: amount}
+    return {name: amount, f'{name}_formatted': format_amount(amount)}
+
+
+def bid_data(bid, fmt, **extra):
+    """Una puja en el esquema del formato negociado"""
+    # Con un nombre fijo ('Tu puja actual') no se carga el pujador
+    user = extra.pop('user') if 'user' in extra else bid.bidder_name
+    if fmt == MSGPACK:
+        data = {
+            'user': user,
+            'amount': bid.amount,
+            'ts': epoch_ms(bid.created_at),
+        }
+    else:
+        data = {
+            'user': user,
+            'amount': bid.amount,
+            'amount_formatted': bid.amount_formatted,
+            'time': bid.created_at.strftime('%H:%M:%S'),
+        }
+    data.update(extra)
+    return data
+
+
+@sheddable
 @require_http_methods(["GET"])
+@coalesce('bids')
 def get_bids_data(request, product_id):
-    product = Product.objects.get(id=product_id)
+    fmt = negotiate(request)
+    cache_name = f'bids.{fmt}'
+    
+    # Subasta finalizada ya cacheada: no hace falta ni cargar el producto
+    version, cached = finished_cache.get_finished(product_id, cache_name)
+    if cached is not None:
+        return finished_cache.finished_response(cached, fmt)
+    
+    product = state_store.get(product_id)
+    if product is None:
+        return api_response({'error': 'Producto no encontrado'}, fmt, status=404)
     
     #Manejo de subastas silenciosas
     if product.is_silent_auction:
         # Si la subasta está en curso, solo mostrar la puja del usuario actual
+        # (respuestas por usuario: mark_private evita que single-flight las comparta)
         if product.is_ongoing:
             username = request.session.get('username')
+            # Mostrar precio inicial
+            silent_ongoing = {
+                **price_data('current_price', product.starting_price, fmt),
+                'is_silent': True,
+                'is_ongoing': True,
+            }
             
             if username:
                 try:
-                    guest_user = GuestUser.objects.get(username=username)
-                    user_bid = Bid.get_user_latest_bid(product, guest_user)
+                    user_bid = Bid.get_user_latest_bid(product, get_guest_id(username))
                     
                     if user_bid:
-                        return JsonResponse({
-                            'bids': [{
-                                'user': 'Tu puja actual',
-                                'amount': user_bid.amount,
-                                'amount_formatted': user_bid.amount_formatted,
-                                'time': user_bid.created_at.strftime('%H:%M:%S'),
-                                'is_own_bid': True
-                            }],
-                            'current_price': product.starting_price,  # Mostrar precio inicial
-                            'current_price_formatted': product.starting_price_formatted,
-                            'is_silent': True,
-                            'is_ongoing': True,
+                        return mark_private(api_response({
+                            'bids': [bid_data(user_bid, fmt, user='Tu puja actual', is_own_bid=True)],
+                            **silent_ongoing,
                             'message': '🤫 Subasta silenciosa - Solo ves tu puja'
-                        })
+                        }, fmt))
                     else:
-                        return JsonResponse({
+                        return mark_private(api_response({
                             'bids': [],
-                            'current_price': product.starting_price,
-                            'current_price_formatted': product.starting_price_formatted,
-                            'is_silent': True,
-                            'is_ongoing': True,
+                            **silent_ongoing,
                             'message': 'Aún no has pujado'
-                        })
+                        }, fmt))
                 except GuestUser.DoesNotExist:
-                    return JsonResponse({
+                    return mark_private(api_response({
                         'bids': [],
-                        'current_price': product.starting_price,
-                        'current_price_formatted': product.starting_price_formatted,
-                        'is_silent': True,
-                        'is_ongoing': True,
+                        **silent_ongoing,
                         'message': 'Únete para pujar'
-                    })
+                    }, fmt))
             
-            return JsonResponse({
+            return mark_private(api_response({
                 'bids': [],
-                'current_price': product.starting_price,
-                'current_price_formatted': product.starting_price_formatted,
-                'is_silent': True,
-                'is_ongoing': True,
+                **silent_ongoing,
                 'message': 'Subasta silenciosa - Únete para pujar'
-            })
+            }, fmt))
         
         # Si la subasta finalizó, mostrar top 10
         elif product.is_finished:
-            bids = Bid.objects.filter(
-                product_id=product_id
-            ).select_related('guest_user').order_by('-amount', 'created_at')[:10]
+            bids = product.bid_queryset().order_by('-amount', 'created_at')[:10]
             
-            bids_data = [{
-                'user': bid.guest_user.username,
-                'amount': bid.amount,
-                'amount_formatted': bid.amount_formatted,
-                'time': bid.created_at.strftime('%H:%M:%S'),
-                'rank': index + 1,
-                'is_winner': index == 0
-            } for index, bid in enumerate(bids)]
+            bids_data = [
+                bid_data(bid, fmt, rank=index + 1, is_winner=index == 0)
+                for index, bid in enumerate(bids)
+            ]
             
-            return JsonResponse({
+            return cache_if_finished(product, version, cache_name, api_response({
                 'bids': bids_data,
-                'current_price': product.current_price,
-                'current_price_formatted': product.current_price_formatted,
+                **price_data('current_price', product.current_price, fmt),
                 'is_silent': True,
                 'is_ongoing': False,
                 'message': '🏆 Subasta finalizada - Top 10 pujas'
-            })
+            }, fmt))
     
     # Subasta normal (tu código original)
-    bids = Bid.objects.filter(
-        product_id=product_id
-    ).select_related('guest_user').order_by('-created_at')[:10]
+    bids = product.bid_queryset().order_by('-created_at')[:10]
     
-    bids_data = [{
-        'user': bid.guest_user.username,
-        'amount': bid.amount,
-        'amount_formatted': bid.amount_formatted,
-        'time': bid.created_at.strftime('%H:%M:%S')
-    } for bid in bids]
+    bids_data = [bid_data(bid, fmt) for bid in bids]
     
-    return JsonResponse({
+    return cache_if_finished(product, version, cache_name, api_response({
         'bids': bids_data,
-        'current_price': product.current_price,
-        'current_price_formatted': product.current_price_formatted,
+        **price_data('current_price', product.current_price, fmt),
         'is_silent': False
-    })
+    }, fmt))
+
+@require_http_methods(["GET"])
+def get_bid_history(request, product_id):
+    """
+    Historial completo de pujas con paginación por cursor sobre (created_at, id).
+    Parámetros: ?cursor=<token opaco>&limit=<n>
+    """
+    fmt = negotiate(request)
+    product = state_store.get(product_id)
+    if product is None:
+        return api_response({'error': 'Producto no encontrado'}, fmt, status=404)
+
+    try:
+        limit = int(request.GET.get('limit', BID_HISTORY_PAGE_SIZE))
+    except ValueError:
+        return api_response({'error': 'Parámetro limit inválido'}, fmt, status=400)
+    limit = max(1, min(limit, BID_HISTORY_MAX_PAGE_SIZE))
+
+    bids = product.bid_queryset()
+    username = request.session.get('username')
+
+    # Subastas silenciosas en curso: solo se ven las pujas propias
+    if product.is_silent_auction and product.is_ongoing:
+        if not username:
+            return api_response({'bids': [], 'next_cursor': None, 'is_silent': True}, fmt)
+        bids = bids.filter(guest_user__username=username)
+
+    try:
+        page, next_cursor = keyset_page(bids, request.GET.get('cursor'), limit)
+    except InvalidCursor:
+        return api_response({'error': 'Cursor inválido'}, fmt, status=400)
+
+    bids_data = []
+    for bid in page:
+        data = {'id': bid.id, **bid_data(bid, fmt)}
+        if fmt == JSON:
+            data['created_at'] = bid.created_at.isoformat()
+        data['is_own_bid'] = bool(username) and bid.bidder_name == username
+        bids_data.append(data)
+
+    return api_response({
+        'bids': bids_data,
+        'next_cursor': next_cursor,
+        'is_silent': product.is_silent_auction,
+    }, fmt)
+
+@sheddable
+@require_http_methods(["GET"])
+@coalesce('price_history')
+def get_price_history(request, product_id):
+    """
+    Serie de precios para el gráfico, reducida a ?points=<n> puntos.
+    Cada punto es [timestamp en ms, monto].
+    """
+    fmt = negotiate(request)
+    try:
+        budget = int(request.GET.get('points', PRICE_HISTORY_POINTS))
+    except ValueError:
+        return api_response({'error': 'Parámetro points inválido'}, fmt, status=400)
+    budget = max(PRICE_HISTORY_MIN_POINTS, min(budget, PRICE_HISTORY_MAX_POINTS))
+    
+    cache_name = f'price_history.{budget}.{fmt}'
+    version, cached = finished_cache.get_finished(product_id, cache_name)
+    if cached is not None:
+        return finished_cache.finished_response(cached, fmt)
+    
+    product = state_store.get(product_id)
+    if product is None:
+        return api_response({'error': 'Producto no encontrado'}, fmt, status=404)
+    
+    # Subasta silenciosa en curso: las pujas no son públicas
+    if product.is_silent_auction and product.is_ongoing:
+        return api_response({'points': [], 'total': 0, 'is_silent': True}, fmt)
+    
+    # numpy se importa con el primer gráfico, no al arrancar el worker
+    from .timeseries import price_history
+    points, total = price_history(product, budget)
+    return cache_if_finished(product, version, cache_name, api_response({
+        'points': points,
+        'total': total,
+        'is_silent': product.is_silent_auction,
+    }, fmt))
+
+def record_bid_stats(product_id, bidder_id, at):
+    """
+    Tarea en segundo plano (bids/tasks.py): actualiza las estadísticas del producto
+    fuera del bloqueo de la puja. El select_for_update sobre la fila de estadísticas
+    evita perder escrituras entre workers.
+    """
+    with write_transaction():
+        stats, _ = ProductStats.objects.select_for_update().get_or_create(product_id=product_id)
+        stats.record_bid(bidder_id, at)
+        stats.save()
+    # Lo usa la limpieza de invitados (bids/retention.py): la puja puede terminar en el archivo, sin FK al invitado
+    GuestUser.objects.filter(id=bidder_id).update(last_bid_time=at)
+    state_store.update_stats(product_id, stats)
 
 class SubmitBidView(View):
     def post(self, request, product_id):
@@ -352,7 +543,13 @@ class SubmitBidView(View):
             except ValueError:
                 return JsonResponse({'success': False, 'error': 'Monto inválido.'})
             
-            with transaction.atomic():
+            # Obtener usuario (no necesita el bloqueo: se busca antes de tomarlo)
+            username = request.session.get('username')
+            guest_user = GuestUser.objects.filter(username=username).first() if username else None
+            
+            # bid.lock_ms: cuánto se mantiene bloqueada la fila del producto (hasta el commit).
+            # Lo que no es imprescindible para validar y registrar la puja va a la cola de tareas
+            with metrics.timer('bid.lock_ms'), write_transaction():
                 product = Product.objects.select_for_update().get(id=product_id)
                 
                 if not product.is_ongoing:
@@ -361,15 +558,12 @@ class SubmitBidView(View):
                         'error': 'La subasta no está activa.'
                     })
                 
-                # Obtener usuario
-                username = request.session.get('username')
                 if not username:
                     return JsonResponse({
                         'success': False,
                         'error': 'Debes unirte a la subasta primero.'
                     })
                 
-                guest_user = GuestUser.objects.filter(username=username).first()
                 if not guest_user:
                     return JsonResponse({
                         'success': False,
@@ -402,14 +596,16 @@ class SubmitBidView(View):
                         # Actualizar puja existente
                         old_amount = existing_bid.amount
                         existing_bid.amount = amount
-                        existing_bid.created_at = timezone.now()  # Actualizar timestamp
+                        existing_bid.created_at = clock.now()  # Actualizar timestamp
                         existing_bid.save()
                         
                         # Actualizar current_price si es necesario
                         max_bid = Bid.objects.filter(product=product).order_by('-amount').first()
                         if max_bid:
                             product.current_price = max_bid.amount
-                            product.save()
+                            product.save(update_fields=BID_UPDATE_FIELDS)
+                        
+                        submit_on_commit(record_bid_stats, product.id, guest_user.id, clock.now())
                         
                         return JsonResponse({
                             'success': True,
@@ -429,7 +625,9 @@ class SubmitBidView(View):
                         # Actualizar current_price solo si es la puja más alta
                         if amount > product.current_price:
                             product.current_price = amount
-                            product.save()
+                            product.save(update_fields=BID_UPDATE_FIELDS)
+                        
+                        submit_on_commit(record_bid_stats, product.id, guest_user.id, clock.now())
                         
                         return JsonResponse({
                             'success': True,
@@ -462,7 +660,9 @@ class SubmitBidView(View):
                 )
                 
                 product.current_price = amount
-                product.save()
+                product.save(update_fields=BID_UPDATE_FIELDS)
+                
+                submit_on_commit(record_bid_stats, product.id, guest_user.id, clock.now())
                 
                 return JsonResponse({
                     'success': True,
@@ -482,32 +682,155 @@ class SubmitBidView(View):
             })
         
 # Añadir una nueva vista para obtener el estado del producto
+@sheddable
 @require_http_methods(["GET"])
+@track_presence
+@coalesce('status')
 def get_product_status(request, product_id):
     """Obtener el estado actual del producto para el frontend"""
+    fmt = negotiate(request)
+    cache_name = f'status.{fmt}'
+    version, cached = finished_cache.get_finished(product_id, cache_name)
+    if cached is not None:
+        return finished_cache.finished_response(cached, fmt)
+    
+    # Estado desde memoria (bids/state.py): sin ir a la base de datos
+    product = state_store.get(product_id)
+    if product is None:
+        return api_response({'error': 'Producto no encontrado'}, fmt, status=404)
+    
+    compact = fmt == MSGPACK
+    data = {
+        'anti_sniping_active': product.should_show_anti_sniping,
+        'time_remaining': product.time_remaining,
+        'current_price': product.current_price,
+        'is_ongoing': product.is_ongoing,
+    }
+    if compact:
+        data['end_ts'] = epoch_ms(product.end_time)
+    else:
+        data['end_time'] = product.end_time.isoformat()
+    data['is_silent_auction'] = product.is_silent_auction
+    data['stats'] = product.get_stats().as_dict(compact=compact)
+    if not product.is_finished:
+        # Solo en curso o programadas: la respuesta de una finalizada se cachea para siempre
+        data['viewers'] = presence.count(product_id)
+    
+    return cache_if_finished(product, version, cache_name, api_response(data, fmt))
+
+
+@sheddable
+@require_http_methods(["GET"])
+def get_products_status(request):
+    """
+    Estado de varias subastas en una sola petición (polling de la página principal).
+    Parámetro: ?ids=1,2,3 (como mucho BATCH_STATUS_MAX_IDS)
+    """
+    fmt = negotiate(request)
     try:
-        product = get_object_or_404(Product, id=product_id)
-        
-        return JsonResponse({
-            'anti_sniping_active': product.should_show_anti_sniping,
-            'time_remaining': product.time_remaining,
-            'current_price': product.current_price,
-            'is_ongoing': product.is_ongoing,
-            'end_time': product.end_time.isoformat(),
-            'is_silent_auction': product.is_silent_auction,
-        })
-    except Product.DoesNotExist:
-        return JsonResponse({'error': 'Producto no encontrado'}, status=404)
+        ids = list(dict.fromkeys(int(value) for value in request.GET.get('ids', '').split(',') if value.strip()))
+    except ValueError:
+        return api_response({'error': 'Parámetro ids inválido'}, fmt, status=400)
+    if len(ids) > BATCH_STATUS_MAX_IDS:
+        return api_response({'error': f'Como mucho {BATCH_STATUS_MAX_IDS} productos por petición'}, fmt, status=400)
+    
+    products = {}
+    for product_id, product in state_store.get_many(ids).items():
+        status = product.status
+        data = {'status': status}
+        if product.is_silent_auction and status == 'ongoing':
+            # El precio de una subasta silenciosa en curso no se publica
+            data['current_price'] = None
+        else:
+            data.update(price_data('current_price', product.current_price, fmt))
+        if fmt == MSGPACK:
+            data['end_ts'] = epoch_ms(product.end_time)
+        else:
+            data['end_time'] = product.end_time.isoformat()
+        data['time_remaining'] = product.time_remaining
+        data['anti_sniping_active'] = product.should_show_anti_sniping
+        data['is_silent_auction'] = product.is_silent_auction
+        products[str(product_id)] = data
+    
+    return api_response({'products': products}, fmt)
+
+
+def optional_int(value):
+    """'' o None -> None; lanza ValueError si no es un entero"""
+    if value in (None, ''):
+        return None
+    return int(value)
+
+
+@require_http_methods(["GET"])
+def product_search(request):
+    """
+    Búsqueda en el catálogo con filtros y paginación por cursor.
+    Parámetros: ?q=&status=ongoing|upcoming|finished&min_price=&max_price=&cursor=&limit=
+    """
+    fmt = negotiate(request)
+    now = clock.now()
+    status = request.GET.get('status') or None
+    if status not in (None, 'ongoing', 'upcoming', 'finished'):
+        return api_response({'error': 'Parámetro status inválido'}, fmt, status=400)
+    try:
+        min_price = optional_int(request.GET.get('min_price'))
+        max_price = optional_int(request.GET.get('max_price'))
+        limit = int(request.GET.get('limit', SEARCH_PAGE_SIZE))
+    except ValueError:
+        return api_response({'error': 'Parámetros numéricos inválidos'}, fmt, status=400)
+    limit = max(1, min(limit, SEARCH_MAX_PAGE_SIZE))
+    
+    products = Product.objects.defer('description', 'image_variants')
+    products = search_products(products, request.GET.get('q'))
+    if status:
+        products = filter_by_status(products, status, now)
+    products = filter_by_price(products, min_price, max_price, now)
+    
+    try:
+        page, next_cursor = keyset_page(products, request.GET.get('cursor'), limit)
+    except InvalidCursor:
+        return api_response({'error': 'Cursor inválido'}, fmt, status=400)
+    
+    results = []
+    for product in page:
+        product_status = product.status
+        data = {'id': product.id, 'name': product.name, 'status': product_status}
+        if product.is_silent_auction and product_status == 'ongoing':
+            data.update(price_data('current_price', product.starting_price, fmt))
+            data['price_hidden'] = True
+        else:
+            data.update(price_data('current_price', product.current_price, fmt))
+        if fmt == MSGPACK:
+            data['start_ts'] = epoch_ms(product.start_time)
+            data['end_ts'] = epoch_ms(product.end_time)
+        else:
+            data['start_time'] = product.start_time.isoformat()
+            data['end_time'] = product.end_time.isoformat()
+        data['is_silent_auction'] = product.is_silent_auction
+        data['url'] = reverse('product_detail', args=[product.id])
+        data['image'] = product.image.url if product.image else None
+        results.append(data)
+    
+    return api_response({'products': results, 'next_cursor': next_cursor}, fmt)
 
 
+@sheddable
 @require_http_methods(["GET"])
+@track_presence
+@coalesce('chat')
 def get_chat_messages(request, product_id):
     """Obtener los últimos mensajes del chat"""
-    messages = ChatMessage.objects.filter(product_id=product_id).select_related('guest_user').order_by('-created_at')[:50]
+    messages = list(ChatMessage.objects.filter(product_id=product_id).select_related('guest_user').order_by('-created_at')[:50])
+    
+    # Sin mensajes en la tabla caliente: si la subasta está archivada, están en el archivo
+    state = state_store.get(product_id) if not messages else None
+    if state is not None and state.archived_at:
+        messages = list(ArchivedChatMessage.objects.filter(product_id=product_id).order_by('-created_at')[:50])
     
     messages_data = [
         {
-            'user': msg.guest_user.username,
+            'user': msg.author_name,
             'message': msg.message,
             'time': msg.created_at.strftime('%H:%M:%S')
         }
@@ -592,4 +915,18 @@ def logout_guest(request, product_id):
     if 'guest_user_id' in request.session:
         del request.session['guest_user_id']
     
-    return redirect('join_auction', product_id=product_id)
\ No newline at end of file
+    return redirect('join_auction', product_id=product_id)
+
+
+# Como el staff_member_required del admin (login en LOGIN_URL) sin importar todo
+# django.contrib.admin al arrancar
+staff_member_required = user_passes_test(lambda user: user.is_active and user.is_staff)
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def metrics_snapshot(request):
+    """Métricas del proceso actual (solo staff)"""
+    data = metrics.snapshot()
+    data['singleflight'] = coalescing_report(data['counters'])
+    return JsonResponse(data)
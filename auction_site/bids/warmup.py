@@ -0,0 +1,99 @@
+"""
+Arranque de subastas sin estampida.
+
+A la hora de start_time todos los que esperaban en auction_upcoming.html entran a
+la vez. Para que esa ola no llegue a la base de datos:
+
+- El producto de product_detail se guarda en el caché compartido (los datos de
+  catálogo) y todo lo que guarda AuctionState (precio, horarios, si es silenciosa)
+  se toma del estado en memoria (bids/state.py): abrir la página no consulta Product.
+- Una edición fuera de las pujas (admin, variantes de imagen) borra la entrada en
+  este proceso y avisa a los demás por el topic 'detail' del bus. Las pujas no lo
+  publican: solo cambian campos que ya vienen del estado en memoria.
+- Se precalienta poco antes del inicio (AUCTION_WARMUP_AHEAD segundos): lo hace el
+  propio worker que sirve la página de espera y el job 'warm_auctions'.
+- La página de espera recarga en start_time más un retraso aleatorio de hasta
+  AUCTION_START_JITTER segundos calculado en el servidor, directo a la página final
+  (unirse o la subasta) sin pasar por una redirección.
+"""
+import dataclasses
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import clock
+from .bus import bus
+from .models import Product
+from .state import AuctionState, state_store
+
+DETAIL_KEY = 'auction:detail:{}'
+# Todo lo que guarda AuctionState: siempre del estado en memoria, nunca del caché
+LIVE_FIELDS = tuple(
+    f.name for f in dataclasses.fields(AuctionState) if f.name not in ('id', 'stats', 'loaded_at')
+)
+
+
+def get_detail_product(product_id):
+    """Product para product_detail, o None si no existe"""
+    key = DETAIL_KEY.format(product_id)
+    product = cache.get(key)
+    state = state_store.get(product_id)
+    if state is None:
+        cache.delete(key)
+        return None
+    if product is None:
+        product = Product.objects.filter(id=product_id).first()
+        if product is None:
+            return None
+        cache.set(key, product, settings.AUCTION_DETAIL_CACHE_TTL)
+    for field in LIVE_FIELDS:
+        setattr(product, field, getattr(state, field))
+    return product
+
+
+def _drop_detail(product_id):
+    cache.delete(DETAIL_KEY.format(product_id))
+
+
+def forget_detail(product_id):
+    """Tras editar el producto fuera de una puja (admin, importación). Llamar tras el commit"""
+    _drop_detail(product_id)
+    bus.publish('detail', product_id, local=False)
+
+
+def warm_detail(product, refresh=True):
+    """Deja listo lo que va a leer la ola de product_detail al empezar.
+
+    refresh=False (página de espera): solo si falta; reescribirlo queda para el job
+    """
+    key = DETAIL_KEY.format(product.id)
+    if refresh:
+        cache.set(key, product, settings.AUCTION_DETAIL_CACHE_TTL)
+    else:
+        cache.add(key, product, settings.AUCTION_DETAIL_CACHE_TTL)
+    state_store.get(product.id)
+
+
+def starts_soon(product, now=None):
+    now = now or clock.now()
+    return now <= product.start_time <= now + datetime.timedelta(seconds=settings.AUCTION_WARMUP_AHEAD)
+
+
+def warm_upcoming_auctions():
+    """Job 'warm_auctions': subastas que empiezan en los próximos AUCTION_WARMUP_AHEAD segundos"""
+    now = clock.now()
+    products = Product.objects.filter(
+        is_active=True,
+        start_time__gte=now,
+        start_time__lte=now + datetime.timedelta(seconds=settings.AUCTION_WARMUP_AHEAD),
+    )
+    warmed = 0
+    for product in products:
+        warm_detail(product)
+        warmed += 1
+    return {'warmed': warmed}
+
+
+bus.subscribe('detail', _drop_detail)
+bus.subscribe('finished', _drop_detail)
@@ -0,0 +1,753 @@
+// Datos de la página (product_detail.html, json_script): este archivo es estático y se cachea
+const pageConfig = JSON.parse(document.getElementById('product-detail-config').textContent);
+const productId = pageConfig.productId;
+const username = pageConfig.username;
+let currentPrice = pageConfig.currentPrice;
+let updateInterval;
+let chatInterval;
+let statusInterval;
+let antiSnipingActive = false;
+let bidCooldown = false;
+let cooldownTimer = null;
+
+// Deshabilitar funciones si la subasta está finalizada
+const isFinished = pageConfig.isFinished;
+const MAX_BID = 512000000; // 512 millones
+
+// Función para formatear números con separadores de miles
+function formatNumber(number) {
+    return new Intl.NumberFormat('es-CO').format(number);
+}
+
+// Función para parsear números con formato
+function parseFormattedNumber(formattedNumber) {
+    return parseInt(formattedNumber.replace(/\./g, '')) || 0;
+}
+
+// Actualizar el display del precio actual
+function updateCurrentPriceDisplay() {
+    document.getElementById('current-price').innerText = formatNumber(currentPrice);
+    document.getElementById('current-price-display').innerText = formatNumber(currentPrice);
+}
+
+// Función para actualizar el valor del input con formato
+function formatBidInput() {
+    const amountInput = document.getElementById('bid-amount');
+    const formattedValue = formatNumber(parseFormattedNumber(amountInput.value));
+    amountInput.value = formattedValue;
+    
+    // Actualizar el preview de la puja
+    updateBidPreview();
+}
+
+// Función para mostrar preview de la puja
+function updateBidPreview() {
+    const amountInput = document.getElementById('bid-amount');
+    const bidAmount = parseFormattedNumber(amountInput.value);
+    const previewElement = document.getElementById('bid-preview');
+    
+    if (bidAmount > 0) {
+        const increment = bidAmount - currentPrice;
+        
+        if (bidAmount <= currentPrice) {
+            previewElement.innerHTML = `
+                <div class="text-danger">
+                    <small>❌ Debe ser mayor a $${formatNumber(currentPrice)}</small>
+                </div>
+            `;
+        } else if (bidAmount > MAX_BID) {
+            previewElement.innerHTML = `
+                <div class="text-danger">
+                    <small>❌ Máximo permitido: $${formatNumber(MAX_BID)}</small>
+                </div>
+            `;
+        } else if (antiSnipingActive && increment < 1000000) {
+            const requiredIncrement = 1000000 - increment;
+            previewElement.innerHTML = `
+                <div class="text-danger">
+                    <small>❌ Modo anti-sniping: Necesitas incrementar $${formatNumber(requiredIncrement)} más para alcanzar el mínimo de $1,000,000</small>
+                </div>
+            `;
+        } else {
+            previewElement.innerHTML = `
+                <div class="text-success">
+                    <small>✅ Pujarás: $${formatNumber(bidAmount)} (incremento: $${formatNumber(increment)})</small>
+                </div>
+            `;
+        }
+    } else {
+        previewElement.innerHTML = '';
+    }
+}
+
+// Función para puja rápida
+function quickBid(increment) {
+    const newBid = currentPrice + increment;
+    
+    if (newBid > MAX_BID) {
+        alert(`No puedes pujar más de $${formatNumber(MAX_BID)}`);
+        return;
+    }
+    
+    // Verificar si está en modo anti-sniping y el incremento es insuficiente
+    if (antiSnipingActive && increment < 1000000) {
+        alert(`Modo anti-sniping activado. El incremento debe ser de al menos $1,000,000 (intentaste incrementar $${formatNumber(increment)})`);
+        return;
+    }
+    
+    // Actualizar el input y hacer la puja
+    document.getElementById('bid-amount').value = formatNumber(newBid);
+    submitBid();
+}
+
+// Función para puja automática con incremento
+function autoBid(increment) {
+    const newBid = currentPrice + increment;
+    
+    if (newBid > MAX_BID) {
+        alert(`No puedes pujar más de $${formatNumber(MAX_BID)}`);
+        return;
+    }
+    
+    // Solo actualizar el input, no enviar automáticamente
+    document.getElementById('bid-amount').value = formatNumber(newBid);
+    updateBidPreview();
+    document.getElementById('bid-amount').focus();
+}
+
+function updateQuickBidButtons() {
+    // 🆕 NUEVO: Verificar que los elementos existan (no existen en subastas silenciosas)
+    const btnPlus1 = document.getElementById('plus-1');
+    const btnPlus500k = document.getElementById('plus-500k');
+    const btnPlus1m = document.getElementById('plus-1m');
+    
+    if (btnPlus1 && btnPlus500k && btnPlus1m) {
+        btnPlus1.textContent = formatNumber(currentPrice + 1);
+        btnPlus500k.textContent = formatNumber(currentPrice + 500000);
+        btnPlus1m.textContent = formatNumber(currentPrice + 1000000);
+    }
+}
+
+let timeUpdateInterval;
+
+// Función para actualizar el estado anti-sniping
+function updateAntiSnipingStatus(status) {
+    antiSnipingActive = status.anti_sniping_active;
+    
+    // 🆕 NUEVO: No procesar nada en subastas silenciosas
+    if (status.is_silent_auction) {
+        const alertElement = document.getElementById('anti-sniping-alert');
+        if (alertElement) {
+            alertElement.style.display = 'none';
+        }
+        return;
+    }
+    
+    const alertElement = document.getElementById('anti-sniping-alert');
+    const timeRemainingElement = document.getElementById('time-remaining-display');
+    const btnPlus1 = document.getElementById('btn-plus-1');
+    const btnPlus500k = document.getElementById('btn-plus-500k');
+    
+    // Limpiar intervalo anterior si existe
+    if (timeUpdateInterval) {
+        clearInterval(timeUpdateInterval);
+        timeUpdateInterval = null;
+    }
+    
+    if (antiSnipingActive && status.time_remaining > 0) {
+        // Mostrar alerta de anti-sniping
+        alertElement.style.display = 'block';
+        
+        // Deshabilitar botones de puja rápida excepto 1M
+        btnPlus1.disabled = true;
+        btnPlus500k.disabled = true;
+        
+        // Inicializar el tiempo restante
+        let remainingSeconds = Math.max(0, Math.floor(status.time_remaining));
+        
+        // Función para actualizar el tiempo en tiempo real
+        const updateTimeDisplay = () => {
+            if (timeRemainingElement && remainingSeconds >= 0) {
+                timeRemainingElement.innerHTML = `${remainingSeconds} segundos`;
+                remainingSeconds--;
+                
+                // Detener el intervalo cuando llegue a cero
+                if (remainingSeconds < 0) {
+                    clearInterval(timeUpdateInterval);
+                    timeUpdateInterval = null;
+                }
+            }
+        };
+        
+        // Actualizar inmediatamente
+        updateTimeDisplay();
+        
+        // Configurar intervalo para actualizar cada segundo
+        timeUpdateInterval = setInterval(updateTimeDisplay, 1000);
+        
+    } else {
+        // Ocultar alerta de anti-sniping
+        alertElement.style.display = 'none';
+        
+        // Habilitar todos los botones de puja rápida
+        btnPlus1.disabled = false;
+        btnPlus500k.disabled = false;
+        
+        // Limpiar contador de tiempo
+        if (timeRemainingElement) {
+            timeRemainingElement.innerHTML = '';
+        }
+    }
+    
+    // Actualizar la hora de finalización si cambió
+    if (status.end_time) {
+        const endTimeElement = document.getElementById('end_time');
+        if (endTimeElement) {
+            endTimeElement.textContent = formatLocalDateTime(status.end_time);
+        }
+    }
+    
+    // Actualizar el preview por si hay cambios en las validaciones
+    updateBidPreview();
+}
+
+function updateBids() {
+    if (isFinished) {
+        console.log('Subasta finalizada, no se actualizan pujas');
+        return;
+    }
+    
+    fetch(`/api/product/${productId}/bids/`)
+        .then(response => response.json())
+        .then(data => {
+            currentPrice = parseInt(data.current_price);
+            updateCurrentPriceDisplay();
+            updateQuickBidButtons();
+
+            // Actualizar lista de pujas
+            const bidsList = document.getElementById('bids-list');
+            bidsList.innerHTML = '';
+
+            // 🆕 NUEVO: Manejo de subastas silenciosas
+            if (data.is_silent) {
+                if (data.is_ongoing) {
+                    // Subasta silenciosa en curso - mostrar solo puja del usuario
+                    if (data.message) {
+                        const li = document.createElement('li');
+                        li.className = 'list-group-item text-center text-muted';
+                        li.innerHTML = `<em>${data.message}</em>`;
+                        bidsList.appendChild(li);
+                    }
+                    
+                    if (data.bids && data.bids.length > 0) {
+                        data.bids.forEach(bid => {
+                            const li = document.createElement('li');
+                            li.className = 'list-group-item list-group-item-primary';
+                            li.innerHTML = `
+                                <div class="d-flex justify-content-between align-items-center">
+                                    <div>
+                                        <strong>${bid.user}</strong>
+                                        <br><small class="text-muted">Puedes modificarla</small>
+                                    </div>
+                                    <div class="text-end">
+                                        <strong class="text-primary">${formatNumber(bid.amount)}</strong>
+                                        <br><small class="text-muted">${bid.time}</small>
+                                    </div>
+                                </div>
+                            `;
+                            bidsList.appendChild(li);
+                        });
+                    }
+                } else {
+                    // Subasta silenciosa finalizada - mostrar top 10
+                    if (data.message) {
+                        const li = document.createElement('li');
+                        li.className = 'list-group-item active';
+                        li.innerHTML = `<strong>${data.message}</strong>`;
+                        bidsList.appendChild(li);
+                    }
+                    
+                    if (data.bids) {
+                        data.bids.forEach(bid => {
+                            const li = document.createElement('li');
+                            li.className = bid.is_winner ? 'list-group-item list-group-item-success' : 'list-group-item';
+                            li.innerHTML = `
+                                <div class="d-flex justify-content-between align-items-center">
+                                    <div>
+                                        <span class="badge ${bid.is_winner ? 'bg-success' : 'bg-secondary'}">#${bid.rank}</span>
+                                        <strong class="ms-2">${bid.user}</strong>
+                                        ${bid.is_winner ? '<span class="badge bg-warning ms-2">🏆</span>' : ''}
+                                    </div>
+                                    <div class="text-end">
+                                        <strong>${formatNumber(bid.amount)}</strong>
+                                        <br><small class="text-muted">${bid.time}</small>
+                                    </div>
+                                </div>
+                            `;
+                            bidsList.appendChild(li);
+                        });
+                    }
+                }
+            } else {
+            // Subasta normal (tu código original)
+            if (data.bids && data.bids.length > 0) {
+                data.bids.forEach((bid, index) => {
+                    const li = document.createElement('li');
+                    li.className = 'list-group-item';
+                    if (bid.user === username) {
+                        li.classList.add('list-group-item-success');
+                    }
+                    
+                    let html = '';
+                    if (bid.user === username) {
+                        html = `<strong>${bid.user} (Tú)</strong> ${formatNumber(bid.amount)}`;
+                    } else {
+                        html = `<strong>${bid.user}</strong> ${formatNumber(bid.amount)}`;
+                    }
+                    html += `<span class="text-muted float-end">${bid.time}</span>`;
+                    
+                    li.innerHTML = html;
+                    bidsList.appendChild(li);
+                });
+            } else {
+                bidsList.innerHTML = '<li class="list-group-item text-muted">No hay pujas aún</li>';
+                }
+            }
+        })
+        .catch(error => console.error('Error fetching bids:', error));
+}
+
+// Función para obtener el estado del producto
+function updateProductStatus() {
+    if (isFinished) {
+        console.log('Subasta finalizada, no se actualiza estado');
+        return;
+    }
+    
+    fetch(`/api/product/${productId}/status/`)
+        .then(response => response.json())
+        .then(data => {
+            updateAntiSnipingStatus(data);
+            updateViewers(data.viewers);
+        })
+        .catch(error => {
+            console.error('Error fetching product status:', error);
+        });
+}
+
+function updateViewers(viewers) {
+    const badge = document.getElementById('viewers-badge');
+    if (viewers === undefined) {
+        badge.style.display = 'none';
+        return;
+    }
+    document.getElementById('viewers-count').textContent = viewers;
+    badge.title = `${viewers} ${viewers === 1 ? 'persona viendo' : 'personas viendo'}`;
+    badge.style.display = '';
+}
+
+function updatePriceChart() {
+    const svg = document.getElementById('price-chart');
+    const width = Math.max(svg.clientWidth, 100);
+    const height = svg.clientHeight || 160;
+    // Un punto cada ~2px es suficiente para el ancho del gráfico
+    fetch(`/api/product/${productId}/price-history/?points=${Math.round(width / 2)}`)
+        .then(response => response.ok ? response.json() : null)
+        .then(data => {
+            if (!data || data.points.length < 2) {
+                document.getElementById('price-chart-info').textContent = 'Aún no hay suficientes pujas para el gráfico';
+                return;
+            }
+            const points = data.points;
+            const minT = points[0][0], maxT = points[points.length - 1][0];
+            const amounts = points.map(p => p[1]);
+            const minA = Math.min(...amounts), maxA = Math.max(...amounts);
+            const x = t => (t - minT) / Math.max(maxT - minT, 1) * width;
+            const y = a => height - 5 - (a - minA) / Math.max(maxA - minA, 1) * (height - 10);
+            const line = points.map(p => `${x(p[0]).toFixed(1)},${y(p[1]).toFixed(1)}`).join(' ');
+            svg.innerHTML = `<polyline points="${line}" fill="none" stroke="#0d6efd" stroke-width="2"/>`;
+            document.getElementById('price-chart-info').textContent =
+                `${data.total} pujas · de $${formatNumber(minA)} a $${formatNumber(maxA)}`;
+        })
+        .catch(() => {});
+}
+
+function updateChat() {
+    fetch(`/api/product/${productId}/chat/`)
+        .then(response => response.json())
+        .then(data => {
+            const chatMessages = document.getElementById('chat-messages');
+            chatMessages.innerHTML = '';
+            
+            if (data.messages && data.messages.length > 0) {
+                data.messages.forEach(msg => {
+                    const messageDiv = document.createElement('div');
+                    messageDiv.className = 'mb-2';
+                    
+                    if (msg.user === username) {
+                        messageDiv.innerHTML = `
+                            <div class="d-flex justify-content-end">
+                                <div class="bg-primary text-white p-2 rounded" style="max-width: 70%;">
+                                    <small class="d-block">Tú</small>
+                                    ${msg.message}
+                                    <small class="d-block text-end">${msg.time}</small>
+                                </div>
+                            </div>
+                        `;
+                    } else {
+                        messageDiv.innerHTML = `
+                            <div class="d-flex justify-content-start">
+                                <div class="bg-light p-2 rounded" style="max-width: 70%;">
+                                    <small class="d-block text-muted">${msg.user}</small>
+                                    ${msg.message}
+                                    <small class="d-block text-end text-muted">${msg.time}</small>
+                                </div>
+                            </div>
+                        `;
+                    }
+                    
+                    chatMessages.appendChild(messageDiv);
+                });
+                
+                // Auto-scroll to bottom
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            }
+        })
+        .catch(error => {
+            console.error('Error fetching chat:', error);
+        });
+}
+
+function sendMessage() {
+    if (isFinished) {
+        alert('La subasta ha finalizado. No se pueden enviar mensajes.');
+        return;
+    }
+    
+    const messageInput = document.getElementById('chat-input');
+    const message = messageInput.value.trim();
+    
+    if (!message) return;
+    
+    if (!username) {
+        alert('Debes ingresar un nombre para chatear');
+        return;
+    }
+    
+    fetch(`/api/product/${productId}/chat/send/`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCookie('csrftoken'),
+        },
+        body: JSON.stringify({
+            message: message
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            messageInput.value = '';
+            updateChat(); // Actualizar chat inmediatamente
+        } else {
+            alert('Error: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error sending message:', error);
+    });
+}
+
+// Función para validar puja manual
+function validateManualBid(amount) {
+    const increment = amount - currentPrice;
+    if (antiSnipingActive && increment < 1000000) {
+        alert(`Modo anti-sniping activado. El incremento debe ser de al menos $1,000,000 (incrementaste $${formatNumber(increment)})`);
+        return false;
+    }
+    return true;
+}
+
+function submitBid() {
+    if (isFinished) {
+        alert('La subasta ha finalizado. No se pueden realizar más pujas.');
+        return;
+    }
+
+    // Verificar si está en tiempo de espera
+    if (bidCooldown) {
+        alert('Espera un momento antes de hacer otra puja.');
+        return;
+    }
+    
+    const amountInput = document.getElementById('bid-amount');
+    const amount = parseFormattedNumber(amountInput.value);
+    
+    if (isNaN(amount) || amount <= 0) {
+        alert('Por favor ingresa un monto válido');
+        return;
+    }
+    
+    if (amount > MAX_BID) {
+        alert(`La puja no puede exceder los $${formatNumber(MAX_BID)}`);
+        return;
+    }
+    
+    if (amount <= currentPrice) {
+        alert(`La puja debe ser mayor al precio actual ($${formatNumber(currentPrice)})`);
+        return;
+    }
+    
+    // Validación adicional para modo anti-sniping (frontend) - INCREMENTO
+    const increment = amount - currentPrice;
+    if (antiSnipingActive && increment < 1000000) {
+        alert(`Modo anti-sniping activado. El incremento debe ser de al menos $1,000,000 (incrementaste $${formatNumber(increment)})`);
+        return;
+    }
+
+    // Deshabilitar temporalmente los botones de puja
+    setBidButtonsState(false);
+    
+    fetch(`/api/product/${productId}/bid/`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCookie('csrftoken'),
+        },
+        body: JSON.stringify({
+            amount: amount
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            amountInput.value = '';
+            document.getElementById('bid-preview').innerHTML = '';
+
+            // Mensaje diferente para subastas silenciosas
+            if (data.is_silent) {
+                alert(data.message + (data.note ? '\n' + data.note : ''));
+            }
+
+            // Activar tiempo de espera de 2 segundos
+            startCooldown(2000);
+            
+            // Actualizar inmediatamente después de una puja exitosa
+            updateBids();
+            
+            // Si la subasta fue extendida, actualizar el estado inmediatamente
+            if (data.extended) {
+                // Pequeña pausa para asegurar que el backend haya guardado los cambios
+                setTimeout(() => {
+                    updateProductStatus();
+                }, 300);
+            }
+        } else {
+            alert('Error: ' + data.error);
+            // Rehabilitar botones si hay error
+            setBidButtonsState(true);
+        }
+    })
+    .catch(error => {
+        console.error('Error submitting bid:', error);
+        alert('Error al enviar la puja');
+        // Rehabilitar botones si hay error
+        setBidButtonsState(true);
+    });
+}
+
+// Función para iniciar el tiempo de espera
+function startCooldown(duration) {
+    bidCooldown = true;
+    
+    // Mostrar indicador visual de espera
+    const bidButtons = document.querySelectorAll('.bid-buttons button, .btn-primary');
+    bidButtons.forEach(btn => {
+        btn.disabled = true;
+        const originalText = btn.innerHTML;
+        btn.setAttribute('data-original-text', originalText);
+        btn.innerHTML = '⏳ Espera...';
+    });
+
+    // Mostrar temporizador visual
+    const cooldownElement = document.getElementById('cooldown-timer');
+    const cooldownSecondsElement = document.getElementById('cooldown-seconds');
+    cooldownElement.style.display = 'block';
+    
+    let remaining = duration / 1000;
+    cooldownSecondsElement.textContent = remaining.toFixed(1);
+    
+    const countdownInterval = setInterval(() => {
+        remaining -= 0.1;
+        if (remaining <= 0) {
+            clearInterval(countdownInterval);
+            cooldownElement.style.display = 'none';
+            bidCooldown = false;
+            setBidButtonsState(true);
+        } else {
+            cooldownSecondsElement.textContent = remaining.toFixed(1);
+        }
+    }, 100);
+    
+    // Configurar temporizador para restaurar botones
+    if (cooldownTimer) {
+        clearTimeout(cooldownTimer);
+    }
+    
+    cooldownTimer = setTimeout(() => {
+        clearInterval(countdownInterval);
+        cooldownElement.style.display = 'none';
+        bidCooldown = false;
+        setBidButtonsState(true);
+    }, duration);
+}
+
+// Función para establecer el estado de los botones de puja
+function setBidButtonsState(enabled) {
+    const bidButtons = document.querySelectorAll('.bid-buttons button, .btn-primary');
+    bidButtons.forEach(btn => {
+        if (enabled) {
+            btn.disabled = false;
+            const originalText = btn.getAttribute('data-original-text');
+            if (originalText) {
+                btn.innerHTML = originalText;
+            }
+        } else {
+            btn.disabled = true;
+        }
+    });
+    
+    // Aplicar reglas adicionales del modo anti-sniping
+    if (enabled && antiSnipingActive) {
+        document.getElementById('btn-plus-1').disabled = true;
+        document.getElementById('btn-plus-500k').disabled = true;
+    }
+}
+
+function quickChangeUsername() {
+const newUsername = prompt('Ingresa el nombre DE TU EQUIPO DE LIGA MASTER:', username);
+
+if (newUsername && newUsername.trim() && newUsername !== username) {
+    fetch(`/api/product/${productId}/change-username/`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCookie('csrftoken'),
+        },
+        body: JSON.stringify({
+            new_username: newUsername.trim()
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('Nombre cambiado exitosamente');
+            location.reload();
+        } else {
+            alert('Error: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error changing username:', error);
+        // Fallback: redirigir a la página de cambio de nombre
+        window.location.href = pageConfig.changeUsernameUrl;
+    });
+}
+}
+
+// Función para obtener el token CSRF
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+function formatLocalDateTime(isoString) {
+    const date = new Date(isoString);
+    if (isNaN(date)) {
+        return "Fecha inválida";
+    }
+    const options = { 
+        year: 'numeric', month: 'long', day: 'numeric',
+        hour: '2-digit', minute: '2-digit', second: '2-digit'
+    };
+    return date.toLocaleString(undefined, options);
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+    const startElem = document.getElementById('start_time');
+    const endElem = document.getElementById('end_time');
+
+    if (startElem) {
+        const startUTC = startElem.textContent;
+        startElem.textContent = formatLocalDateTime(startUTC);
+    }
+
+    if (endElem) {
+        const endUTC = endElem.textContent;
+        endElem.textContent = formatLocalDateTime(endUTC);
+    }
+});
+
+// Iniciar el polling cuando el documento esté listo
+document.addEventListener('DOMContentLoaded', function() {
+    if (!isFinished) {
+        updateBids(); // Actualizar inmediatamente
+        updateInterval = setInterval(updateBids, 3000); // Actualizar pujas cada 3 segundos
+        
+        updateProductStatus(); // Actualizar estado inmediatamente
+        statusInterval = setInterval(updateProductStatus, 2000); // Actualizar estado cada 2 segundos
+    }
+    
+    updateChat(); // Actualizar chat inmediatamente
+    chatInterval = setInterval(updateChat, 5000);   // Actualizar chat cada 5 segundos
+    
+    if (document.getElementById('price-chart')) {
+        updatePriceChart();
+        if (!isFinished) {
+            setInterval(updatePriceChart, 15000); // El gráfico no necesita ir al segundo
+        }
+    }
+    
+    // Permitir enviar con Enter
+    document.getElementById('bid-amount').addEventListener('keypress', function(e) {
+        if (e.key === 'Enter') {
+            submitBid();
+        }
+    });
+    
+    document.getElementById('chat-input').addEventListener('keypress', function(e) {
+        if (e.key === 'Enter') {
+            sendMessage();
+        }
+    });
+    
+    // Formatear automáticamente el input de puja
+    document.getElementById('bid-amount').addEventListener('input', formatBidInput);
+    window.addEventListener('beforeunload', function() {
+        if (timeUpdateInterval) {
+            clearInterval(timeUpdateInterval);
+        }
+        if (updateInterval) {
+            clearInterval(updateInterval);
+        }
+        if (statusInterval) {
+            clearInterval(statusInterval);
+        }
+        if (chatInterval) {
+            clearInterval(chatInterval);
+        }
+        if (cooldownTimer) {
+            clearTimeout(cooldownTimer);
+        }
+    });
+});